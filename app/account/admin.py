@@ -10,6 +10,7 @@ from unfold.forms import AdminPasswordChangeForm, UserChangeForm, UserCreationFo
 from app.account.inlines import AddressInline
 from app.account.models import Account, Address
 from app.common.admin import BaseAdmin
+from app.common.search import is_uuid
 
 admin.site.unregister(User)
 admin.site.unregister(Group)
@@ -77,7 +78,8 @@ class AccountAdmin(BaseAdmin):
         "cpf",
         "phone",
     )
-    search_help_text = "Buscar por nome, e-mail, cpf ou telefone"
+    search_help_text = "Buscar por nome, e-mail, cpf, telefone ou UUID"
+
     list_filter = BaseAdmin.list_filter + ("type",)
 
     # Changeform
@@ -109,6 +111,14 @@ class AccountAdmin(BaseAdmin):
     inlines = [AddressInline]
     autocomplete_fields = ("user",)
 
+    def get_search_results(self, request, queryset, search_term):
+        # Indexed search key instead of ILIKE over user columns; exact UUID, CPF or phone hit unique indexes
+        if not search_term.strip():
+            return queryset, False
+        if is_uuid(search_term):
+            return queryset.filter(uuid=search_term.strip()), False
+        return queryset.filter(Account.search_filter(search_term)), False
+
     # Display functions
     @display(description="Nome")
     def user_full_name(self, obj):
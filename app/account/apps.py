@@ -4,3 +4,25 @@ from django.apps import AppConfig
 class AccountConfig(AppConfig):
     name = "app.account"
     verbose_name = "Contas de Clientes e Donos"
+
+    def ready(self):
+        from django.contrib.auth.models import User
+        from django.db.models.signals import post_save
+
+        from app.account.models import Account, Address
+        from app.common.cache import register_invalidation
+
+        register_invalidation(Address)
+        def sync_search_key(instance, update_fields=None, **kwargs):
+            # Partial saves without the names or e-mail (e.g. last_login on every login) leave the key as is
+            if update_fields is not None and not {"first_name", "last_name", "email"} & update_fields:
+                return
+            Account.sync_search_key(instance)
+
+        # Names and e-mail live on User: keep the account search key in sync
+        post_save.connect(
+            sync_search_key,
+            sender=User,
+            weak=False,
+            dispatch_uid="account:search_key",
+        )
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 09:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0002_initial'),
+        ('store', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='address',
+            index=models.Index(fields=['-created_at', '-id'], name='address_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 09:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0003_address_address_created_id_idx'),
+        ('store', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='address',
+            index=models.Index(condition=models.Q(('store__isnull', False)), fields=['latitude', 'longitude'], name='address_store_lat_lon_idx'),
+        ),
+    ]
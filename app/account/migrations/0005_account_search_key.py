@@ -0,0 +1,71 @@
+# Generated by Django 6.0 on 2026-10-18 10:23
+
+import re
+import unicodedata
+
+from django.db import migrations, models
+
+# Substring (LIKE) searches on the key use a trigram index on Postgres
+SEARCH_INDEX_SQL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX account_search_key_trgm_idx ON account USING gin (search_key gin_trgm_ops)",
+]
+
+
+def normalize(text):
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    return ' '.join(''.join(char for char in decomposed if not unicodedata.combining(char)).lower().split())
+
+
+def digits(text):
+    return re.sub(r'\D', '', text or '')
+
+
+def build_search_key(user, cpf, phone):
+    # Frozen copy of Account.build_search_key (historical users have no get_full_name)
+    parts = (normalize(f'{user.first_name} {user.last_name}'), (user.email or '').lower(), digits(cpf), digits(phone))
+    return ' '.join(part for part in parts if part)
+
+
+def backfill_search_key(apps, schema_editor):
+    Account = apps.get_model('account', 'Account')
+    batch = []
+    for account in Account.objects.select_related('user').only(
+        'id', 'cpf', 'phone', 'user__first_name', 'user__last_name', 'user__email'
+    ).iterator(chunk_size=2000):
+        account.search_key = build_search_key(account.user, account.cpf, account.phone)
+        batch.append(account)
+        if len(batch) >= 2000:
+            Account.objects.bulk_update(batch, ['search_key'])
+            batch = []
+    Account.objects.bulk_update(batch, ['search_key'])
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for sql in SEARCH_INDEX_SQL:
+        schema_editor.execute(sql)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS account_search_key_trgm_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0004_address_address_store_lat_lon_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='account',
+            name='search_key',
+            field=models.TextField(blank=True, default='', editable=False, help_text='Nome, e-mail, CPF e telefone normalizados, indexados para a busca no admin.', verbose_name='chave de busca'),
+        ),
+        migrations.RunPython(backfill_search_key, migrations.RunPython.noop),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
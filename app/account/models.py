@@ -3,8 +3,13 @@ import re
 from django.contrib.auth.models import User
 from django.db import models, transaction
 from django.db.models import Q
+from django.utils import timezone
 
 from app.common.models import BaseModel
+from app.common.search import digits, normalize
+
+# CPF or phone number as typed, with optional punctuation
+NUMBER_RE = re.compile(r"^[\d\s().+/-]*\d[\d\s().+/-]*$")
 
 
 class Account(BaseModel):
@@ -34,6 +39,13 @@ class Account(BaseModel):
     )
     cpf = models.CharField(verbose_name="CPF", unique=True, max_length=11)
     phone = models.CharField(verbose_name="telefone", unique=True, max_length=13)
+    search_key = models.TextField(
+        verbose_name="chave de busca",
+        blank=True,
+        default="",
+        editable=False,
+        help_text="Nome, e-mail, CPF e telefone normalizados, indexados para a busca no admin.",
+    )
 
     class Meta:
         verbose_name = "conta"
@@ -45,8 +57,55 @@ class Account(BaseModel):
         if self.type == self.TYPE_ADMIN:
             self.user.is_staff = True
             self.user.save()
+        self.search_key = self.build_search_key(self.user, self.cpf, self.phone)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"cpf", "phone", "user"} & set(update_fields):
+            kwargs["update_fields"] = {*update_fields, "search_key"}
         super().save(*args, **kwargs)
 
+    @staticmethod
+    def build_search_key(user: User, cpf: str, phone: str) -> str:
+        return " ".join(
+            part
+            for part in (normalize(user.get_full_name()), (user.email or "").lower(), digits(cpf), digits(phone))
+            if part
+        )
+
+    @classmethod
+    def sync_search_key(cls, user: User) -> None:
+        """Refresh the search key of the account of `user` after the user changed."""
+        account = cls.objects.filter(user=user).only("id", "cpf", "phone").first()
+        if account is not None:
+            # The account renders its user: move updated_at so conditional GETs see the change
+            cls.objects.filter(pk=account.pk).update(
+                search_key=cls.build_search_key(user, account.cpf, account.phone),
+                updated_at=timezone.now(),
+            )
+
+    @classmethod
+    def search_filter(cls, term: str, prefix: str = "") -> Q:
+        """Return the filter of accounts matching `term`, for lookups through `prefix` (e.g. "account__").
+
+        CPF and phone numbers (with or without punctuation) match exactly through
+        their unique indexes, phones with or without the 55 country code; anything
+        else must match every word in `search_key`.
+        """
+        if NUMBER_RE.match(term):
+            number = digits(term)
+            if 10 <= len(number) <= 13:
+                national = number[2:] if len(number) > 11 and number.startswith("55") else number
+                query = Q(**{f"{prefix}phone": national}) | Q(**{f"{prefix}phone": f"55{national}"})
+                if len(number) == 11:
+                    query |= Q(**{f"{prefix}cpf": number})
+                return query
+
+        query = Q()
+        for word in normalize(term).split():
+            # Partial CPF/phone numbers are stored as bare digits
+            word = digits(word) if NUMBER_RE.match(word) else word
+            query &= Q(**{f"{prefix}search_key__contains": word})
+        return query
+
     def __str__(self):
         return self.user.get_full_name()
 
@@ -137,6 +196,15 @@ class Address(BaseModel):
         verbose_name = "endereço"
         verbose_name_plural = "endereços"
         db_table = "address"
+        indexes = [
+            models.Index(fields=["-created_at", "-id"], name="address_created_id_idx"),
+            # Bounding box pre-filter for store discovery
+            models.Index(
+                fields=["latitude", "longitude"],
+                condition=Q(store__isnull=False),
+                name="address_store_lat_lon_idx",
+            ),
+        ]
         constraints = [
             # XOR: Address belongs to either Account or Store
             models.CheckConstraint(
@@ -1,3 +1,62 @@
+from importlib import import_module
+from unittest import mock
+
+from django.apps import apps
 from django.test import TestCase
 
-# Create your tests here.
+from app.account.models import Account
+from app.factories.account import AccountFactory
+from app.factories.user import UserFactory
+
+
+class AccountSearchKeyTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        user = UserFactory(first_name="João", last_name="Conceição")
+        cls.account = AccountFactory(type=Account.TYPE_CLIENT, user=user, cpf="12345678901", phone="5511987654321")
+        AccountFactory(type=Account.TYPE_CLIENT)
+
+    def search(self, term):
+        return list(Account.objects.filter(Account.search_filter(term)))
+
+    def test_search_key_is_kept_in_sync_with_the_user(self):
+        self.assertEqual(
+            Account.objects.get(pk=self.account.pk).search_key,
+            f"joao conceicao {self.account.user.email} 12345678901 5511987654321",
+        )
+        self.account.user.last_name = "Araújo"
+        self.account.user.save()
+        self.assertIn("joao araujo", Account.objects.get(pk=self.account.pk).search_key)
+
+    def test_name_search_is_accent_insensitive(self):
+        self.assertEqual(self.search("JOÃO concei"), [self.account])
+        self.assertEqual(self.search(self.account.user.email.upper()), [self.account])
+
+    def test_exact_numbers_use_the_unique_columns(self):
+        self.assertEqual(str(Account.search_filter("123.456.789-01")), str(Account.search_filter("12345678901")))
+        self.assertEqual(self.search("123.456.789-01"), [self.account])
+        self.assertEqual(self.search("+55 (11) 98765-4321"), [self.account])
+        self.assertEqual(self.search("456.789"), [self.account])
+
+    def test_phone_matches_with_or_without_country_code(self):
+        self.assertEqual(self.search("(11) 98765-4321"), [self.account])
+        self.assertEqual(self.search("11987654321"), [self.account])
+        national = AccountFactory(type=Account.TYPE_CLIENT, phone="1133334444")
+        self.assertEqual(self.search("(11) 3333-4444"), [national])
+        self.assertEqual(self.search("+55 11 3333-4444"), [national])
+
+    def test_partial_user_saves_skip_the_search_key(self):
+        user = self.account.user
+        with mock.patch.object(Account, "sync_search_key") as sync_search_key:
+            user.save(update_fields=["last_login"])
+            sync_search_key.assert_not_called()
+            user.save(update_fields=["email", "last_login"])
+            sync_search_key.assert_called_once_with(user)
+
+    def test_migration_builds_the_same_key(self):
+        migration = import_module("app.account.migrations.0005_account_search_key")
+        expected = Account.objects.get(pk=self.account.pk).search_key
+        Account.objects.update(search_key="")
+        migration.backfill_search_key(apps, None)
+        self.assertEqual(Account.objects.get(pk=self.account.pk).search_key, expected)
@@ -1,13 +1,17 @@
 from app.account.models import Account, Address
 from app.account.serializers import AccountSerializer, AddressSerializer
 from app.common.models import BaseModelViewSet
+from app.common.pagination import KeysetOrPageNumberPagination
 
 
 class AddressViewSet(BaseModelViewSet):
     queryset = Address.objects.select_related("account", "store")
     serializer_class = AddressSerializer
+    pagination_class = KeysetOrPageNumberPagination
 
 
 class AccountViewSet(BaseModelViewSet):
-    queryset = Account.objects.prefetch_related("addresses")
+    queryset = Account.objects.select_related("user").prefetch_related("addresses")
     serializer_class = AccountSerializer
+    # User changes move Account.updated_at (see Account.sync_search_key)
+    conditional_related = ("addresses",)
@@ -1,22 +1,477 @@
+import asyncio
+import csv
+import functools
+import math
+import os
+import re
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Iterable, NamedTuple, Optional
 from urllib.parse import urlencode
 
 import requests
 from django.conf import settings
+from django.core.cache import cache
+from requests.adapters import HTTPAdapter
 from rest_framework import status
+from urllib3.util.retry import Retry
 
 HEADERS = {"User-Agent": "Praeceptor/1.0 (praeceptor@praeceptor.com)"}
 
+NOT_FOUND = "Not Found"
+_MISSING = object()
+
+
+def normalize_zip_code(zip_code: str) -> Optional[str]:
+    """Return the CEP as 8 digits or None when it is not a valid CEP."""
+    digits = re.sub(r"\D", "", str(zip_code or ""))
+    return digits if len(digits) == 8 else None
+
+
+def _outcome(value: Any) -> Any:
+    """First element of Nominatim tuples, the value itself for ViaCEP."""
+    return value[0] if isinstance(value, tuple) else value
+
+
+def is_transient_error(value: Any) -> bool:
+    """Whether a lookup failed for a reason other than the CEP not existing (timeout, 429, 5xx...)."""
+    outcome = _outcome(value)
+    return isinstance(outcome, str) and outcome != NOT_FOUND
+
+
+class Centroid(NamedTuple):
+    """Approximate (lat, lon) of a CEP prefix, returned instead of a geocoded point."""
+
+    latitude: float
+    longitude: float
+
+
+def is_approximate(value: Any) -> bool:
+    """Whether a lookup was answered by the offline prefix table rather than the remote API."""
+    if isinstance(value, dict):
+        return bool(value.get("approximate"))
+    return isinstance(value, Centroid)
+
+
+@dataclass(frozen=True)
+class CepPrefix:
+    """Centroid of a range of 5-digit CEP prefixes."""
+
+    start: int
+    end: int
+    latitude: float
+    longitude: float
+    city: Optional[str]
+    state: str
+
+
+class CepPrefixIndex:
+    """Offline CEP prefix -> centroid lookup, loaded from `CEP_PREFIXES_PATH`.
+
+    Ranges are painted into a direct-address table over the 100k possible 5-digit
+    prefixes (widest first, so city ranges override their state range), making a
+    lookup a single array read with no network.
+    """
+
+    FIELDS = ("start", "end", "latitude", "longitude", "city", "state")
+    EMPTY = 0xFFFFFFFF
+    PREFIXES = 100_000
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._table: Optional[array] = None
+        self._rows: list[CepPrefix] = []
+
+    @classmethod
+    def read_rows(cls, path: Path) -> list[CepPrefix]:
+        """Parse and validate a prefixes CSV, raising ValueError with the offending line."""
+        rows = []
+        with open(path, newline="", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            if tuple(reader.fieldnames or ()) != cls.FIELDS:
+                raise ValueError(f"Expected columns {', '.join(cls.FIELDS)}.")
+            for line, row in enumerate(reader, start=2):
+                try:
+                    prefix = CepPrefix(
+                        start=int(row["start"][:5]),
+                        end=int(row["end"][:5]),
+                        latitude=float(row["latitude"]),
+                        longitude=float(row["longitude"]),
+                        city=row["city"].strip() or None,
+                        state=row["state"].strip().upper(),
+                    )
+                except (TypeError, ValueError) as e:
+                    raise ValueError(f"Line {line}: {e}") from e
+                if not 0 <= prefix.start <= prefix.end < cls.PREFIXES:
+                    raise ValueError(f"Line {line}: invalid range {row['start']}-{row['end']}.")
+                if not (-90 <= prefix.latitude <= 90 and -180 <= prefix.longitude <= 180):
+                    raise ValueError(f"Line {line}: invalid coordinates.")
+                if not re.fullmatch(r"[A-Z]{2}", prefix.state):
+                    raise ValueError(f"Line {line}: invalid UF {row['state']!r}.")
+                rows.append(prefix)
+        return rows
+
+    @classmethod
+    def write_rows(cls, path: Path, rows: Iterable[CepPrefix]) -> None:
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f, lineterminator="\n")
+            writer.writerow(cls.FIELDS)
+            for row in sorted(rows, key=lambda r: (r.start, -(r.end - r.start), r.end)):
+                writer.writerow(
+                    (
+                        f"{row.start:05d}",
+                        f"{row.end:05d}",
+                        f"{row.latitude:.6f}",
+                        f"{row.longitude:.6f}",
+                        row.city or "",
+                        row.state,
+                    )
+                )
+
+    def load(self) -> None:
+        """(Re)build the in-memory table from disk."""
+        rows = self.read_rows(self.path or settings.CEP_PREFIXES_PATH)
+        table = array("I", [self.EMPTY]) * self.PREFIXES
+        for index in sorted(range(len(rows)), key=lambda i: rows[i].start - rows[i].end):
+            row = rows[index]
+            table[row.start : row.end + 1] = array("I", [index]) * (row.end - row.start + 1)
+        with self._lock:
+            self._rows, self._table = rows, table
+
+    def lookup(self, zip_code: str) -> Optional[CepPrefix]:
+        """Return the centroid covering the CEP or None."""
+        key = normalize_zip_code(zip_code)
+        if key is None:
+            return None
+        if self._table is None:
+            self.load()
+        index = self._table[int(key[:5])]
+        return None if index == self.EMPTY else self._rows[index]
+
+
+cep_prefix_index = CepPrefixIndex()
+
+
+def with_cep_prefix_fallback(convert: Callable[[CepPrefix], Any]) -> Callable:
+    """Answer transient lookup failures with the approximate offline centroid.
+
+    Applied outside the cache, so the approximation is never stored and the next
+    lookup retries the remote once the cached error expires. `convert` must mark
+    its result so that `is_approximate` recognizes it.
+    """
+
+    def decorator(fn: Callable[[str], Any]) -> Callable[[str], Any]:
+        @functools.wraps(fn)
+        def wrapper(zip_code: str) -> Any:
+            value = fn(zip_code)
+            if is_transient_error(value) and (prefix := cep_prefix_index.lookup(zip_code)) is not None:
+                return convert(prefix)
+            return value
+
+        return wrapper
+
+    return decorator
+
+
+class ZipCodeCache:
+    """Two-tier cache for CEP lookups: in-process LRU in front of the Django cache.
+
+    Successful lookups live for `CEP_CACHE_TTL`, "Not Found" answers for
+    `CEP_CACHE_NEGATIVE_TTL` and transient failures (timeouts, 429, 5xx) for
+    `CEP_CACHE_ERROR_TTL`. Concurrent misses of the same CEP are coalesced into a
+    single remote call: threads wait on a per-CEP lock and other processes wait on
+    a lock key in the shared cache.
+    """
+
+    def __init__(self, namespace: str, max_size: Optional[int] = None):
+        self.namespace = namespace
+        self.max_size = max_size or settings.CEP_CACHE_LOCAL_SIZE
+        self._local: OrderedDict[str, tuple[Any, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks: dict[str, threading.Lock] = {}
+
+    def cache_key(self, zip_code: str) -> str:
+        return f"cep:{self.namespace}:{zip_code}"
+
+    @staticmethod
+    def ttl_for(value: Any) -> int:
+        """Pick the TTL from the lookup outcome (errors come back as strings)."""
+        if is_transient_error(value):
+            return settings.CEP_CACHE_ERROR_TTL
+        if _outcome(value) == NOT_FOUND:
+            return settings.CEP_CACHE_NEGATIVE_TTL
+        return settings.CEP_CACHE_TTL
+
+    def get(self, zip_code: str) -> Any:
+        """Return the cached value or `_MISSING`, promoting shared hits to the local tier."""
+        with self._lock:
+            entry = self._local.get(zip_code)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > time.monotonic():
+                    self._local.move_to_end(zip_code)
+                    return value
+                del self._local[zip_code]
+
+        value = cache.get(self.cache_key(zip_code), _MISSING)
+        if value is not _MISSING:
+            self._set_local(zip_code, value, self.ttl_for(value))
+        return value
+
+    def set(self, zip_code: str, value: Any) -> None:
+        ttl = self.ttl_for(value)
+        cache.set(self.cache_key(zip_code), value, timeout=ttl)
+        self._set_local(zip_code, value, ttl)
+
+    def clear(self) -> None:
+        """Drop the local tier (the shared tier expires on its own)."""
+        with self._lock:
+            self._local.clear()
+
+    def get_or_fetch(self, zip_code: str, fetch: Callable[[str], Any]) -> Any:
+        """Return the cached lookup of the CEP or call `fetch` once to fill it.
+
+        The normalized CEP is only the cache key; `fetch` receives the CEP as the
+        caller wrote it, so remote queries keep their original formatting.
+        """
+        key = normalize_zip_code(zip_code)
+        if key is None:
+            return fetch(zip_code)
+
+        value = self.get(key)
+        if value is not _MISSING:
+            return value
+
+        with self._key_lock(key):
+            try:
+                # Another thread may have filled it while we waited
+                value = self.get(key)
+                if value is not _MISSING:
+                    return value
+
+                lock_key = f"{self.cache_key(key)}:lock"
+                acquired = cache.add(lock_key, 1, timeout=settings.CEP_CACHE_LOCK_TIMEOUT)
+                if not acquired:
+                    value = self._wait_for_other_process(key)
+                    if value is not _MISSING:
+                        return value
+
+                try:
+                    value = fetch(zip_code)
+                    self.set(key, value)
+                finally:
+                    if acquired:
+                        cache.delete(lock_key)
+                return value
+            finally:
+                with self._lock:
+                    self._key_locks.pop(key, None)
+
+    def _set_local(self, zip_code: str, value: Any, ttl: int) -> None:
+        with self._lock:
+            self._local[zip_code] = (value, time.monotonic() + ttl)
+            self._local.move_to_end(zip_code)
+            while len(self._local) > self.max_size:
+                self._local.popitem(last=False)
+
+    def _key_lock(self, zip_code: str) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(zip_code, threading.Lock())
+
+    def _wait_for_other_process(self, zip_code: str) -> Any:
+        """Poll the shared tier while another process fetches the same CEP."""
+        deadline = time.monotonic() + settings.CEP_CACHE_LOCK_TIMEOUT
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            value = cache.get(self.cache_key(zip_code), _MISSING)
+            if value is not _MISSING:
+                self._set_local(zip_code, value, self.ttl_for(value))
+                return value
+        return _MISSING
+
+
+def cached_zip_code_lookup(namespace: str) -> Callable:
+    """Decorate a `search(zip_code)` function with a `ZipCodeCache`."""
+
+    def decorator(fn: Callable[[str], Any]) -> Callable[[str], Any]:
+        zip_code_cache = ZipCodeCache(namespace)
+
+        @functools.wraps(fn)
+        def wrapper(zip_code: str) -> Any:
+            return zip_code_cache.get_or_fetch(zip_code, fn)
+
+        wrapper.cache = zip_code_cache
+        return wrapper
+
+    return decorator
+
+
+class ThrottledRetry(Retry):
+    """urllib3 retry policy that also waits for a rate-limit slot before each retry."""
+
+    def __init__(self, *args: Any, throttle: Optional[Callable[[], None]] = None, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.throttle = throttle
+
+    def new(self, **kwargs: Any) -> "ThrottledRetry":
+        retry = super().new(**kwargs)
+        retry.throttle = self.throttle
+        return retry
+
+    def sleep(self, response: Any = None) -> None:
+        super().sleep(response)
+        if self.throttle is not None:
+            self.throttle()
+
+
+class HttpClient:
+    """Shared HTTP client for the geocoding integrations.
+
+    Keeps a keep-alive connection pool per process, retries 429/5xx with
+    exponential backoff (honouring Retry-After) and bounds the number of
+    in-flight requests. With `min_interval`, every request, retries included,
+    first takes a slot from a one-token bucket in the Django cache refilled
+    every `min_interval` seconds, so the limit holds across threads and, with a
+    shared `CACHE_URL`, across processes.
+    """
+
+    RETRY_STATUSES = (
+        status.HTTP_429_TOO_MANY_REQUESTS,
+        status.HTTP_500_INTERNAL_SERVER_ERROR,
+        status.HTTP_502_BAD_GATEWAY,
+        status.HTTP_503_SERVICE_UNAVAILABLE,
+        status.HTTP_504_GATEWAY_TIMEOUT,
+    )
+
+    def __init__(
+        self,
+        name: str,
+        max_connections: Optional[int] = None,
+        retries: Optional[int] = None,
+        backoff_factor: Optional[float] = None,
+        min_interval: float = 0.0,
+        timeout: float = 5,
+    ):
+        self.name = name
+        self.max_connections = max_connections or settings.HTTP_CLIENT_MAX_CONNECTIONS
+        self.retries = settings.HTTP_CLIENT_RETRIES if retries is None else retries
+        self.backoff_factor = settings.HTTP_CLIENT_BACKOFF_FACTOR if backoff_factor is None else backoff_factor
+        self.min_interval = min_interval
+        self.timeout = timeout
+
+        self._session: Optional[requests.Session] = None
+        self._session_pid: Optional[int] = None
+        self._lock = threading.Lock()
+        self._semaphore = threading.BoundedSemaphore(self.max_connections)
+
+    @property
+    def session(self) -> requests.Session:
+        """Pooled session, recreated after a fork so workers never share sockets."""
+        with self._lock:
+            if self._session is None or self._session_pid != os.getpid():
+                self._session = self._build_session()
+                self._session_pid = os.getpid()
+            return self._session
+
+    def _build_session(self) -> requests.Session:
+        retry = ThrottledRetry(
+            total=self.retries,
+            backoff_factor=self.backoff_factor,
+            status_forcelist=self.RETRY_STATUSES,
+            allowed_methods=frozenset({"GET"}),
+            respect_retry_after_header=True,
+            raise_on_status=False,  # Hand the last response back so callers map its status
+            throttle=self._throttle,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=self.max_connections,
+            pool_maxsize=self.max_connections,
+            max_retries=retry,
+        )
+        session = requests.Session()
+        session.headers.update(HEADERS)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def _throttle(self) -> None:
+        """Wait until this client's token for the current interval is taken."""
+        if not self.min_interval:
+            return
+        timeout = max(1, math.ceil(2 * self.min_interval))
+        while True:
+            now = time.time()
+            window = int(now // self.min_interval)
+            # cache.add is atomic: exactly one request wins each window
+            if cache.add(f"http:throttle:{self.name}:{window}", 1, timeout=timeout):
+                return
+            time.sleep((window + 1) * self.min_interval - now)
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        kwargs.setdefault("timeout", self.timeout)
+        with self._semaphore:
+            self._throttle()
+            return self.session.get(url, **kwargs)
+
+
+async def asearch_many(search: Callable[[str], Any], zip_codes: Iterable[str], max_concurrency: int) -> dict:
+    """Run a blocking `search(zip_code)` for many CEPs concurrently from asyncio.
+
+    Each lookup runs in a worker thread over the shared pooled session; the
+    client's own semaphore and rate limit still apply.
+
+    Returns:
+        dict: Lookup result by CEP, in input order without duplicates.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run(zip_code: str) -> Any:
+        async with semaphore:
+            return await asyncio.to_thread(search, zip_code)
+
+    unique = list(dict.fromkeys(zip_codes))
+    results = await asyncio.gather(*(run(zip_code) for zip_code in unique))
+    return dict(zip(unique, results))
+
+
+def search_many(search: Callable[[str], Any], zip_codes: Iterable[str], max_concurrency: int) -> dict:
+    """Blocking counterpart of `asearch_many` on a thread pool.
+
+    Never starts an event loop, so it is safe to call from code already running
+    inside one (async views, notebooks).
+    """
+    unique = list(dict.fromkeys(zip_codes))
+    if not unique:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(max_concurrency, len(unique))) as executor:
+        return dict(zip(unique, executor.map(search, unique)))
+
+
+nominatim_client = HttpClient("nominatim", min_interval=settings.NOMINATIM_MIN_INTERVAL)
+viacep_client = HttpClient("viacep")
+
 
 class NominatimAPI:
 
+    client = nominatim_client
+
     @staticmethod
+    @with_cep_prefix_fallback(lambda prefix: Centroid(prefix.latitude, prefix.longitude))
+    @cached_zip_code_lookup("nominatim")
     def search(zip_code: str) -> tuple:
         """Search for latitude and longitude from Nominatim API by zip code.
 
         Args:
             zip_code (str): CEP to be geocoded.
         Returns:
-            tuple or None: Latitude and longitude as a tuple if successful, None otherwise.
+            tuple: Latitude and longitude if successful, a `Centroid` when only the
+            offline prefix table could answer, error strings otherwise.
         """
         url = f"{settings.NOMINATIM_ENDPOINT}/search"
         params = {
@@ -27,20 +482,17 @@ class NominatimAPI:
         }
 
         try:
-            response = requests.get(
-                url=url,
-                headers=HEADERS,
-                params=params,
-                timeout=5,
-            )
-        except requests.RequestException:
-            return "RequestException", "RequestException"
+            response = NominatimAPI.client.get(url=url, params=params)
         except requests.Timeout:
             return "Timeout", "Timeout"
+        except requests.RequestException:
+            return "RequestException", "RequestException"
 
         if response.status_code == status.HTTP_200_OK:
             try:
                 response = response.json()
+                if not response:
+                    return NOT_FOUND, NOT_FOUND
                 lat = float(response[0].get("lat", None))
                 lon = float(response[0].get("lon", None))
                 return lat, lon
@@ -48,7 +500,7 @@ class NominatimAPI:
                 return "Error", "Error"
 
         if response.status_code == status.HTTP_404_NOT_FOUND:
-            return "Not Found", "Not Found"
+            return NOT_FOUND, NOT_FOUND
 
         if response.status_code == status.HTTP_403_FORBIDDEN:
             return "Forbidden", "Forbidden"
@@ -61,10 +513,39 @@ class NominatimAPI:
 
         return "Error", "Error"
 
+    @classmethod
+    async def asearch(cls, zip_code: str) -> tuple:
+        """Async variant of `search`."""
+        return await asyncio.to_thread(cls.search, zip_code)
+
+    @classmethod
+    async def asearch_many(cls, zip_codes: Iterable[str], max_concurrency: Optional[int] = None) -> dict:
+        """Geocode many CEPs concurrently, within Nominatim's rate limit."""
+        return await asearch_many(cls.search, zip_codes, max_concurrency or cls.client.max_connections)
+
+    @classmethod
+    def search_many(cls, zip_codes: Iterable[str], max_concurrency: Optional[int] = None) -> dict:
+        """Blocking variant of `asearch_many` for commands and admin actions."""
+        return search_many(cls.search, zip_codes, max_concurrency or cls.client.max_connections)
+
 
 class ViaCEPAPI:
 
+    client = viacep_client
+
     @staticmethod
+    @with_cep_prefix_fallback(
+        lambda prefix: dict(
+            street=None,
+            neighborhood=None,
+            city=prefix.city,
+            state=prefix.state,
+            region=None,
+            country="Brasil",
+            approximate=True,
+        )
+    )
+    @cached_zip_code_lookup("viacep")
     def search(zip_code: str) -> dict:
         """Search for address data from ViaCEP API by zip code.
 
@@ -76,19 +557,17 @@ class ViaCEPAPI:
         url = f"{settings.VIACEP_ENDPOINT}/{zip_code}/json/"
 
         try:
-            response = requests.get(
-                url=url,
-                headers=HEADERS,
-                timeout=5,
-            )
-        except requests.RequestException:
-            return "RequestException"
+            response = ViaCEPAPI.client.get(url=url)
         except requests.Timeout:
             return "Timeout"
+        except requests.RequestException:
+            return "RequestException"
 
         if response.status_code == status.HTTP_200_OK:
             try:
                 response = response.json()
+                if response.get("erro"):
+                    return NOT_FOUND
                 return dict(
                     street=response.get("logradouro"),
                     neighborhood=response.get("bairro"),
@@ -101,7 +580,7 @@ class ViaCEPAPI:
                 return "Error"
 
         if response.status_code == status.HTTP_404_NOT_FOUND:
-            return "Not Found"
+            return NOT_FOUND
 
         if response.status_code == status.HTTP_403_FORBIDDEN:
             return "Forbidden"
@@ -113,3 +592,18 @@ class ViaCEPAPI:
             return "Internal Server Error"
 
         return "Error"
+
+    @classmethod
+    async def asearch(cls, zip_code: str) -> dict:
+        """Async variant of `search`."""
+        return await asyncio.to_thread(cls.search, zip_code)
+
+    @classmethod
+    async def asearch_many(cls, zip_codes: Iterable[str], max_concurrency: Optional[int] = None) -> dict:
+        """Look up many CEPs concurrently."""
+        return await asearch_many(cls.search, zip_codes, max_concurrency or cls.client.max_connections)
+
+    @classmethod
+    def search_many(cls, zip_codes: Iterable[str], max_concurrency: Optional[int] = None) -> dict:
+        """Blocking variant of `asearch_many` for commands and admin actions."""
+        return search_many(cls.search, zip_codes, max_concurrency or cls.client.max_connections)
@@ -0,0 +1,8 @@
+from django.apps import AppConfig
+
+
+class CommonConfig(AppConfig):
+    name = "app.common"
+
+    def ready(self):
+        from app.common import checks  # noqa: F401, registers the system checks
@@ -0,0 +1,160 @@
+import hashlib
+import time
+from typing import Iterable
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import models, transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+from rest_framework.response import Response
+
+CACHE_HEADER = "X-Cache"
+CACHED_HEADERS = ("ETag", "Last-Modified")
+
+
+def model_tag(model: type[models.Model]) -> str:
+    return f"model:{model._meta.label_lower}"
+
+
+def _version_key(tag: str) -> str:
+    return f"tag:{tag}"
+
+
+def _metric_key(name: str, outcome: str) -> str:
+    return f"metrics:{name}:{outcome}"
+
+
+def _seed_version(tag: str) -> int:
+    """Start the version of a new or evicted tag.
+
+    Seeded with the current time rather than 1: a counter restarting after an
+    eviction could repeat a version whose entries are still cached.
+    """
+    version = time.time_ns()
+    cache.add(_version_key(tag), version, timeout=None)
+    return cache.get(_version_key(tag), version)
+
+
+def tag_versions(tags: Iterable[str]) -> list[int]:
+    """Return the current version of each tag, seeding unknown tags."""
+    tags = list(tags)
+    versions = cache.get_many([_version_key(tag) for tag in tags])
+    return [versions.get(_version_key(tag)) or _seed_version(tag) for tag in tags]
+
+
+def versioned_key(name: str, parts: Iterable, tags: Iterable[str]) -> str:
+    """Build a cache key that changes whenever one of `tags` is invalidated.
+
+    Invalidation never deletes entries: bumping a tag version makes every key
+    built with the old version unreachable, and those entries expire by TTL.
+    """
+    tags = sorted(set(tags))
+    raw = "|".join([*map(str, parts), *(f"{tag}={version}" for tag, version in zip(tags, tag_versions(tags)))])
+    return f"{name}:{hashlib.md5(raw.encode()).hexdigest()}"
+
+
+def invalidate(*tags: str) -> None:
+    """Bump the version of each tag, dropping every cached value built with it."""
+    for tag in tags:
+        try:
+            cache.incr(_version_key(tag))
+        except ValueError:
+            # Unknown tag (never read or evicted): a fresh seed differs from any earlier version
+            _seed_version(tag)
+
+
+def record(name: str, outcome: str) -> None:
+    """Count a cache hit or miss, in the shared cache so every worker reports together."""
+    key = _metric_key(name, outcome)
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, 1, timeout=None)
+
+
+def metrics(names: Iterable[str]) -> dict[str, dict[str, int]]:
+    """Return `{name: {"hit": n, "miss": n}}` for the given cache names."""
+    keys = {(name, outcome): _metric_key(name, outcome) for name in names for outcome in ("hit", "miss")}
+    values = cache.get_many(keys.values())
+    result = {}
+    for (name, outcome), key in keys.items():
+        result.setdefault(name, {})[outcome] = values.get(key, 0)
+    return result
+
+
+def reset_metrics(names: Iterable[str]) -> None:
+    cache.delete_many([_metric_key(name, outcome) for name in names for outcome in ("hit", "miss")])
+
+
+def register_invalidation(*tracked: type[models.Model]) -> None:
+    """Invalidate the model tag of each model on save, delete and m2m changes, after commit."""
+
+    def receiver(sender, **kwargs):
+        if kwargs.get("action", "post_").startswith("post_"):
+            transaction.on_commit(lambda: invalidate(model_tag(sender)))
+
+    for model in tracked:
+        post_save.connect(receiver, sender=model, weak=False, dispatch_uid=f"cache:save:{model_tag(model)}")
+        post_delete.connect(receiver, sender=model, weak=False, dispatch_uid=f"cache:delete:{model_tag(model)}")
+        for field in model._meta.local_many_to_many:
+            m2m_changed.connect(
+                lambda sender, _model=model, **kwargs: receiver(_model, **kwargs),
+                sender=field.remote_field.through,
+                weak=False,
+                dispatch_uid=f"cache:m2m:{model_tag(model)}:{field.name}",
+            )
+
+
+class CachedReadMixin:
+    """Serve `list`/`retrieve` responses from the shared cache.
+
+    Keys are versioned by the tags of `cache_models`, the models rendered by the
+    serializer; saving or deleting any of them (see `register_invalidation`)
+    invalidates every cached response of the viewset. Responses carry `X-Cache`.
+    `get_response_version()` is part of the key, for bodies that depend on time.
+    """
+
+    cache_models: tuple[type[models.Model], ...] = ()
+    cache_timeout = None  # Default: settings.CACHE_TTL
+
+    @property
+    def cache_name(self) -> str:
+        return self.queryset.model._meta.label_lower
+
+    def cached_response(self, request, render):
+        key = versioned_key(
+            self.cache_name,
+            [request.method, request.build_absolute_uri(), request.accepted_media_type, self.get_response_version()],
+            map(model_tag, self.cache_models),
+        )
+        cached = cache.get(key)
+        if cached is not None:
+            record(self.cache_name, "hit")
+            data, headers = cached
+            not_modified = get_conditional_response(
+                request,
+                etag=headers.get("ETag"),
+                last_modified=parse_http_date_safe(headers.get("Last-Modified", "")),
+            )
+            response = not_modified or Response(data)
+            for header, value in headers.items():
+                response[header] = value
+            response[CACHE_HEADER] = "HIT"
+            return response
+
+        record(self.cache_name, "miss")
+        response = render()
+        if response.status_code == 200:
+            headers = {header: response[header] for header in CACHED_HEADERS if header in response}
+            cache.set(key, (response.data, headers), timeout=self.cache_timeout or settings.CACHE_TTL)
+        response[CACHE_HEADER] = "MISS"
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(request, lambda: super(CachedReadMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(request, lambda: super(CachedReadMixin, self).retrieve(request, *args, **kwargs))
@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core import checks
+
+# Backends whose data every worker shares and whose incr is atomic
+SHARED_CACHE_BACKENDS = ("django.core.cache.backends.redis.RedisCache",)
+
+
+@checks.register(checks.Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """Warn when the default cache is private to each process or has a racy `incr`.
+
+    Cache invalidation tags, store schedules, order events and the geocoding
+    rate limit all rely on it being shared by every worker.
+    """
+    if settings.CACHES["default"]["BACKEND"] in SHARED_CACHE_BACKENDS:
+        return []
+    return [
+        checks.Warning(
+            "The default cache is not shared between workers.",
+            hint=(
+                "Set CACHE_URL=redis://... when running more than one process: invalidations, order events "
+                "and rate limits stay local to each process with locmem, and the file backend's incr is not atomic."
+            ),
+            id="common.W001",
+        )
+    ]
@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import json
+import time
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Dict, List, Tuple, Type
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import models, transaction
+from django.utils import timezone
+
+from app.account.models import Address
+from app.api import NominatimAPI, is_approximate, is_transient_error
+from app.order.models import Order
+
+MODELS: Dict[str, Type[models.Model]] = {
+    "address": Address,
+    "order": Order,
+}
+
+# Order.updated_at tracks status changes (lateness, duration), so geocoding leaves it alone
+UPDATE_FIELDS: Dict[str, List[str]] = {
+    "address": ["latitude", "longitude", "updated_at"],
+    "order": ["latitude", "longitude"],
+}
+
+COORDINATE_PLACES = Decimal("0.000001")
+
+
+class Command(BaseCommand):
+    help = (
+        "Preenche latitude/longitude de endereços e pedidos sem coordenadas via Nominatim, "
+        "em lotes ordenados por id, com checkpoint para retomar após interrupção. Linhas com falha "
+        "transitória (timeout, 429, 5xx) ou só com a coordenada aproximada do prefixo de CEP ficam no "
+        "checkpoint e são retentadas no início da próxima execução."
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--model",
+            choices=[*MODELS, "all"],
+            default="all",
+            help="Tabela a geocodificar (default: all).",
+        )
+        parser.add_argument("--batch-size", type=int, default=500, help="Linhas por lote (default: 500).")
+        parser.add_argument(
+            "--concurrency", type=int, default=None, help="Consultas simultâneas ao Nominatim (default: do cliente)."
+        )
+        parser.add_argument(
+            "--checkpoint",
+            type=str,
+            default="geocode.checkpoint.json",
+            help="Arquivo com o último id processado e os ids a retentar por tabela.",
+        )
+        parser.add_argument("--reset", action="store_true", help="Ignora o checkpoint e recomeça do início.")
+        parser.add_argument("--limit", type=int, default=0, help="Máximo de linhas por tabela (0 = sem limite).")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        batch_size: int = options["batch_size"]
+        if batch_size <= 0:
+            raise CommandError("--batch-size deve ser > 0.")
+
+        checkpoint_path = Path(options["checkpoint"])
+        checkpoint = {} if options["reset"] else self._load_checkpoint(checkpoint_path)
+        names = list(MODELS) if options["model"] == "all" else [options["model"]]
+
+        for name in names:
+            self._geocode_model(
+                name=name,
+                model=MODELS[name],
+                checkpoint=checkpoint,
+                checkpoint_path=checkpoint_path,
+                batch_size=batch_size,
+                concurrency=options["concurrency"],
+                limit=options["limit"],
+            )
+
+    def _geocode_model(
+        self,
+        name: str,
+        model: Type[models.Model],
+        checkpoint: Dict[str, dict],
+        checkpoint_path: Path,
+        batch_size: int,
+        concurrency: int | None,
+        limit: int,
+    ) -> None:
+        state = checkpoint.setdefault(name, {"last_id": 0, "retry": []})
+        pending = model.objects.filter(latitude__isnull=True).order_by("id")
+        self.stdout.write(
+            self.style.MIGRATE_HEADING(
+                f"[geocode] {name}: retomando após id={state['last_id']}, {len(state['retry'])} a retentar"
+            )
+        )
+
+        started = time.perf_counter()
+        scanned = updated = 0
+
+        # Retry pass: earlier transient failures, rows geocoded meanwhile drop out of `pending`
+        retry_ids, still_failing = state["retry"], []
+        for i in range(0, len(retry_ids), batch_size):
+            rows = list(pending.filter(id__in=retry_ids[i : i + batch_size]).values_list("id", "zip_code"))
+            count, failed = self._geocode_rows(name, model, rows, concurrency)
+            updated += count
+            still_failing += failed
+        state["retry"] = still_failing
+        self._save_checkpoint(checkpoint_path, checkpoint)
+
+        while not limit or scanned < limit:
+            size = min(batch_size, limit - scanned) if limit else batch_size
+            rows = list(pending.filter(id__gt=state["last_id"]).values_list("id", "zip_code")[:size])
+            if not rows:
+                break
+
+            count, failed = self._geocode_rows(name, model, rows, concurrency)
+            # Transient failures are kept for a later retry, so the checkpoint can move past them
+            state["last_id"] = rows[-1][0]
+            state["retry"] += failed
+            scanned += len(rows)
+            updated += count
+            self._save_checkpoint(checkpoint_path, checkpoint)
+
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"[geocode] {name}: id<={state['last_id']} lidas={scanned} atualizadas={updated} "
+                f"a retentar={len(state['retry'])} ({scanned / elapsed:.1f} linhas/s)"
+            )
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"[geocode] {name}: OK. lidas={scanned} atualizadas={updated} "
+                f"a retentar={len(state['retry'])} em {elapsed:.1f}s"
+            )
+        )
+
+    def _geocode_rows(
+        self,
+        name: str,
+        model: Type[models.Model],
+        rows: List[Tuple[int, str]],
+        concurrency: int | None,
+    ) -> Tuple[int, List[int]]:
+        """Geocode (id, zip_code) rows and save them.
+
+        Returns:
+            Tuple[int, List[int]]: Rows updated and ids that failed transiently or got only a centroid.
+        """
+        if not rows:
+            return 0, []
+
+        # Dedupe by CEP, repeated CEPs across batches are served by the CEP cache
+        results = NominatimAPI.search_many({zip_code for _, zip_code in rows}, max_concurrency=concurrency)
+
+        now = timezone.now()
+        objs, failed = [], []
+        for pk, zip_code in rows:
+            result = results.get(zip_code)
+            # A prefix centroid means the remote failed, retry for the real point instead of storing it
+            if is_transient_error(result) or is_approximate(result):
+                failed.append(pk)
+                continue
+            lat, lon = result if isinstance(result, tuple) else (None, None)
+            if isinstance(lat, float) and isinstance(lon, float):
+                objs.append(
+                    model(
+                        id=pk,
+                        latitude=Decimal(str(lat)).quantize(COORDINATE_PLACES),
+                        longitude=Decimal(str(lon)).quantize(COORDINATE_PLACES),
+                        updated_at=now,
+                    )
+                )
+
+        # One short transaction per batch, no table-wide locks
+        with transaction.atomic():
+            model.objects.bulk_update(objs, UPDATE_FIELDS[name])
+        return len(objs), failed
+
+    def _load_checkpoint(self, path: Path) -> Dict[str, dict]:
+        if not path.exists():
+            return {}
+        try:
+            checkpoint = {}
+            for name, state in json.loads(path.read_text()).items():
+                # Older checkpoints stored only the last id
+                if not isinstance(state, dict):
+                    state = {"last_id": state}
+                checkpoint[name] = {
+                    "last_id": int(state.get("last_id", 0)),
+                    "retry": [int(pk) for pk in state.get("retry", [])],
+                }
+            return checkpoint
+        except (ValueError, TypeError, AttributeError) as e:
+            raise CommandError(f"Checkpoint inválido em {path}: {e}") from e
+
+    def _save_checkpoint(self, path: Path, checkpoint: Dict[str, dict]) -> None:
+        # Write then rename, so an interruption never leaves a truncated file
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        tmp.write_text(json.dumps(checkpoint))
+        tmp.replace(path)
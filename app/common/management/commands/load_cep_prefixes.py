@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from app.api import CepPrefixIndex
+
+
+class Command(BaseCommand):
+    help = (
+        "Valida e instala a tabela offline de prefixos de CEP (start,end,latitude,longitude,city,state) "
+        "usada como fallback quando Nominatim/ViaCEP estão indisponíveis."
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("source", type=str, help="CSV de origem com as colunas start,end,latitude,longitude,city,state.")
+        parser.add_argument(
+            "--output",
+            type=str,
+            default="",
+            help="Destino do arquivo normalizado (default: settings.CEP_PREFIXES_PATH).",
+        )
+        parser.add_argument("--check", type=str, default="", help="CEP para testar a tabela após a carga.")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        source = Path(options["source"])
+        output = Path(options["output"] or settings.CEP_PREFIXES_PATH)
+
+        try:
+            rows = CepPrefixIndex.read_rows(source)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Arquivo inválido {source}: {e}") from e
+        if not rows:
+            raise CommandError(f"Nenhum prefixo encontrado em {source}.")
+
+        output.parent.mkdir(parents=True, exist_ok=True)
+        CepPrefixIndex.write_rows(output, rows)
+
+        # Rebuild from the written file to make sure it loads
+        index = CepPrefixIndex(output)
+        index.load()
+        self.stdout.write(self.style.SUCCESS(f"[load_cep_prefixes] {len(rows)} faixas gravadas em {output}."))
+
+        if zip_code := options["check"]:
+            prefix = index.lookup(zip_code)
+            if prefix is None:
+                self.stdout.write(self.style.WARNING(f"[load_cep_prefixes] {zip_code}: sem cobertura."))
+            else:
+                self.stdout.write(
+                    f"[load_cep_prefixes] {zip_code}: {prefix.city or '-'} / {prefix.state} "
+                    f"({prefix.latitude:.6f}, {prefix.longitude:.6f})"
+                )
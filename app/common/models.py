@@ -1,10 +1,17 @@
+import hashlib
 import uuid as _uuid
+from typing import Optional
 
+from django.core.exceptions import FieldDoesNotExist, ObjectDoesNotExist
 from django.db import models
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, serializers, viewsets
 from rest_framework.generics import get_object_or_404
 from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
 
 
 class BaseModel(models.Model):
@@ -22,6 +29,17 @@ class BaseModel(models.Model):
         abstract = True
 
 
+class Minutes(models.Func):
+    """Duration of a numeric expression of minutes, for database datetime arithmetic."""
+
+    template = "(%(expressions)s) * INTERVAL '1 minute'"
+    output_field = models.DurationField()
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        # SQLite stores durations as integer microseconds
+        return self.as_sql(compiler, connection, template="(%(expressions)s) * 60000000", **extra_context)
+
+
 class LookupIdOrUuidMixin:
     """Mixin to allow lookup by either ID (pk) or UUID field."""
 
@@ -44,10 +62,8 @@ class LookupIdOrUuidMixin:
         except Exception:
             return False
 
-    def get_object(self):
-        """Retrieve the object based on either UUID or ID."""
-        queryset = self.filter_queryset(self.get_queryset())
-
+    def get_lookup_kwargs(self) -> dict:
+        """Return the queryset filter matching the URL lookup value by UUID or ID."""
         lookup_kwarg = self.lookup_url_kwarg or self.lookup_field  # normalmente "pk"
         lookup_value = self.kwargs.get(lookup_kwarg)
 
@@ -55,15 +71,178 @@ class LookupIdOrUuidMixin:
             raise AssertionError("Lookup value not found in URL kwargs.")
 
         if self._model_has_uuid_field() and self._is_uuid(lookup_value):
-            obj = get_object_or_404(queryset, **{self.uuid_field_name: lookup_value})
-        else:
-            obj = get_object_or_404(queryset, pk=lookup_value)
+            return {self.uuid_field_name: lookup_value}
+        return {"pk": lookup_value}
 
+    def get_object(self):
+        """Retrieve the object based on either UUID or ID."""
+        queryset = self.filter_queryset(self.get_queryset())
+        obj = get_object_or_404(queryset, **self.get_lookup_kwargs())
         self.check_object_permissions(self.request, obj)
         return obj
 
 
-class BaseModelViewSet(LookupIdOrUuidMixin, viewsets.ModelViewSet):
+class ConditionalGetMixin:
+    """Mixin to answer list and detail requests with 304 Not Modified.
+
+    Validators come from a single `Max(updated_at)`/`Count` query over the filtered
+    queryset, so unchanged resources are answered before any serializer runs.
+    Nested rows rendered by the serializer must be listed in `conditional_related`
+    (relations whose model has `updated_at`), so that their changes and deletions
+    refresh the validators too. Set `last_modified_field = None` to opt out.
+
+    The aggregate count is reused by the page number paginator, and unconditional
+    detail requests build their validators from the loaded object, so full
+    responses do not pay for an extra query.
+    """
+
+    last_modified_field = "updated_at"
+    conditional_related: tuple[str, ...] = ()
+
+    def get_response_version(self) -> str:
+        """Extra validator part for bodies that change without a model write (e.g. time-based fields)."""
+        return ""
+
+    def has_conditional_field(self, model: type[models.Model]) -> bool:
+        if self.last_modified_field is None:
+            return False
+        try:
+            model._meta.get_field(self.last_modified_field)
+        except FieldDoesNotExist:
+            return False
+        return True
+
+    def get_conditional_validators(self, queryset: models.QuerySet) -> tuple[Optional[str], Optional[int]]:
+        """Return the (ETag, Last-Modified timestamp) pair for the given queryset."""
+        if not self.has_conditional_field(queryset.model):
+            return None, None
+
+        aggregates = {
+            "last_modified": Max(self.last_modified_field),
+            # Joins on nested relations repeat the top-level rows
+            "count": Count("pk", distinct=bool(self.conditional_related)),
+        }
+        for index, path in enumerate(self.conditional_related):
+            aggregates[f"related_{index}_last_modified"] = Max(f"{path}__updated_at")
+            aggregates[f"related_{index}_count"] = Count(path, distinct=True)
+        agg = queryset.order_by().aggregate(**aggregates)
+        self.conditional_count = agg["count"]
+
+        related = range(len(self.conditional_related))
+        return self.build_validators(
+            [agg["count"], *(agg[f"related_{index}_count"] for index in related)],
+            [agg["last_modified"], *(agg[f"related_{index}_last_modified"] for index in related)],
+        )
+
+    def get_instance_validators(self, instance: models.Model) -> tuple[Optional[str], Optional[int]]:
+        """Return the validators of a loaded object, matching `get_conditional_validators` without a query.
+
+        Nested relations should be prefetched (or select_related) by the viewset queryset.
+        """
+        if not self.has_conditional_field(type(instance)):
+            return None, None
+
+        counts = [1]
+        timestamps = [getattr(instance, self.last_modified_field)]
+        for path in self.conditional_related:
+            rows = self.get_related_rows(instance, path)
+            counts.append(len(rows))
+            timestamps.append(max((row.updated_at for row in rows), default=None))
+        return self.build_validators(counts, timestamps)
+
+    @staticmethod
+    def get_related_rows(instance: models.Model, path: str) -> list:
+        rows = [instance]
+        for name in path.split("__"):
+            related = []
+            for row in rows:
+                try:
+                    value = getattr(row, name)
+                except ObjectDoesNotExist:  # Missing reverse one-to-one
+                    continue
+                if hasattr(value, "all"):
+                    related.extend(value.all())
+                elif value is not None:
+                    related.append(value)
+            rows = related
+        # Rows reached through several parents count once, as in the aggregate
+        return list({row.pk: row for row in rows}.values())
+
+    def build_validators(self, counts: list, timestamps: list) -> tuple[str, Optional[int]]:
+        last_modified = max(filter(None, timestamps), default=None)
+
+        # Query string (page, filters, ordering) and media type change the body too
+        fingerprint = ":".join(
+            (
+                self.request.get_full_path(),
+                str(getattr(self.request, "accepted_media_type", "")),
+                ",".join(map(str, counts)),
+                ",".join(timestamp.isoformat() if timestamp else "" for timestamp in timestamps),
+                self.get_response_version(),
+            )
+        )
+        etag = quote_etag(hashlib.md5(fingerprint.encode(), usedforsecurity=False).hexdigest())
+        return etag, int(last_modified.timestamp()) if last_modified else None
+
+    def validator_headers(self, etag: Optional[str], last_modified: Optional[int], detail: bool) -> dict:
+        if etag is None or (detail and last_modified is None):
+            # Missing objects fall through to the regular 404 handling
+            return {}
+
+        headers = {"ETag": etag}
+        # Deletions (and versioned bodies) do not move Max(updated_at), so only the ETag validates them
+        if detail and last_modified is not None and not self.get_response_version():
+            headers["Last-Modified"] = http_date(last_modified)
+        return headers
+
+    def conditional_response(self, queryset: models.QuerySet, detail: bool = True):
+        """Return (not modified response or None, headers to set on the full response)."""
+        headers = self.validator_headers(*self.get_conditional_validators(queryset), detail=detail)
+        if not headers:
+            return None, {}
+
+        not_modified = get_conditional_response(
+            self.request,
+            etag=headers["ETag"],
+            last_modified=parse_http_date_safe(headers.get("Last-Modified", "")),
+        )
+        if not_modified is not None:
+            for key, value in headers.items():
+                not_modified[key] = value
+        return not_modified, headers
+
+    def is_conditional_request(self) -> bool:
+        return "If-None-Match" in self.request.headers or "If-Modified-Since" in self.request.headers
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        not_modified, headers = self.conditional_response(queryset, detail=False)
+        if not_modified is not None:
+            return not_modified
+
+        response = super().list(request, *args, **kwargs)
+        for key, value in headers.items():
+            response[key] = value
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        if self.is_conditional_request():
+            queryset = self.filter_queryset(self.get_queryset()).filter(**self.get_lookup_kwargs())
+            not_modified, headers = self.conditional_response(queryset)
+            if not_modified is not None:
+                return not_modified
+            response = super().retrieve(request, *args, **kwargs)
+        else:
+            instance = self.get_object()
+            response = Response(self.get_serializer(instance).data)
+            headers = self.validator_headers(*self.get_instance_validators(instance), detail=True)
+
+        for key, value in headers.items():
+            response[key] = value
+        return response
+
+
+class BaseModelViewSet(ConditionalGetMixin, LookupIdOrUuidMixin, viewsets.ModelViewSet):
     """Base viewset with common configurations."""
 
     permission_classes = [AllowAny]  # Default permission, can be overridden in subclasses
@@ -0,0 +1,190 @@
+import base64
+import json
+from typing import Optional
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db.models import Q, QuerySet
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework import pagination
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class CountedPaginator(Paginator):
+    """Django paginator taking the total row count when the caller already knows it."""
+
+    def __init__(self, object_list, per_page, count: Optional[int] = None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        if count is not None:
+            self.count = count  # Replaces the COUNT(*) query of the cached property
+
+
+class PageNumberPagination(pagination.PageNumberPagination):
+    """Page number pagination reusing the row count of the conditional GET validators."""
+
+    def paginate_queryset(self, queryset, request, view=None):
+        count = getattr(view, "conditional_count", None)
+        self.django_paginator_class = lambda object_list, per_page: CountedPaginator(object_list, per_page, count)
+        return super().paginate_queryset(queryset, request, view)
+
+
+class KeysetPagination(BasePagination):
+    """Keyset (seek) pagination over `(created_at, id)`, newest first.
+
+    Each page is a single indexed range query: no COUNT(*) and no OFFSET, so deep
+    pages cost the same as the first one. Cursors point at a row, so they stay
+    stable while new rows are inserted. Client ordering is ignored.
+
+    Usage (opt-in per request, see KeysetOrPageNumberPagination):
+      class OrderViewSet(BaseModelViewSet):
+          pagination_class = KeysetOrPageNumberPagination
+    """
+
+    page_size = settings.LIST_PER_PAGE
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Cursor inválido."
+
+    def paginate_queryset(self, queryset: QuerySet, request, view=None) -> list:
+        return self.paginate_querysets([queryset], request, view)
+
+    def paginate_querysets(self, querysets: list[QuerySet], request, view=None) -> list:
+        """Paginate several querysets as one sequence (e.g. live and archived rows).
+
+        Each queryset runs its own seek query and the pages are merged, so ids must
+        be unique across them.
+        """
+        self.base_url = request.build_absolute_uri()
+        cursor = self.decode_cursor(request)
+
+        if cursor is None:
+            created_at, pk, self.reverse = None, None, False
+        else:
+            created_at, pk, self.reverse = cursor
+
+        results = []
+        for queryset in querysets:
+            results.extend(self.seek(queryset, created_at, pk))
+        # Walking back: rows are in ascending order, then the page is flipped
+        results.sort(key=lambda obj: (obj.created_at, obj.pk), reverse=not self.reverse)
+
+        has_more = len(results) > self.page_size
+        self.page = results[: self.page_size]
+
+        if self.reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+        return self.page
+
+    def seek(self, queryset: QuerySet, created_at, pk) -> list:
+        """Return up to `page_size + 1` rows of `queryset` after the cursor position."""
+        if self.reverse:
+            queryset = queryset.order_by("created_at", "id")
+            if created_at is not None:
+                queryset = queryset.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk))
+        else:
+            queryset = queryset.order_by("-created_at", "-id")
+            if created_at is not None:
+                queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+        return list(queryset[: self.page_size + 1])
+
+    def get_paginated_response(self, data) -> Response:
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema: dict) -> dict:
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_next_link(self) -> Optional[str]:
+        if not self.has_next:
+            return None
+        if not self.page:
+            # Walked back past the first row: restart from the newest one
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self) -> Optional[str]:
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def encode_cursor(self, obj, reverse: bool) -> str:
+        """Build the page URL whose cursor points at `obj`."""
+        payload = json.dumps({"c": obj.created_at.isoformat(), "i": obj.pk, "r": int(reverse)})
+        token = base64.urlsafe_b64encode(payload.encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request) -> Optional[tuple]:
+        """Return (created_at, id, reverse) from the request cursor or None on the first page."""
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(token.encode()).decode())
+            created_at = parse_datetime(payload["c"])
+            pk = int(payload["i"])
+            reverse = bool(payload.get("r", 0))
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if created_at is None:
+            raise NotFound(self.invalid_cursor_message)
+        return created_at, pk, reverse
+
+
+class KeysetOrPageNumberPagination(BasePagination):
+    """Page number pagination unless the client opts into keyset pagination.
+
+    Clients send `?pagination=keyset` (or follow a `?cursor=` link) to get keyset
+    pages; everyone else keeps `count`, `?page=` and `?ordering=`.
+    """
+
+    mode_query_param = "pagination"
+    keyset_mode = "keyset"
+
+    def __init__(self):
+        self.keyset = KeysetPagination()
+        self.page_number = PageNumberPagination()
+        self.active = self.page_number
+
+    def is_keyset(self, request) -> bool:
+        return (
+            request.query_params.get(self.mode_query_param) == self.keyset_mode
+            or self.keyset.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset: QuerySet, request, view=None) -> list:
+        self.active = self.keyset if self.is_keyset(request) else self.page_number
+        return self.active.paginate_queryset(queryset, request, view)
+
+    def paginate_querysets(self, querysets: list[QuerySet], request, view=None) -> list:
+        """Keyset pages over several querysets, see `KeysetPagination.paginate_querysets`."""
+        self.active = self.keyset
+        return self.keyset.paginate_querysets(querysets, request, view)
+
+    def get_paginated_response(self, data) -> Response:
+        return self.active.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema: dict) -> dict:
+        return self.page_number.get_paginated_response_schema(schema)
+
+    def get_schema_operation_parameters(self, view) -> list:
+        return self.page_number.get_schema_operation_parameters(view)
@@ -0,0 +1,26 @@
+import re
+import unicodedata
+import uuid
+
+
+def normalize(text: str | None) -> str:
+    """Lowercase `text`, strip its accents and collapse whitespace.
+
+    Search documents and queries are normalized the same way in Python, so
+    matching is accent-insensitive on every backend without `unaccent` (which
+    is not immutable and cannot be used in index expressions).
+    """
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    return " ".join("".join(char for char in decomposed if not unicodedata.combining(char)).lower().split())
+
+
+def digits(text: str | None) -> str:
+    return re.sub(r"\D", "", text or "")
+
+
+def is_uuid(text: str) -> bool:
+    try:
+        uuid.UUID(text.strip())
+        return True
+    except ValueError:
+        return False
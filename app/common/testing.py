@@ -0,0 +1,10 @@
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import QuerySet
+
+
+def postgres_sql(queryset: QuerySet) -> tuple[str, tuple]:
+    """Compile `queryset` for PostgreSQL without connecting, for tests running on SQLite."""
+    from django.db.backends.postgresql.base import DatabaseWrapper
+
+    settings_dict = {**connections[DEFAULT_DB_ALIAS].settings_dict, "ENGINE": "django.db.backends.postgresql"}
+    return queryset.query.get_compiler(connection=DatabaseWrapper(settings_dict, alias="postgres_sql")).as_sql()
@@ -0,0 +1,308 @@
+import asyncio
+import json
+import tempfile
+import threading
+import time
+from io import StringIO
+from pathlib import Path
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+import requests
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from app import api
+from app.api import NOT_FOUND, Centroid, HttpClient, NominatimAPI, ZipCodeCache, is_approximate, search_many
+from app.common import utils
+from app.common.cache import CACHE_HEADER, _version_key, invalidate, model_tag, tag_versions
+from app.common.transactions import OnCommitBatch
+from app.common.utils import haversine_km, haversine_matrix_km, k_nearest
+from app.factories.order import OrderFactory
+from app.factories.product import ProductFactory
+from app.factories.section import SectionFactory
+from app.factories.store import StoreFactory
+from app.product.models import Product
+
+ORIGINS = [(-23.5505, -46.6333), (-22.9068, -43.1729), (-19.9167, -43.9345)]
+# Repeated points force ties, which both backends must break by index
+DESTINATIONS = [
+    (-23.5614, -46.6559),
+    (-22.9519, -43.2105),
+    (-23.5614, -46.6559),
+    (-25.4284, -49.2733),
+    (-19.9167, -43.9345),
+]
+
+
+class DistanceMatrixTests(SimpleTestCase):
+
+    def test_numpy_matches_python(self):
+        python = haversine_matrix_km(ORIGINS, DESTINATIONS, use_numpy=False)
+        vectorized = haversine_matrix_km(ORIGINS, DESTINATIONS, use_numpy=True)
+        for i, (lat, lon) in enumerate(ORIGINS):
+            for j, (lat2, lon2) in enumerate(DESTINATIONS):
+                self.assertAlmostEqual(python[i][j], haversine_km(lat, lon, lat2, lon2), places=9)
+                self.assertAlmostEqual(float(vectorized[i, j]), python[i][j], places=9)
+
+    def test_k_nearest_matches_between_backends(self):
+        for k in range(len(DESTINATIONS) + 2):
+            python = k_nearest(ORIGINS, DESTINATIONS, k, use_numpy=False)
+            vectorized = k_nearest(ORIGINS, DESTINATIONS, k, use_numpy=True, chunk_size=2)
+            self.assertEqual([[j for j, _ in row] for row in vectorized], [[j for j, _ in row] for row in python])
+        self.assertEqual([j for j, _ in python[0][:2]], [0, 2])
+
+    def test_forcing_numpy_without_it_is_a_clear_error(self):
+        with mock.patch.object(utils, "np", None):
+            with self.assertRaises(ImproperlyConfigured):
+                haversine_matrix_km(ORIGINS, DESTINATIONS, use_numpy=True)
+            self.assertEqual(len(k_nearest(ORIGINS, DESTINATIONS, 2)), len(ORIGINS))
+
+
+@override_settings(CEP_CACHE_TTL=300, CEP_CACHE_NEGATIVE_TTL=60, CEP_CACHE_ERROR_TTL=5)
+class ZipCodeCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.zip_code_cache = ZipCodeCache("tests")
+        self.now = 1000.0
+        patcher = mock.patch.object(api.time, "monotonic", lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_fetch_keeps_formatting_and_caches_by_normalized_cep(self):
+        fetch = mock.Mock(return_value=(-23.56, -46.65))
+        self.assertEqual(self.zip_code_cache.get_or_fetch("01310-100", fetch), (-23.56, -46.65))
+        self.assertEqual(self.zip_code_cache.get_or_fetch("01310100", fetch), (-23.56, -46.65))
+        fetch.assert_called_once_with("01310-100")
+        self.assertEqual(cache.get(self.zip_code_cache.cache_key("01310100")), (-23.56, -46.65))
+
+    def test_concurrent_misses_are_coalesced(self):
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def fetch(zip_code):
+            calls.append(zip_code)
+            started.set()
+            release.wait(5)
+            return (-23.56, -46.65)
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(self.zip_code_cache.get_or_fetch("01310-100", fetch)))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        started.wait(5)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [(-23.56, -46.65)] * 5)
+
+    def test_ttl_by_outcome(self):
+        for value, ttl in (((-23.56, -46.65), 300), ((NOT_FOUND, NOT_FOUND), 60), (("Timeout", "Timeout"), 5)):
+            with self.subTest(value=value):
+                cache.clear()
+                self.zip_code_cache.clear()
+                fetch = mock.Mock(return_value=value)
+                with mock.patch.object(api.cache, "set", wraps=cache.set) as cache_set:
+                    self.zip_code_cache.get_or_fetch("01310-100", fetch)
+                self.assertEqual(cache_set.call_args.kwargs["timeout"], ttl)
+
+                # The local tier serves the value until its own TTL runs out
+                cache.clear()
+                self.now += ttl - 1
+                self.zip_code_cache.get_or_fetch("01310-100", fetch)
+                self.assertEqual(fetch.call_count, 1)
+                self.now += 1
+                self.zip_code_cache.get_or_fetch("01310-100", fetch)
+                self.assertEqual(fetch.call_count, 2)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Answers each GET with the next queued status, recording when it arrived."""
+
+    def do_GET(self):
+        self.server.requests.append(time.monotonic())
+        code = self.server.statuses.pop(0) if self.server.statuses else 200
+        self.send_response(code)
+        if code == 429:
+            self.send_header("Retry-After", "0")
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(b"[]")
+
+    def log_message(self, *args):
+        pass
+
+
+class HttpClientTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+        self.server.requests, self.server.statuses = [], []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/search"
+
+    def test_retries_server_errors_and_429(self):
+        self.server.statuses = [503, 429]
+        client = HttpClient("stub", retries=3, backoff_factor=0)
+        self.assertEqual(client.get(self.url).status_code, 200)
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_gives_back_the_last_429_once_retries_run_out(self):
+        self.server.statuses = [429] * 3
+        client = HttpClient("stub", retries=2, backoff_factor=0)
+        self.assertEqual(client.get(self.url).status_code, 429)
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_min_interval_throttles_requests_and_retries(self):
+        self.server.statuses = [429]
+        client = HttpClient("stub", retries=1, backoff_factor=0, min_interval=0.2)
+        search_many(lambda zip_code: client.get(self.url, params={"q": zip_code}), ["1", "2", "3"], 3)
+        requests = self.server.requests
+        # One token per window: 4 requests (3 + 1 retry) span at least 2 full windows
+        self.assertEqual(len(requests), 4)
+        self.assertGreaterEqual(requests[-1] - requests[0], 0.4)
+
+    def test_search_many_works_inside_a_running_loop(self):
+        async def lookup():
+            return search_many(str.upper, ["a", "b", "a"], 2)
+
+        self.assertEqual(asyncio.run(lookup()), {"a": "A", "b": "B"})
+
+
+class GeocodeCommandTests(TestCase):
+
+    def setUp(self):
+        self.orders = [
+            OrderFactory(zip_code=zip_code, latitude=None, longitude=None) for zip_code in ("01310100", "20040002")
+        ]
+        self.checkpoint = Path(tempfile.mkdtemp()) / "geocode.json"
+        self.results = {"01310100": (-23.56, -46.65), "20040002": ("Timeout", "Timeout")}
+
+    def geocode(self):
+        def search_many(zip_codes, **kwargs):
+            return {zip_code: self.results[zip_code] for zip_code in zip_codes}
+
+        with mock.patch.object(api.NominatimAPI, "search_many", side_effect=search_many):
+            call_command("geocode", model="order", checkpoint=str(self.checkpoint), stdout=StringIO())
+        return json.loads(self.checkpoint.read_text())["order"]
+
+    def test_transient_failures_are_retried_on_the_next_run(self):
+        updated_at = [order.updated_at for order in self.orders]
+        state = self.geocode()
+        self.assertEqual(state, {"last_id": self.orders[1].id, "retry": [self.orders[1].id]})
+
+        self.results["20040002"] = (-22.90, -43.17)
+        self.assertEqual(self.geocode()["retry"], [])
+
+        for order, before in zip(self.orders, updated_at):
+            order.refresh_from_db()
+            self.assertIsNotNone(order.latitude)
+            # Geocoding is not an order change
+            self.assertEqual(order.updated_at, before)
+
+    def test_prefix_centroids_are_not_stored(self):
+        self.results["20040002"] = Centroid(-22.9, -43.2)
+        self.assertEqual(self.geocode()["retry"], [self.orders[1].id])
+        self.orders[1].refresh_from_db()
+        self.assertIsNone(self.orders[1].latitude)
+
+    def test_transient_failures_fall_back_to_a_marked_centroid(self):
+        cache.clear()
+        NominatimAPI.search.__wrapped__.cache.clear()
+        client = mock.Mock(get=mock.Mock(side_effect=requests.Timeout))
+        with mock.patch.object(NominatimAPI, "client", client):
+            result = NominatimAPI.search("01310-100")
+        self.assertIsInstance(result, Centroid)
+        self.assertTrue(is_approximate(result))
+        self.assertFalse(is_approximate((-23.56, -46.65)))
+
+
+class CachedReadMixinTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.store = StoreFactory()
+        cls.product = ProductFactory(store=cls.store, section=SectionFactory(store=cls.store))
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self):
+        return self.client.get(f"/api/products/{self.product.uuid}/")
+
+    def test_second_read_is_a_hit(self):
+        first = self.get()
+        self.assertEqual(first[CACHE_HEADER], "MISS")
+        with self.assertNumQueries(0):
+            second = self.get()
+        self.assertEqual(second[CACHE_HEADER], "HIT")
+        self.assertEqual(second.json(), first.json())
+
+    def test_saving_a_tracked_model_invalidates(self):
+        self.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.get(pk=self.product.pk).save(update_fields=["name"])
+        self.assertEqual(self.get()[CACHE_HEADER], "MISS")
+        self.assertEqual(self.get()[CACHE_HEADER], "HIT")
+
+    def test_evicted_tag_does_not_reuse_a_cached_version(self):
+        tag = model_tag(Product)
+        self.get()
+        (version,) = tag_versions([tag])
+        # Eviction of the tag alone must not make the stale entry reachable again
+        cache.delete(_version_key(tag))
+        invalidate(tag)
+        self.assertNotEqual(tag_versions([tag]), [version])
+        self.assertEqual(self.get()[CACHE_HEADER], "MISS")
+
+
+class OnCommitBatchTests(TestCase):
+
+    def setUp(self):
+        self.handled = []
+        self.batch = OnCommitBatch(self.handled.append)
+
+    def test_keys_are_handled_once_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.batch.add(1)
+            self.batch.add(1, 2)
+            self.assertEqual(self.handled, [])
+        self.assertEqual(self.handled, [{1, 2}])
+
+    def test_rolled_back_keys_are_dropped(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    self.batch.add(1)
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertEqual(self.handled, [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.batch.add(2)
+        self.assertEqual(self.handled, [{2}])
+
+    def test_rolled_back_savepoint_keeps_the_outer_keys(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.batch.add(1)
+            try:
+                with transaction.atomic():
+                    self.batch.add(2)
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertEqual(self.handled, [{1, 2}])
@@ -0,0 +1,47 @@
+import threading
+import weakref
+from typing import Callable, Hashable
+
+from django.db import transaction
+
+
+class OnCommitBatch:
+    """Collect keys written during a transaction and handle each one once, after it commits.
+
+    Every `add` registers its own on-commit callback; the first one to run takes
+    all pending keys and the others find nothing left. Once none of those
+    callbacks is registered any more (they ran, or were discarded with a
+    rollback) the next `add` starts a new batch. `handle` must be idempotent:
+    keys added in a rolled-back savepoint are still handled with the outer block.
+    """
+
+    def __init__(self, handle: Callable[[set], None]):
+        self.handle = handle
+        # Connections are per thread, and so is the pending state
+        self._local = threading.local()
+
+    def add(self, *keys: Hashable) -> None:
+        state = self._state()
+        if not state.callbacks:
+            state.keys = set()
+        state.keys.update(keys)
+
+        def callback():
+            self.flush()
+
+        state.callbacks.add(callback)
+        # Outside an atomic block this runs right away
+        transaction.on_commit(callback)
+
+    def flush(self) -> None:
+        state = self._state()
+        keys, state.keys = state.keys, set()
+        if keys:
+            self.handle(keys)
+
+    def _state(self):
+        if not hasattr(self._local, "keys"):
+            self._local.keys = set()
+            # Callbacks are only referenced by the connection until they run or are rolled back
+            self._local.callbacks = weakref.WeakSet()
+        return self._local
@@ -1,9 +1,18 @@
+import heapq
 import math
-from typing import Optional
+from datetime import date, datetime, time
+from typing import Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, batch distances fall back to pure Python
+    np = None
 
 from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
 from django.db import models
 from django.db.models import QuerySet
+from django.utils import timezone
 
 from app.store.models import Store
 
@@ -28,6 +37,11 @@ def set_active_store_id(request, store_id: Optional[int]) -> None:
         request.session.pop(SESSION_ACTIVE_STORE_ID, None)
 
 
+def start_of_day(day: date) -> datetime:
+    """Return the first instant of the local `day`, for half-open ranges over indexed datetimes."""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
 # Geographical functions
 def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     """Calculate the great-circle distance between two points on the Earth surface.
@@ -69,6 +83,150 @@ def bounding_box(lat: float, lon: float, radius_km: float) -> tuple[float, float
     return (lat - lat_delta, lat + lat_delta, lon - lon_delta, lon + lon_delta)
 
 
+def longitude_ranges(min_lon: float, max_lon: float) -> list[tuple[float, float]]:
+    """Split a longitude interval into intervals within [-180, 180].
+
+    A box crossing the antimeridian becomes two ranges, one on each side of it.
+
+    Args:
+        min_lon (float): West bound in decimal degrees, possibly below -180.
+        max_lon (float): East bound in decimal degrees, possibly above 180.
+
+    Returns:
+        list[tuple[float, float]]: One or two (min_lon, max_lon) ranges.
+    """
+    if max_lon - min_lon >= 360:
+        return [(-180.0, 180.0)]
+    if min_lon < -180:
+        return [(min_lon + 360, 180.0), (-180.0, max_lon)]
+    if max_lon > 180:
+        return [(min_lon, 180.0), (-180.0, max_lon - 360)]
+    return [(min_lon, max_lon)]
+
+
+def _split_coordinates(points: Sequence[tuple[float, float]]) -> tuple[list[float], list[float]]:
+    """Split (lat, lon) pairs into float latitude and longitude lists."""
+    lats = [float(lat) for lat, _ in points]
+    lons = [float(lon) for _, lon in points]
+    return lats, lons
+
+
+def _haversine_matrix_numpy(o_lats, o_lons, d_lats, d_lons):
+    """NumPy broadcast of `haversine_km` for every origin (rows) and destination (columns)."""
+    o_lats, o_lons = np.asarray(o_lats, dtype=float)[:, None], np.asarray(o_lons, dtype=float)[:, None]
+    d_lats, d_lons = np.asarray(d_lats, dtype=float)[None, :], np.asarray(d_lons, dtype=float)[None, :]
+
+    phi1, phi2 = np.radians(o_lats), np.radians(d_lats)
+    dphi = np.radians(d_lats - o_lats)
+    dlambda = np.radians(d_lons - o_lons)
+
+    a = np.sin(dphi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlambda / 2) ** 2
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    return settings.EARTH_RADIUS_KM * c
+
+
+def _haversine_row_python(lat: float, lon: float, d_lats: list[float], d_lons: list[float]) -> list[float]:
+    """Distances from one origin to every destination, same arithmetic as `haversine_km`."""
+    radius_km = settings.EARTH_RADIUS_KM
+    cos_phi1 = math.cos(math.radians(lat))
+    row = []
+    for lat2, lon2 in zip(d_lats, d_lons):
+        dphi = math.radians(lat2 - lat)
+        dlambda = math.radians(lon2 - lon)
+        a = math.sin(dphi / 2) ** 2 + cos_phi1 * math.cos(math.radians(lat2)) * math.sin(dlambda / 2) ** 2
+        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+        row.append(radius_km * c)
+    return row
+
+
+def _use_numpy(use_numpy: Optional[bool]) -> bool:
+    """Resolve the `use_numpy` argument, failing loudly when NumPy is forced but missing."""
+    if use_numpy is None:
+        return np is not None
+    if use_numpy and np is None:
+        raise ImproperlyConfigured("use_numpy=True requer o pacote numpy.")
+    return use_numpy
+
+
+def _smallest_indexes(row, k: int):
+    """Indexes of the k smallest values of `row`, closest first and ties by index.
+
+    `argpartition` finds the k-th distance in linear time; only the values up to
+    it are then sorted, instead of the whole row.
+    """
+    if k == 0:
+        return []
+    kth = row[np.argpartition(row, k - 1)[k - 1]]
+    # Every value tied with the k-th one is a candidate, so the lowest indexes win
+    candidates = np.flatnonzero(row <= kth)
+    return candidates[np.argsort(row[candidates], kind="stable")][:k]
+
+
+def haversine_matrix_km(
+    origins: Sequence[tuple[float, float]],
+    destinations: Sequence[tuple[float, float]],
+    use_numpy: Optional[bool] = None,
+):
+    """Calculate the distance between every origin and every destination.
+
+    Args:
+        origins (Sequence[tuple[float, float]]): (lat, lon) pairs in decimal degrees, N rows.
+        destinations (Sequence[tuple[float, float]]): (lat, lon) pairs in decimal degrees, M columns.
+        use_numpy (Optional[bool]): Force (True) or skip (False) NumPy. Defaults to NumPy when installed.
+
+    Returns:
+        numpy.ndarray or list[list[float]]: N x M distances in kilometers.
+    """
+    o_lats, o_lons = _split_coordinates(origins)
+    d_lats, d_lons = _split_coordinates(destinations)
+
+    if _use_numpy(use_numpy):
+        return _haversine_matrix_numpy(o_lats, o_lons, d_lats, d_lons)
+    return [_haversine_row_python(lat, lon, d_lats, d_lons) for lat, lon in zip(o_lats, o_lons)]
+
+
+def k_nearest(
+    origins: Sequence[tuple[float, float]],
+    destinations: Sequence[tuple[float, float]],
+    k: int,
+    use_numpy: Optional[bool] = None,
+    chunk_size: int = 1024,
+) -> list[list[tuple[int, float]]]:
+    """Find the k closest destinations of each origin.
+
+    Ties are broken by destination index, so both backends return the same result.
+
+    Args:
+        origins (Sequence[tuple[float, float]]): (lat, lon) pairs in decimal degrees.
+        destinations (Sequence[tuple[float, float]]): (lat, lon) pairs in decimal degrees.
+        k (int): Number of destinations per origin.
+        use_numpy (Optional[bool]): Force (True) or skip (False) NumPy. Defaults to NumPy when installed.
+        chunk_size (int): Origins per NumPy block, bounds memory to chunk_size x M floats.
+
+    Returns:
+        list[list[tuple[int, float]]]: Per origin, (destination index, distance in km) closest first.
+    """
+    o_lats, o_lons = _split_coordinates(origins)
+    d_lats, d_lons = _split_coordinates(destinations)
+    k = max(0, min(k, len(d_lats)))
+
+    if not _use_numpy(use_numpy):
+        result = []
+        for lat, lon in zip(o_lats, o_lons):
+            row = _haversine_row_python(lat, lon, d_lats, d_lons)
+            nearest = heapq.nsmallest(k, range(len(row)), key=lambda j: (row[j], j))
+            result.append([(j, row[j]) for j in nearest])
+        return result
+
+    result = []
+    for start in range(0, len(o_lats), chunk_size):
+        stop = start + chunk_size
+        block = _haversine_matrix_numpy(o_lats[start:stop], o_lons[start:stop], d_lats, d_lons)
+        for row in block:
+            result.append([(int(j), float(row[j])) for j in _smallest_indexes(row, k)])
+    return result
+
+
 # Format functions
 def format_phone(obj: models.Model) -> str:
     """Format phone number into standard representation.
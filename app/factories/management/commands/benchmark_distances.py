@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import random
+import time
+from typing import Any, Callable
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app.common.utils import haversine_km, haversine_matrix_km, k_nearest, np
+
+# Bounding box aproximado do Brasil (lat, lon)
+BRAZIL_LAT = (-33.0, 5.0)
+BRAZIL_LON = (-74.0, -34.0)
+
+
+class Command(BaseCommand):
+    help = "Compara o cálculo de distâncias em lote (NumPy e Python puro) com haversine_km par a par."
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--origins", type=int, default=500, help="Quantidade de origens (ex.: pedidos).")
+        parser.add_argument("--destinations", type=int, default=200, help="Quantidade de destinos (ex.: lojas).")
+        parser.add_argument("--k", type=int, default=5, help="Vizinhos mais próximos por origem.")
+        parser.add_argument("--seed", type=int, default=42, help="Seed do random para reprodutibilidade.")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        n_origins: int = options["origins"]
+        n_destinations: int = options["destinations"]
+        k: int = options["k"]
+        if n_origins <= 0 or n_destinations <= 0:
+            raise CommandError("--origins e --destinations devem ser > 0.")
+
+        rng = random.Random(options["seed"])
+        origins = [(rng.uniform(*BRAZIL_LAT), rng.uniform(*BRAZIL_LON)) for _ in range(n_origins)]
+        destinations = [(rng.uniform(*BRAZIL_LAT), rng.uniform(*BRAZIL_LON)) for _ in range(n_destinations)]
+
+        self.stdout.write(
+            self.style.MIGRATE_HEADING(
+                f"[benchmark_distances] origins={n_origins} destinations={n_destinations} k={k} "
+                f"numpy={'sim' if np is not None else 'não'}"
+            )
+        )
+
+        scalar, scalar_s = self._timed(
+            lambda: [[haversine_km(lat1, lon1, lat2, lon2) for lat2, lon2 in destinations] for lat1, lon1 in origins]
+        )
+        self._report("haversine_km (par a par)", scalar_s, scalar_s)
+
+        python, python_s = self._timed(lambda: haversine_matrix_km(origins, destinations, use_numpy=False))
+        self._report("haversine_matrix_km (Python)", python_s, scalar_s)
+        self._check("Python", scalar, python)
+
+        python_knn, python_knn_s = self._timed(lambda: k_nearest(origins, destinations, k, use_numpy=False))
+        self._report("k_nearest (Python)", python_knn_s, scalar_s)
+
+        if np is None:
+            self.stdout.write(self.style.WARNING("[benchmark_distances] NumPy não instalado, pulando backend vetorizado."))
+            return
+
+        vectorized, vectorized_s = self._timed(lambda: haversine_matrix_km(origins, destinations, use_numpy=True))
+        self._report("haversine_matrix_km (NumPy)", vectorized_s, scalar_s)
+        self._check("NumPy", scalar, vectorized.tolist())
+
+        numpy_knn, numpy_knn_s = self._timed(lambda: k_nearest(origins, destinations, k, use_numpy=True))
+        self._report("k_nearest (NumPy)", numpy_knn_s, scalar_s)
+
+        same_neighbors = all(
+            [j for j, _ in left] == [j for j, _ in right] for left, right in zip(python_knn, numpy_knn)
+        )
+        style = self.style.SUCCESS if same_neighbors else self.style.ERROR
+        self.stdout.write(style(f"[benchmark_distances] k_nearest idêntico entre backends: {same_neighbors}"))
+
+    def _timed(self, fn: Callable[[], Any]) -> tuple[Any, float]:
+        start = time.perf_counter()
+        result = fn()
+        return result, time.perf_counter() - start
+
+    def _report(self, label: str, seconds: float, baseline: float) -> None:
+        speedup = baseline / seconds if seconds else float("inf")
+        self.stdout.write(f"  {label:<32} {seconds * 1000:>10.2f} ms  ({speedup:.1f}x)")
+
+    def _check(self, label: str, expected: list[list[float]], actual: list[list[float]]) -> None:
+        max_error = max(
+            (abs(a - b) for row_a, row_b in zip(expected, actual) for a, b in zip(row_a, row_b)),
+            default=0.0,
+        )
+        style = self.style.SUCCESS if max_error < 1e-9 else self.style.ERROR
+        self.stdout.write(style(f"  {label}: erro máximo vs haversine_km = {max_error:.3e} km"))
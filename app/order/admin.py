@@ -1,10 +1,19 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.http import StreamingHttpResponse
+from django.urls import reverse
+from django.utils import timezone
 from django.utils.translation import ngettext
+from unfold.contrib.filters.admin import RangeDateFilter
 from unfold.decorators import action, display
 
+from app.account.models import Account
 from app.common.admin import BaseAdmin
-from app.order.inlines import OrderItemInline
-from app.order.models import Order
+from app.common.search import is_uuid
+from app.common.utils import get_active_store_id
+from app.order.exports import iter_csv
+from app.order.filters import LatenessFilter
+from app.order.inlines import OrderItemInline, OrderStatusTransitionInline
+from app.order.models import DailySales, Order
 from app.order.sections import OrderItemsSection
 
 
@@ -14,7 +23,7 @@ class OrderAdmin(BaseAdmin):
     scope_field = "store"
 
     def get_queryset(self, request):
-        return (
+        queryset = (
             super()
             .get_queryset(request)
             .select_related(
@@ -24,6 +33,7 @@ class OrderAdmin(BaseAdmin):
             )
             .prefetch_related("items")
         )
+        return Order.with_timing(queryset)
 
     def get_actions(self, request):
         """Remove delete selected action."""
@@ -35,7 +45,8 @@ class OrderAdmin(BaseAdmin):
         if request.GET.get("status") == Order.STATUS_PROCESSING:
             del actions["accept_orders"]
         if request.GET.get("status") == Order.STATUS_CANCELED:
-            actions.clear()
+            # Canceled orders can only be exported
+            actions = {name: actions[name] for name in ("export_orders",) if name in actions}
         return actions
 
     # Changelist
@@ -47,16 +58,19 @@ class OrderAdmin(BaseAdmin):
         "get_delivery_period",
         "get_duration",
     )
-    list_filter = BaseAdmin.list_filter
+    list_filter = BaseAdmin.list_filter + (LatenessFilter, ("completed_at", RangeDateFilter))
     search_fields = (
         "uuid",
         "account__user__first_name",
         "account__user__last_name",
         "account__user__email",
     )
-    search_help_text = "Buscar por UUID, nome ou email do cliente"
+    search_help_text = "Buscar por UUID, nome, e-mail, CPF ou telefone do cliente"
+
+    # Live updates of the active store, replacing the polling of the list
+    list_before_template = "order/admin/order_events.html"
     list_sections = [OrderItemsSection]
-    actions = ["accept_orders", "deliver_orders", "cancel_orders"]
+    actions = ["accept_orders", "deliver_orders", "cancel_orders", "export_orders"]
 
     # Changeform
     fieldsets = (
@@ -101,6 +115,18 @@ class OrderAdmin(BaseAdmin):
                 ),
             },
         ),
+        (
+            "Linha do tempo",
+            {
+                "classes": ("tab",),
+                "fields": (
+                    "accepted_at",
+                    "dispatched_at",
+                    "completed_at",
+                    "canceled_at",
+                ),
+            },
+        ),
         (
             "Auditoria",
             {
@@ -113,9 +139,31 @@ class OrderAdmin(BaseAdmin):
             },
         ),
     )
-    inlines = [OrderItemInline]
+    inlines = [OrderItemInline, OrderStatusTransitionInline]
     autocomplete_fields = ("store", "account")
-    readonly_fields = BaseAdmin.readonly_fields + ("latitude", "longitude")
+    readonly_fields = BaseAdmin.readonly_fields + (
+        "latitude",
+        "longitude",
+        "accepted_at",
+        "dispatched_at",
+        "completed_at",
+        "canceled_at",
+    )
+
+    def changelist_view(self, request, extra_context=None):
+        # Events are streamed per store: only with an active store (see app.order.events)
+        if store_id := get_active_store_id(request):
+            events_url = reverse("store_order_events", args=[store_id])
+            extra_context = {**(extra_context or {}), "order_events_url": events_url}
+        return super().changelist_view(request, extra_context)
+
+    def get_search_results(self, request, queryset, search_term):
+        # Exact order UUID, otherwise the indexed account search key (see Account.search_filter)
+        if not search_term.strip():
+            return queryset, False
+        if is_uuid(search_term):
+            return queryset.filter(uuid=search_term.strip()), False
+        return queryset.filter(Account.search_filter(search_term, prefix="account__")), False
 
     # Display methods
     @display(description="Endereço de entrega")
@@ -126,37 +174,46 @@ class OrderAdmin(BaseAdmin):
     def get_total(self, obj):
         return obj.format_total()
 
-    @display(description="Período para entrega", header=True)
+    @display(description="Período para entrega", header=True, ordering="expected_delivery_at")
     def get_delivery_period(self, obj):
-        return obj.format_created_at(), obj.expected_delivery_time()
+        return obj.format_created_at(), obj.expected_delivery_at.strftime("%d/%m/%Y %H:%M")
 
     @display(
         description="Duração",
+        ordering="elapsed",
         label={
-            "success": "success",
-            "warning": "warning",
-            "danger": "danger",
+            Order.LATENESS_ON_TIME: "success",
+            Order.LATENESS_WARNING: "warning",
+            Order.LATENESS_LATE: "danger",
         },
     )
     def get_duration(self, obj):
-        status = "success"
-        if percentage := obj.current_duration_percentage():
-            status = "warning" if 60 <= percentage <= 80 else "danger"
-        return status, obj.current_duration()
+        return obj.lateness, obj.current_duration()
 
     # Actions
     def update_orders_status(self, request, queryset, status, message):
-        """Update status for selected orders and display a message."""
-        updated = queryset.update(status=status)
+        """Move selected orders to status where allowed and display a message."""
+        result = Order.transition(queryset, status, changed_by=request.user)
         self.message_user(
             request,
             ngettext(
                 "%d pedido atualizado com sucesso. %s",
                 "%d pedidos atualizados com sucesso. %s",
-                updated,
+                result.moved,
             )
-            % (updated, message),
+            % (result.moved, message),
         )
+        if result.skipped:
+            self.message_user(
+                request,
+                ngettext(
+                    "%d pedido ignorado: o status atual não permite a alteração.",
+                    "%d pedidos ignorados: o status atual não permite a alteração.",
+                    result.skipped,
+                )
+                % result.skipped,
+                level=messages.WARNING,
+            )
 
     @action(description="Aceitar pedidos selecionados")
     def accept_orders(self, request, queryset):
@@ -184,3 +241,65 @@ class OrderAdmin(BaseAdmin):
             Order.STATUS_CANCELED,
             "Os pedidos foram cancelados.",
         )
+
+    @action(description="Exportar pedidos selecionados (CSV)")
+    def export_orders(self, request, queryset):
+        response = StreamingHttpResponse(iter_csv(queryset), content_type="text/csv; charset=utf-8")
+        filename = f"pedidos-{timezone.localtime():%Y%m%d-%H%M}.csv"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+
+@admin.register(DailySales)
+class DailySalesAdmin(BaseAdmin):
+
+    scope_field = "store"
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related("store")
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    # Changelist
+    list_display = (
+        "day",
+        "store",
+        "status",
+        "orders_count",
+        "get_subtotal",
+        "get_delivery_fee",
+        "get_total",
+        "get_average_ticket",
+    )
+    list_filter = (
+        ("day", RangeDateFilter),
+        "status",
+        "store",
+    )
+    date_hierarchy = "day"
+    ordering = ("-day", "store", "status")
+    readonly_fields = ()
+
+    # Display methods
+    @display(description="Subtotal", ordering="subtotal")
+    def get_subtotal(self, obj):
+        return f"R$ {obj.subtotal:.2f}"
+
+    @display(description="Taxas de entrega", ordering="delivery_fee")
+    def get_delivery_fee(self, obj):
+        return f"R$ {obj.delivery_fee:.2f}"
+
+    @display(description="Total", ordering="total")
+    def get_total(self, obj):
+        return f"R$ {obj.total:.2f}"
+
+    @display(description="Ticket médio")
+    def get_average_ticket(self, obj):
+        return f"R$ {obj.average_ticket:.2f}"
@@ -0,0 +1,154 @@
+import asyncio
+import json
+import time
+from typing import Any, Iterable, Optional
+
+from django.conf import settings
+from django.contrib.auth.decorators import user_passes_test
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.http import HttpRequest, HttpResponseForbidden, StreamingHttpResponse
+
+from app.store.models import Store
+
+EVENT_ORDER_CREATED = "order.created"
+EVENT_ORDER_STATUS_CHANGED = "order.status_changed"
+
+
+def _sequence_key(store_id: int) -> str:
+    return f"order_events:{store_id}:seq"
+
+
+def _event_key(store_id: int, event_id: int) -> str:
+    return f"order_events:{store_id}:{event_id}"
+
+
+ORDER_EVENT_FIELDS = ("uuid", "store_id", "status", "total", "created_at", "updated_at")
+
+
+def order_event(event_type: str, order) -> dict:
+    """Build the event payload of an order."""
+    return {
+        "type": event_type,
+        "order": str(order.uuid),
+        "status": order.status,
+        "total": order.total,
+        "created_at": order.created_at,
+        "updated_at": order.updated_at,
+    }
+
+
+def publish(store_id: int, event: dict) -> int:
+    """Append an event to the store log and return its sequence number.
+
+    The log lives in the shared cache (a per-store sequence counter plus one key
+    per event), so neither publishers nor the SSE stream touch the database.
+    Workers only see each other's events, and get unique ids, with a shared cache
+    whose `incr` is atomic: `CACHE_URL=redis://...` (see the `common.W001` check).
+    """
+    cache.add(_sequence_key(store_id), 0, timeout=None)
+    event_id = cache.incr(_sequence_key(store_id))
+    cache.set(_event_key(store_id, event_id), {**event, "id": event_id}, timeout=settings.ORDER_EVENTS_TTL)
+    return event_id
+
+
+def publish_on_commit(events: Iterable[tuple[int, dict]]) -> None:
+    """Publish (store_id, event) pairs once the current transaction commits."""
+    events = list(events)
+    if events:
+        transaction.on_commit(lambda: [publish(store_id, event) for store_id, event in events])
+
+
+def format_event(event: dict) -> str:
+    data = json.dumps(event, cls=DjangoJSONEncoder)
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {data}\n\n"
+
+
+def _event_keys(store_id: int, last_event_id: int, current: int) -> list[str]:
+    """Keys of the events after `last_event_id`, at most the last `ORDER_EVENTS_BACKLOG`."""
+    first = max(last_event_id + 1, current - settings.ORDER_EVENTS_BACKLOG + 1)
+    return [_event_key(store_id, event_id) for event_id in range(first, current + 1)]
+
+
+async def stream_events(store_id: int, last_event_id: Optional[int]):
+    """Yield SSE frames for events after `last_event_id` until the stream timeout."""
+    if last_event_id is None:
+        last_event_id = await cache.aget(_sequence_key(store_id), 0)
+
+    yield f"retry: {settings.ORDER_EVENTS_RETRY_MS}\n\n"
+
+    started = last_ping = time.monotonic()
+    while time.monotonic() - started < settings.ORDER_EVENTS_STREAM_TIMEOUT:
+        current = await cache.aget(_sequence_key(store_id), 0)
+        if current < last_event_id:
+            # Log expired or was reset: resume from the new sequence
+            last_event_id = current
+
+        if current > last_event_id:
+            keys = _event_keys(store_id, last_event_id, current)
+            events = await cache.aget_many(keys)
+            for key in keys:
+                if key in events:
+                    yield format_event(events[key])
+            last_event_id = current
+            last_ping = time.monotonic()
+        elif time.monotonic() - last_ping >= settings.ORDER_EVENTS_HEARTBEAT:
+            yield ": ping\n\n"
+            last_ping = time.monotonic()
+
+        await asyncio.sleep(settings.ORDER_EVENTS_POLL_INTERVAL)
+
+
+def iter_events(store_id: int, last_event_id: Optional[int]):
+    """Blocking variant of `stream_events` for WSGI servers.
+
+    WSGI has to drain an async iterator before sending anything, so it would
+    buffer the whole stream; this one sends each frame as it is produced, at the
+    cost of holding a worker for the life of the stream.
+    """
+    if last_event_id is None:
+        last_event_id = cache.get(_sequence_key(store_id), 0)
+
+    yield f"retry: {settings.ORDER_EVENTS_RETRY_MS}\n\n"
+
+    started = last_ping = time.monotonic()
+    while time.monotonic() - started < settings.ORDER_EVENTS_STREAM_TIMEOUT:
+        current = cache.get(_sequence_key(store_id), 0)
+        if current < last_event_id:
+            last_event_id = current
+
+        if current > last_event_id:
+            keys = _event_keys(store_id, last_event_id, current)
+            events = cache.get_many(keys)
+            for key in keys:
+                if key in events:
+                    yield format_event(events[key])
+            last_event_id = current
+            last_ping = time.monotonic()
+        elif time.monotonic() - last_ping >= settings.ORDER_EVENTS_HEARTBEAT:
+            yield ": ping\n\n"
+            last_ping = time.monotonic()
+
+        time.sleep(settings.ORDER_EVENTS_POLL_INTERVAL)
+
+
+@user_passes_test(lambda user: user.is_staff)
+async def order_events_view(request: HttpRequest, store_id: int, *args: Any, **kwargs: Any):
+    """Stream order events of a store to its owner (or a superuser)."""
+    user = await request.auser()
+    if not user.is_superuser and not await Store.objects.filter(id=store_id, owner__user=user).aexists():
+        return HttpResponseForbidden()
+
+    try:
+        last_event_id = int(request.headers.get("Last-Event-ID", ""))
+    except ValueError:
+        last_event_id = None
+
+    # Under ASGI the stream does not tie up a worker, WSGI needs a blocking iterator to stream at all
+    events = stream_events if isinstance(request, ASGIRequest) else iter_events
+    response = StreamingHttpResponse(events(store_id, last_event_id), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # Disable proxy buffering (nginx)
+    return response
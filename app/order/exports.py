@@ -0,0 +1,162 @@
+import csv
+from typing import Iterator
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import models
+from django.db.models import Prefetch
+
+from app.order.models import Order, OrderItem
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # PyArrow is optional, only needed for Parquet exports
+    pa = pq = None
+
+ORDER_COLUMNS = (
+    "uuid",
+    "created_at",
+    "status",
+    "store_id",
+    "account_id",
+    "zip_code",
+    "street",
+    "number",
+    "neighborhood",
+    "complement",
+    "city",
+    "state",
+    "subtotal",
+    "delivery_fee",
+    "total",
+)
+ITEM_COLUMNS = ("product_uuid", "product_name", "unit_price", "quantity")
+EXPORT_HEADER = (
+    *(f"order_{column}" for column in ORDER_COLUMNS),
+    *(f"item_{column}" for column in ITEM_COLUMNS),
+)
+# Model field of each header column, the source of the Parquet types
+EXPORT_FIELDS = (
+    *(Order._meta.get_field(column) for column in ORDER_COLUMNS),
+    *(OrderItem._meta.get_field(column) for column in ITEM_COLUMNS),
+)
+# Columns kept on the archive row, the others are read from its rendered `data`
+ARCHIVED_COLUMNS = ("uuid", "created_at", "status", "store_id", "account_id", "subtotal", "delivery_fee", "total")
+
+
+def export_queryset(queryset):
+    """Return `queryset` as a plain id-ordered order queryset with only the exported columns."""
+    return (
+        Order.objects.filter(pk__in=queryset.values("pk"))
+        .only("id", *ORDER_COLUMNS)
+        .prefetch_related(Prefetch("items", queryset=OrderItem.objects.only("order_id", *ITEM_COLUMNS).order_by("id")))
+        .order_by("id")
+    )
+
+
+def iter_export_rows(queryset, chunk_size: int | None = None) -> Iterator[tuple]:
+    """Yield one row per order item (one row with empty item columns for orders without items).
+
+    Orders are read with a server-side cursor in chunks of `chunk_size`, each
+    chunk with its items prefetched, so memory does not grow with the export.
+    """
+    chunk_size = chunk_size or settings.ORDER_EXPORT_CHUNK_SIZE
+    empty_item = (None,) * len(ITEM_COLUMNS)
+    for order in export_queryset(queryset).iterator(chunk_size=chunk_size):
+        values = tuple(getattr(order, column) for column in ORDER_COLUMNS)
+        items = order.items.all()
+        if not items:
+            yield values + empty_item
+        for item in items:
+            yield values + tuple(getattr(item, column) for column in ITEM_COLUMNS)
+
+
+def iter_archived_rows(queryset, chunk_size: int | None = None) -> Iterator[tuple]:
+    """Same rows as `iter_export_rows` for an `ArchivedOrder` queryset, rebuilt from the archived JSON."""
+    chunk_size = chunk_size or settings.ORDER_EXPORT_CHUNK_SIZE
+    empty_item = (None,) * len(ITEM_COLUMNS)
+    order_fields = EXPORT_FIELDS[: len(ORDER_COLUMNS)]
+    item_fields = EXPORT_FIELDS[len(ORDER_COLUMNS) :]
+    for archived in queryset.only("id", *ARCHIVED_COLUMNS, "data").order_by("id").iterator(chunk_size=chunk_size):
+        values = tuple(
+            getattr(archived, column) if column in ARCHIVED_COLUMNS else field.to_python(archived.data.get(column))
+            for column, field in zip(ORDER_COLUMNS, order_fields)
+        )
+        items = archived.data.get("items") or []
+        if not items:
+            yield values + empty_item
+        for item in items:
+            yield values + tuple(field.to_python(item.get(column)) for column, field in zip(ITEM_COLUMNS, item_fields))
+
+
+def _iter_rows(queryset, chunk_size: int | None, archived) -> Iterator[tuple]:
+    yield from iter_export_rows(queryset, chunk_size)
+    if archived is not None:
+        yield from iter_archived_rows(archived, chunk_size)
+
+
+class _Echo:
+    """File-like object returning what is written, to stream `csv.writer` output."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def iter_csv(queryset, chunk_size: int | None = None, archived=None) -> Iterator[str]:
+    """Yield the CSV export line by line, header first.
+
+    Rows of the `archived` ArchivedOrder queryset, if given, follow the live ones.
+    """
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_HEADER)
+    for row in _iter_rows(queryset, chunk_size, archived):
+        yield writer.writerow(row)
+
+
+def _arrow_type(field):
+    """Parquet type of an exported model field."""
+    if isinstance(field, models.DecimalField):
+        return pa.decimal128(field.max_digits, field.decimal_places)
+    if isinstance(field, models.DateTimeField):
+        return pa.timestamp("us", tz="UTC")
+    if isinstance(field, (models.IntegerField, models.ForeignKey)):
+        return pa.int64()
+    return pa.string()  # Text, choices and UUIDs
+
+
+def write_parquet(queryset, where, chunk_size: int | None = None, archived=None) -> int:
+    """Write the export to `where` (path or binary file) as Parquet, one row group per chunk.
+
+    The schema follows `EXPORT_HEADER`, typed from the model fields. Rows of the
+    `archived` ArchivedOrder queryset, if given, follow the live ones. Returns the
+    number of rows written. Requires PyArrow.
+    """
+    if pa is None:
+        raise ImproperlyConfigured("Exportação Parquet requer o pacote pyarrow.")
+
+    chunk_size = chunk_size or settings.ORDER_EXPORT_CHUNK_SIZE
+    schema = pa.schema([(name, _arrow_type(field)) for name, field in zip(EXPORT_HEADER, EXPORT_FIELDS)])
+    uuid_columns = {i for i, field in enumerate(EXPORT_FIELDS) if isinstance(field, models.UUIDField)}
+
+    def to_table(rows: list[tuple]):
+        columns = list(zip(*rows))
+        arrays = [
+            pa.array([str(v) if v is not None else None for v in column] if i in uuid_columns else column, field.type)
+            for i, (column, field) in enumerate(zip(columns, schema))
+        ]
+        return pa.Table.from_arrays(arrays, schema=schema)
+
+    written = 0
+    with pq.ParquetWriter(where, schema) as writer:
+        rows = []
+        for row in _iter_rows(queryset, chunk_size, archived):
+            rows.append(row)
+            if len(rows) >= chunk_size:
+                writer.write_table(to_table(rows))
+                written += len(rows)
+                rows = []
+        if rows:
+            writer.write_table(to_table(rows))
+            written += len(rows)
+    return written
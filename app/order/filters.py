@@ -0,0 +1,18 @@
+from django.contrib import admin
+
+from app.order.models import Order
+
+
+class LatenessFilter(admin.SimpleListFilter):
+    """Filter orders by the `lateness` annotation of `Order.with_timing`."""
+
+    title = "atraso"
+    parameter_name = "lateness"
+
+    def lookups(self, request, model_admin):
+        return Order.LATENESS_CHOICES
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(lateness=self.value())
+        return queryset
@@ -1,6 +1,6 @@
 from unfold.admin import TabularInline
 
-from app.order.models import OrderItem
+from app.order.models import OrderItem, OrderStatusTransition
 
 
 class OrderItemInline(TabularInline):
@@ -16,3 +16,21 @@ class OrderItemInline(TabularInline):
         "quantity",
     )
     readonly_fields = ("order",)
+
+
+class OrderStatusTransitionInline(TabularInline):
+
+    model = OrderStatusTransition
+    tab = True
+    extra = 0
+    fields = (
+        "from_status",
+        "to_status",
+        "changed_by",
+        "created_at",
+    )
+    readonly_fields = fields
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
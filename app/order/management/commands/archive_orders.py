@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import time
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from app.common.utils import start_of_day
+from app.order.models import ArchivedOrder, Order
+
+
+class Command(BaseCommand):
+    help = (
+        "Move pedidos concluídos/cancelados mais antigos que N meses (com itens e histórico de status) "
+        "para a tabela de arquivo, particionada por mês no Postgres, em lotes ordenados por id."
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--months", type=int, default=6, help="Idade mínima em meses (default: 6).")
+        parser.add_argument("--batch-size", type=int, default=500, help="Pedidos por lote (default: 500).")
+        parser.add_argument("--limit", type=int, default=0, help="Máximo de pedidos (0 = sem limite).")
+        parser.add_argument("--dry-run", action="store_true", help="Apenas conta os pedidos elegíveis.")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        months, batch_size, limit = options["months"], options["batch_size"], options["limit"]
+        if months <= 0 or batch_size <= 0:
+            raise CommandError("--months e --batch-size devem ser > 0.")
+
+        today = timezone.localdate()
+        month_index = today.year * 12 + today.month - 1 - months
+        cutoff = today.replace(year=month_index // 12, month=month_index % 12 + 1, day=1)
+        # A datetime bound keeps created_at comparable to its index (a __date lookup wraps the column)
+        eligible = Order.objects.filter(
+            status__in=ArchivedOrder.ARCHIVABLE_STATUSES,
+            created_at__lt=start_of_day(cutoff),
+        ).order_by("id")
+
+        if options["dry_run"]:
+            self.stdout.write(f"[archive_orders] {eligible.count()} pedidos criados antes de {cutoff:%d/%m/%Y}.")
+            return
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f"[archive_orders] pedidos criados antes de {cutoff:%d/%m/%Y}"))
+        started = time.perf_counter()
+        last_id = archived = 0
+        while not limit or archived < limit:
+            size = min(batch_size, limit - archived) if limit else batch_size
+            ids = list(eligible.filter(id__gt=last_id).values_list("id", flat=True)[:size])
+            if not ids:
+                break
+
+            # One short transaction per batch
+            archived += ArchivedOrder.archive(ids)
+            last_id = ids[-1]
+
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f"[archive_orders] id<={last_id} arquivados={archived} ({archived / elapsed:.1f} pedidos/s)")
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"[archive_orders] OK. arquivados={archived} em {elapsed:.1f}s"))
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import time
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app.order.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = "Remove chaves de idempotência mais antigas que IDEMPOTENCY_KEY_TTL, em lotes ordenados por id."
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--batch-size", type=int, default=5000, help="Chaves por lote (default: 5000).")
+        parser.add_argument("--dry-run", action="store_true", help="Apenas conta as chaves expiradas.")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        batch_size = options["batch_size"]
+        if batch_size <= 0:
+            raise CommandError("--batch-size deve ser > 0.")
+
+        cutoff = IdempotencyKey.expired_before()
+        expired = IdempotencyKey.objects.filter(created_at__lt=cutoff).order_by("id")
+
+        if options["dry_run"]:
+            self.stdout.write(
+                f"[purge_idempotency_keys] {expired.count()} chaves criadas antes de {cutoff:%d/%m/%Y %H:%M}."
+            )
+            return
+
+        started = time.perf_counter()
+        purged = 0
+        while True:
+            # One short delete per batch, the created_at index finds the expired rows
+            ids = list(expired.values_list("id", flat=True)[:batch_size])
+            if not ids:
+                break
+            purged += IdempotencyKey.objects.filter(id__in=ids).delete()[0]
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"[purge_idempotency_keys] OK. removidas={purged} em {elapsed:.1f}s"))
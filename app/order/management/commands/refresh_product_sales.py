@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import time
+from datetime import date, timedelta
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from app.order.models import ProductSales
+from app.product.models import Menu
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula as vendas diárias por produto a partir dos itens de pedido e atualiza os "
+        "mais vendidos dos cardápios. Agende para rodar periodicamente (ex.: a cada hora com --days 2)."
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--days", type=int, default=2, help="Dias recalculados até hoje (default: 2).")
+        parser.add_argument(
+            "--since", type=date.fromisoformat, default=None, help="Primeiro dia (YYYY-MM-DD), ignora --days."
+        )
+        parser.add_argument("--store", type=int, default=None, help="Recalcula apenas a loja com este id.")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if options["days"] <= 0:
+            raise CommandError("--days deve ser > 0.")
+        since = options["since"] or timezone.localdate() - timedelta(days=options["days"] - 1)
+
+        started = time.perf_counter()
+        store_ids = ProductSales.refresh(since, store_id=options["store"])
+        for store_id in sorted(store_ids):
+            Menu.rebuild(store_id)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"[refresh_product_sales] OK. desde={since:%Y-%m-%d} lojas={len(store_ids)} em {elapsed:.1f}s"
+            )
+        )
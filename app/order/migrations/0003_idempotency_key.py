@@ -0,0 +1,34 @@
+# Generated by Django 6.0 on 2026-10-18 09:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0004_address_address_store_lat_lon_idx'),
+        ('order', '0002_order_order_created_id_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdempotencyKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=255, verbose_name='chave')),
+                ('fingerprint', models.CharField(max_length=64, verbose_name='impressão digital')),
+                ('status_code', models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='status HTTP')),
+                ('response', models.JSONField(blank=True, null=True, verbose_name='resposta')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='criado em')),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='idempotency_keys', to='account.account', verbose_name='cliente')),
+                ('order', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='idempotency_keys', to='order.order', verbose_name='pedido')),
+            ],
+            options={
+                'verbose_name': 'chave de idempotência',
+                'verbose_name_plural': 'chaves de idempotência',
+                'db_table': 'idempotency_key',
+                'constraints': [models.UniqueConstraint(fields=('account', 'key'), name='unique_idempotency_key_per_account')],
+            },
+        ),
+    ]
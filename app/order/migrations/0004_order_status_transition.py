@@ -0,0 +1,34 @@
+# Generated by Django 6.0 on 2026-10-18 09:59
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order', '0003_idempotency_key'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderStatusTransition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_status', models.CharField(choices=[('pending', 'Pendente'), ('processing', 'Processando'), ('delivering', 'Entregando'), ('completed', 'Concluído'), ('canceled', 'Cancelado')], max_length=20, verbose_name='status anterior')),
+                ('to_status', models.CharField(choices=[('pending', 'Pendente'), ('processing', 'Processando'), ('delivering', 'Entregando'), ('completed', 'Concluído'), ('canceled', 'Cancelado')], max_length=20, verbose_name='novo status')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='criado em')),
+                ('changed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='order_status_transitions', to=settings.AUTH_USER_MODEL, verbose_name='alterado por')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_transitions', to='order.order', verbose_name='pedido')),
+            ],
+            options={
+                'verbose_name': 'transição de status',
+                'verbose_name_plural': 'transições de status',
+                'db_table': 'order_status_transition',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['order', '-created_at'], name='order_transition_order_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 6.0 on 2026-10-18 10:00
+
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery
+
+STATUS_TIMESTAMPS = {
+    'processing': 'accepted_at',
+    'delivering': 'dispatched_at',
+    'completed': 'completed_at',
+    'canceled': 'canceled_at',
+}
+
+
+def backfill_timeline(apps, schema_editor):
+    Order = apps.get_model('order', 'Order')
+    OrderStatusTransition = apps.get_model('order', 'OrderStatusTransition')
+    for status, field in STATUS_TIMESTAMPS.items():
+        # When the order first reached the status, from the transition history
+        reached_at = (
+            OrderStatusTransition.objects.filter(order=OuterRef('pk'), to_status=status)
+            .order_by('created_at')
+            .values('created_at')[:1]
+        )
+        Order.objects.filter(status_transitions__to_status=status).update(**{field: Subquery(reached_at)})
+        # Orders without history: updated_at is the best known time of their current status
+        Order.objects.filter(status=status, **{f'{field}__isnull': True}).update(**{field: F('updated_at')})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0004_address_address_store_lat_lon_idx'),
+        ('order', '0004_order_status_transition'),
+        ('store', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='accepted_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True, verbose_name='aceito em'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='canceled_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True, verbose_name='cancelado em'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='completed_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True, verbose_name='concluído em'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='dispatched_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True, verbose_name='saiu para entrega em'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['store', 'status', 'created_at'], name='order_store_status_created_idx'),
+        ),
+        migrations.RunPython(backfill_timeline, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 6.0 on 2026-10-18 10:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order', '0005_order_timeline'),
+        ('store', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='dia')),
+                ('status', models.CharField(choices=[('pending', 'Pendente'), ('processing', 'Processando'), ('delivering', 'Entregando'), ('completed', 'Concluído'), ('canceled', 'Cancelado')], max_length=20, verbose_name='status')),
+                ('orders_count', models.IntegerField(default=0, verbose_name='pedidos')),
+                ('subtotal', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='subtotal')),
+                ('delivery_fee', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='taxas de entrega')),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='total')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='atualizado em')),
+                ('store', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to='store.store', verbose_name='loja')),
+            ],
+            options={
+                'verbose_name': 'venda diária',
+                'verbose_name_plural': 'vendas diárias',
+                'db_table': 'order_daily_sales',
+                'ordering': ['-day', 'status'],
+                'constraints': [models.UniqueConstraint(fields=('store', 'day', 'status'), name='unique_daily_sales_per_store_status')],
+            },
+        ),
+    ]
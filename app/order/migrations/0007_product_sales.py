@@ -0,0 +1,35 @@
+# Generated by Django 6.0 on 2026-10-18 10:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order', '0006_daily_sales'),
+        ('store', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductSales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='dia')),
+                ('product_uuid', models.UUIDField(verbose_name='UUID do produto')),
+                ('product_name', models.CharField(max_length=255, verbose_name='nome do produto')),
+                ('quantity', models.PositiveIntegerField(default=0, verbose_name='quantidade')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='receita')),
+                ('store', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='product_sales', to='store.store', verbose_name='loja')),
+            ],
+            options={
+                'verbose_name': 'venda de produto',
+                'verbose_name_plural': 'vendas de produtos',
+                'db_table': 'order_product_sales',
+                'ordering': ['-day', '-quantity'],
+                'indexes': [models.Index(fields=['store', 'day'], name='product_sales_store_day_idx')],
+                'constraints': [models.UniqueConstraint(fields=('store', 'day', 'product_uuid'), name='unique_product_sales_per_day')],
+            },
+        ),
+    ]
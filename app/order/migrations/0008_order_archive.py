@@ -0,0 +1,79 @@
+# Generated by Django 6.0 on 2026-10-18 10:11
+
+import django.core.serializers.json
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+# On Postgres the archive is range partitioned by month of created_at. The primary
+# key must include the partition key; partitions are created by ArchivedOrder.ensure_partitions.
+# Indexes are recreated from the model Meta, so their names match what Django expects.
+PARTITIONED_TABLE_SQL = [
+    'DROP TABLE "order_archive"',
+    """
+    CREATE TABLE "order_archive" (
+        "id" bigint NOT NULL,
+        "uuid" uuid NOT NULL,
+        "store_id" bigint NOT NULL,
+        "account_id" bigint NOT NULL,
+        "status" varchar(20) NOT NULL,
+        "subtotal" numeric(10, 2) NOT NULL,
+        "delivery_fee" numeric(10, 2) NOT NULL,
+        "total" numeric(10, 2) NOT NULL,
+        "created_at" timestamp with time zone NOT NULL,
+        "updated_at" timestamp with time zone NOT NULL,
+        "archived_at" timestamp with time zone NOT NULL,
+        "data" jsonb NOT NULL,
+        "status_transitions" jsonb NOT NULL,
+        PRIMARY KEY ("id", "created_at")
+    ) PARTITION BY RANGE ("created_at")
+    """,
+]
+
+
+def partition_archive(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    ArchivedOrder = apps.get_model('order', 'ArchivedOrder')
+    for sql in PARTITIONED_TABLE_SQL:
+        schema_editor.execute(sql)
+    for index in ArchivedOrder._meta.indexes:
+        schema_editor.add_index(ArchivedOrder, index)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0004_address_address_store_lat_lon_idx'),
+        ('order', '0007_product_sales'),
+        ('store', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedOrder',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('uuid', models.UUIDField(verbose_name='UUID')),
+                ('status', models.CharField(choices=[('pending', 'Pendente'), ('processing', 'Processando'), ('delivering', 'Entregando'), ('completed', 'Concluído'), ('canceled', 'Cancelado')], max_length=20, verbose_name='status')),
+                ('subtotal', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='subtotal')),
+                ('delivery_fee', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='taxa de entrega')),
+                ('total', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='total')),
+                ('created_at', models.DateTimeField(verbose_name='criado em')),
+                ('updated_at', models.DateTimeField(verbose_name='atualizado em')),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='arquivado em')),
+                ('data', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder, verbose_name='pedido')),
+                ('status_transitions', models.JSONField(default=list, encoder=django.core.serializers.json.DjangoJSONEncoder, verbose_name='transições de status')),
+                ('account', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='archived_orders', to='account.account', verbose_name='cliente')),
+                ('store', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='archived_orders', to='store.store', verbose_name='loja')),
+            ],
+            options={
+                'verbose_name': 'pedido arquivado',
+                'verbose_name_plural': 'pedidos arquivados',
+                'db_table': 'order_archive',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['uuid'], name='order_archive_uuid_idx'), models.Index(fields=['account', '-created_at', '-id'], name='order_archive_account_idx'), models.Index(fields=['store', 'created_at'], name='order_archive_store_idx')],
+            },
+        ),
+        migrations.RunPython(partition_archive, migrations.RunPython.noop),
+    ]
@@ -1,15 +1,36 @@
+import json
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
 from decimal import Decimal
 
-from django.db import models
-from django.db.models import F, Sum
-from django.db.models.functions import Coalesce
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, connection, models, transaction
+from django.db.models import Case, DateTimeField, DurationField, ExpressionWrapper, F, Max, Sum, Value, When
+from django.db.models.functions import Coalesce, Now, TruncDate
 from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
 
 from app.account.models import Account
-from app.common.models import BaseModel
+from app.common.models import BaseModel, Minutes
+from app.order.events import (
+    EVENT_ORDER_CREATED,
+    EVENT_ORDER_STATUS_CHANGED,
+    ORDER_EVENT_FIELDS,
+    order_event,
+    publish_on_commit,
+)
 from app.store.models import Store
 
 
+@dataclass(frozen=True)
+class StatusTransitionResult:
+    moved: int
+    skipped: int
+
+
 class Order(BaseModel):
 
     STATUS_PENDING = "pending"
@@ -24,6 +45,31 @@ class Order(BaseModel):
         (STATUS_COMPLETED, "Concluído"),
         (STATUS_CANCELED, "Cancelado"),
     ]
+    # Allowed source statuses of each target status
+    TRANSITIONS = {
+        STATUS_PROCESSING: (STATUS_PENDING,),
+        STATUS_DELIVERING: (STATUS_PROCESSING,),
+        STATUS_COMPLETED: (STATUS_DELIVERING,),
+        STATUS_CANCELED: (STATUS_PENDING, STATUS_PROCESSING, STATUS_DELIVERING),
+    }
+    LATENESS_ON_TIME = "success"
+    LATENESS_WARNING = "warning"
+    LATENESS_LATE = "danger"
+    LATENESS_CHOICES = [
+        (LATENESS_ON_TIME, "No prazo"),
+        (LATENESS_WARNING, "Atenção"),
+        (LATENESS_LATE, "Atrasado"),
+    ]
+    # Share of the store delivery time from which an order is flagged
+    LATENESS_WARNING_RATIO = 0.6
+    LATENESS_LATE_RATIO = 0.8
+    # Timestamp field set when an order first reaches each status, kept if it re-enters it
+    STATUS_TIMESTAMPS = {
+        STATUS_PROCESSING: "accepted_at",
+        STATUS_DELIVERING: "dispatched_at",
+        STATUS_COMPLETED: "completed_at",
+        STATUS_CANCELED: "canceled_at",
+    }
 
     # Relationships
     store = models.ForeignKey(
@@ -70,6 +116,12 @@ class Order(BaseModel):
         default=0.0,
     )
 
+    # Timeline
+    accepted_at = models.DateTimeField(verbose_name="aceito em", null=True, blank=True, db_index=True)
+    dispatched_at = models.DateTimeField(verbose_name="saiu para entrega em", null=True, blank=True, db_index=True)
+    completed_at = models.DateTimeField(verbose_name="concluído em", null=True, blank=True, db_index=True)
+    canceled_at = models.DateTimeField(verbose_name="cancelado em", null=True, blank=True, db_index=True)
+
     # Address fields snapshot
     zip_code = models.CharField(
         verbose_name="CEP",
@@ -115,6 +167,173 @@ class Order(BaseModel):
         verbose_name_plural = "pedidos"
         db_table = "order"
         ordering = ["-created_at"]
+        indexes = [
+            # Keyset pagination on (created_at, id), globally and per customer
+            models.Index(fields=["-created_at", "-id"], name="order_created_id_idx"),
+            models.Index(fields=["account", "-created_at", "-id"], name="order_account_created_id_idx"),
+            # Open orders of a store, oldest first (late orders)
+            models.Index(fields=["store", "status", "created_at"], name="order_store_status_created_idx"),
+        ]
+
+    # Fields that place an order in the daily sales rollup
+    SALES_FIELDS = ("store_id", "created_at", "status", "subtotal", "delivery_fee", "total")
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the loaded status and sales figures to detect changes on save
+        if "status" in instance.__dict__:
+            instance._loaded_status = instance.status
+        if all(field in instance.__dict__ for field in cls.SALES_FIELDS):
+            instance._loaded_sales = instance.sales_snapshot()
+        return instance
+
+    def sales_snapshot(self) -> tuple:
+        return tuple(getattr(self, field) for field in self.SALES_FIELDS)
+
+    def validate_status_change(self) -> None:
+        """Raise ValidationError when the status was changed against `TRANSITIONS`."""
+        from_status = getattr(self, "_loaded_status", self.status)
+        if self._state.adding or self.status == from_status:
+            return
+        if from_status not in self.TRANSITIONS.get(self.status, ()):
+            labels = dict(self.STATUS_CHOICES)
+            raise ValidationError(
+                {"status": f"Transição de status não permitida: {labels[from_status]} → {labels[self.status]}."}
+            )
+
+    def clean(self):
+        super().clean()
+        self.validate_status_change()
+
+    def save(self, *args, **kwargs):
+        created = self._state.adding
+        from_status = getattr(self, "_loaded_status", self.status)
+        status_changed = not created and self.status != from_status
+        if status_changed:
+            self.validate_status_change()
+        loaded_sales = getattr(self, "_loaded_sales", None)
+
+        timestamp_field = self.STATUS_TIMESTAMPS.get(self.status)
+        if timestamp_field and getattr(self, timestamp_field) is None:
+            setattr(self, timestamp_field, timezone.now())
+            if kwargs.get("update_fields") is not None:
+                kwargs["update_fields"] = {*kwargs["update_fields"], timestamp_field}
+
+        super().save(*args, **kwargs)
+        self._loaded_status = self.status
+        self._loaded_sales, sales = self.sales_snapshot(), loaded_sales
+
+        if status_changed:
+            OrderStatusTransition.objects.create(order=self, from_status=from_status, to_status=self.status)
+
+        if created:
+            DailySales.apply([(self._loaded_sales, 1)])
+        elif sales is not None and sales != self._loaded_sales:
+            DailySales.apply([(sales, -1), (self._loaded_sales, 1)])
+
+        if created:
+            publish_on_commit([(self.store_id, order_event(EVENT_ORDER_CREATED, self))])
+        elif status_changed:
+            publish_on_commit([(self.store_id, order_event(EVENT_ORDER_STATUS_CHANGED, self))])
+
+    def delete(self, *args, **kwargs):
+        """Delete the order and take it out of the daily sales rollup.
+
+        Queryset deletes skip this on purpose: `ArchivedOrder.archive` removes orders
+        that keep counting in the rollup.
+        """
+        sales = getattr(self, "_loaded_sales", None) or self.sales_snapshot()
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            DailySales.apply([(sales, -1)])
+        return result
+
+    @classmethod
+    def transition(cls, queryset, status: str, changed_by=None) -> StatusTransitionResult:
+        """Move the orders of `queryset` to `status` where the transition is allowed.
+
+        Runs a fixed number of queries whatever the batch size: the candidates are
+        locked, moved by a single `UPDATE ... WHERE status IN (sources)` and get
+        their history rows in one `bulk_create`. Orders in any other status, or
+        changed by a concurrent writer, are counted as skipped.
+        """
+        sources = cls.TRANSITIONS.get(status, ())
+        with transaction.atomic():
+            total = queryset.count()
+            # Lock in id order so concurrent batches do not deadlock
+            candidates = list(
+                cls.objects.filter(pk__in=queryset.values("pk"), status__in=sources)
+                .select_for_update()
+                .only(*ORDER_EVENT_FIELDS, *cls.SALES_FIELDS)
+                .order_by("id")
+            )
+            if not candidates:
+                return StatusTransitionResult(moved=0, skipped=total)
+
+            now = timezone.now()
+            timestamp_field = cls.STATUS_TIMESTAMPS[status]
+            moved = cls.objects.filter(id__in=[order.id for order in candidates], status__in=sources).update(
+                status=status,
+                updated_at=now,
+                # Same rule as save(): only the first time the order reaches the status
+                **{timestamp_field: Coalesce(timestamp_field, Value(now), output_field=DateTimeField())},
+            )
+            if moved != len(candidates):
+                # Backends without row locks: keep the rows this UPDATE actually moved
+                moved_ids = set(
+                    cls.objects.filter(id__in=[order.id for order in candidates], status=status, updated_at=now)
+                    .values_list("id", flat=True)
+                )
+                candidates = [order for order in candidates if order.id in moved_ids]
+
+            OrderStatusTransition.objects.bulk_create(
+                OrderStatusTransition(
+                    order_id=order.id,
+                    from_status=order.status,
+                    to_status=status,
+                    changed_by=changed_by,
+                )
+                for order in candidates
+            )
+            sales = [(order.sales_snapshot(), -1) for order in candidates]
+            for order in candidates:
+                order.status, order.updated_at = status, now
+            DailySales.apply(sales + [(order.sales_snapshot(), 1) for order in candidates])
+            publish_on_commit((order.store_id, order_event(EVENT_ORDER_STATUS_CHANGED, order)) for order in candidates)
+
+        return StatusTransitionResult(moved=len(candidates), skipped=total - len(candidates))
+
+    @classmethod
+    def with_timing(cls, queryset):
+        """Annotate `expected_delivery_at`, `elapsed` and `lateness` computed by the database.
+
+        `elapsed` runs until the order is completed or canceled. `lateness` is one of
+        `LATENESS_CHOICES`, by the share of the store delivery time already elapsed.
+        """
+        delivery_time = F("store__delivery_time")
+        return queryset.annotate(
+            expected_delivery_at=ExpressionWrapper(
+                F("created_at") + Minutes(delivery_time),
+                output_field=DateTimeField(),
+            ),
+            elapsed=ExpressionWrapper(
+                Coalesce("completed_at", "canceled_at", Now()) - F("created_at"),
+                output_field=DurationField(),
+            ),
+            lateness=Case(
+                When(store__delivery_time=0, then=Value(cls.LATENESS_ON_TIME)),
+                When(
+                    elapsed__lt=Minutes(delivery_time * cls.LATENESS_WARNING_RATIO),
+                    then=Value(cls.LATENESS_ON_TIME),
+                ),
+                When(
+                    elapsed__lte=Minutes(delivery_time * cls.LATENESS_LATE_RATIO),
+                    then=Value(cls.LATENESS_WARNING),
+                ),
+                default=Value(cls.LATENESS_LATE),
+            ),
+        )
 
     def recalculate_totals(self):
         agg = self.items.aggregate(subtotal=Coalesce(Sum(F("unit_price") * F("quantity")), Decimal("0.00")))
@@ -130,31 +349,21 @@ class Order(BaseModel):
     def format_updated_at(self) -> str:
         return self.updated_at.strftime("%d/%m/%Y %H:%M")
 
-    def current_duration(self) -> int:
-        """Return the duration of the order formatted as HH:MM."""
-        target_time = timezone.now()
-        if self.status in [self.STATUS_COMPLETED, self.STATUS_CANCELED]:
-            target_time = self.updated_at
-        duration_minutes = int((target_time - self.created_at).total_seconds() // 60)
-        hours = duration_minutes // 60
-        minutes = duration_minutes % 60
-        return f"{hours:02d}:{minutes:02d}"
-
-    def current_duration_percentage(self) -> int:
-        """Return the current duration as a percentage of the expected delivery time."""
-        if self.store.delivery_time == 0:
-            return None
-        target_time = timezone.now()
-        if self.status in [self.STATUS_COMPLETED, self.STATUS_CANCELED]:
-            target_time = self.updated_at
-        duration_minutes = int((target_time - self.created_at).total_seconds() // 60)
-        percentage = (duration_minutes / self.store.delivery_time) * 100
-        return int(percentage)
-
-    def expected_delivery_time(self) -> timezone.datetime:
-        """Calculate the expected delivery time based on store's delivery time."""
-        expected_time = self.created_at + timezone.timedelta(minutes=self.store.delivery_time)
-        return expected_time.strftime("%d/%m/%Y %H:%M")
+    @property
+    def finished_at(self):
+        """Return when the order was completed or canceled, if it was."""
+        return self.completed_at or self.canceled_at
+
+    def current_duration(self) -> str:
+        """Return the duration of the order formatted as HH:MM.
+
+        Uses the `elapsed` annotation of `with_timing` when the order was loaded with it.
+        """
+        elapsed = getattr(self, "elapsed", None)
+        if elapsed is None:
+            elapsed = (self.finished_at or timezone.now()) - self.created_at
+        minutes = int(elapsed.total_seconds() // 60)
+        return f"{minutes // 60:02d}:{minutes % 60:02d}"
 
     def delivery_address(self) -> str:
         zip_code = f"{self.zip_code[:5]}-{self.zip_code[5:]}" if self.zip_code else ""
@@ -189,9 +398,430 @@ class OrderItem(BaseModel):
         verbose_name_plural = "itens do pedido"
         db_table = "order_item"
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["-created_at", "-id"], name="order_item_created_id_idx"),
+        ]
         constraints = [
             models.UniqueConstraint(fields=["order", "product_uuid"], name="unique_product_per_order"),
         ]
 
     def __str__(self):
         return f"{self.quantity}x {self.product_name}"
+
+
+class OrderStatusTransition(models.Model):
+    """Status change of an order, made through `Order.transition` or `Order.save`."""
+
+    # Relationships
+    order = models.ForeignKey(
+        Order,
+        verbose_name="pedido",
+        on_delete=models.CASCADE,
+        related_name="status_transitions",
+    )
+    changed_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        verbose_name="alterado por",
+        on_delete=models.SET_NULL,
+        related_name="order_status_transitions",
+        null=True,
+        blank=True,
+    )
+
+    # Fields
+    from_status = models.CharField("status anterior", max_length=20, choices=Order.STATUS_CHOICES)
+    to_status = models.CharField("novo status", max_length=20, choices=Order.STATUS_CHOICES)
+    created_at = models.DateTimeField(verbose_name="criado em", auto_now_add=True)
+
+    class Meta:
+        verbose_name = "transição de status"
+        verbose_name_plural = "transições de status"
+        db_table = "order_status_transition"
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["order", "-created_at"], name="order_transition_order_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.get_from_status_display()} → {self.get_to_status_display()}"
+
+
+class DailySales(models.Model):
+    """Orders and revenue of a store per local day and order status.
+
+    Kept up to date incrementally by `Order.save`, `Order.delete`, `Order.transition`
+    and the batch order endpoint; `rebuild_daily_sales` recomputes it from the
+    orders, live and archived. Raw queryset updates or deletes of orders bypass the
+    rollup and need a rebuild of the affected days.
+    """
+
+    # Relationships
+    store = models.ForeignKey(
+        Store,
+        verbose_name="loja",
+        on_delete=models.CASCADE,
+        related_name="daily_sales",
+    )
+
+    # Fields
+    day = models.DateField(verbose_name="dia")
+    status = models.CharField("status", max_length=20, choices=Order.STATUS_CHOICES)
+    orders_count = models.IntegerField(verbose_name="pedidos", default=0)
+    subtotal = models.DecimalField(verbose_name="subtotal", max_digits=14, decimal_places=2, default=0)
+    delivery_fee = models.DecimalField(verbose_name="taxas de entrega", max_digits=14, decimal_places=2, default=0)
+    total = models.DecimalField(verbose_name="total", max_digits=14, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(verbose_name="atualizado em", auto_now=True)
+
+    class Meta:
+        verbose_name = "venda diária"
+        verbose_name_plural = "vendas diárias"
+        db_table = "order_daily_sales"
+        ordering = ["-day", "status"]
+        constraints = [
+            models.UniqueConstraint(fields=["store", "day", "status"], name="unique_daily_sales_per_store_status"),
+        ]
+
+    @property
+    def average_ticket(self) -> Decimal:
+        if not self.orders_count:
+            return Decimal("0.00")
+        return (self.total / self.orders_count).quantize(Decimal("0.01"))
+
+    @classmethod
+    def apply(cls, entries) -> None:
+        """Add `(Order.sales_snapshot(), sign)` entries to the rollup.
+
+        Runs one INSERT for missing rows plus one UPDATE per (store, day, status)
+        touched, whatever the number of orders.
+        """
+        deltas = {}
+        for (store_id, created_at, status, subtotal, delivery_fee, total), sign in entries:
+            key = (store_id, timezone.localdate(created_at), status)
+            delta = deltas.setdefault(key, [0, Decimal("0.00"), Decimal("0.00"), Decimal("0.00")])
+            delta[0] += sign
+            delta[1] += sign * Decimal(subtotal or 0)
+            delta[2] += sign * Decimal(delivery_fee or 0)
+            delta[3] += sign * Decimal(total or 0)
+
+        deltas = {key: delta for key, delta in deltas.items() if any(delta)}
+        if not deltas:
+            return
+
+        with transaction.atomic():
+            # Make sure every row exists, then increment each one in place
+            cls.objects.bulk_create(
+                [cls(store_id=store_id, day=day, status=status) for store_id, day, status in deltas],
+                ignore_conflicts=True,
+            )
+            now = timezone.now()
+            for (store_id, day, status), (count, subtotal, delivery_fee, total) in deltas.items():
+                cls.objects.filter(store_id=store_id, day=day, status=status).update(
+                    orders_count=F("orders_count") + count,
+                    subtotal=F("subtotal") + subtotal,
+                    delivery_fee=F("delivery_fee") + delivery_fee,
+                    total=F("total") + total,
+                    updated_at=now,
+                )
+
+    def __str__(self):
+        return f"{self.store_id} {self.day:%d/%m/%Y} {self.get_status_display()}"
+
+
+class ProductSales(models.Model):
+    """Units sold and revenue of each product of a store per local day, canceled orders excluded.
+
+    Built from `OrderItem` snapshots by `refresh_product_sales`, which is meant to run
+    periodically over the last days; rankings over any window then read at most
+    one row per product and day.
+    """
+
+    # Relationships
+    store = models.ForeignKey(
+        Store,
+        verbose_name="loja",
+        on_delete=models.CASCADE,
+        related_name="product_sales",
+    )
+
+    # Fields
+    day = models.DateField(verbose_name="dia")
+    product_uuid = models.UUIDField(verbose_name="UUID do produto")
+    product_name = models.CharField(verbose_name="nome do produto", max_length=255)
+    quantity = models.PositiveIntegerField(verbose_name="quantidade", default=0)
+    revenue = models.DecimalField(verbose_name="receita", max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        verbose_name = "venda de produto"
+        verbose_name_plural = "vendas de produtos"
+        db_table = "order_product_sales"
+        ordering = ["-day", "-quantity"]
+        indexes = [
+            models.Index(fields=["store", "day"], name="product_sales_store_day_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=["store", "day", "product_uuid"], name="unique_product_sales_per_day"),
+        ]
+
+    @classmethod
+    def refresh(cls, since, until=None, store_id=None) -> set[int]:
+        """Recompute the rows from `since` to `until` (inclusive) and return the affected store ids."""
+        items = (
+            OrderItem.objects.exclude(order__status=Order.STATUS_CANCELED)
+            .annotate(day=TruncDate("order__created_at"))
+            .filter(day__gte=since)
+        )
+        rows = cls.objects.filter(day__gte=since)
+        if until:
+            items, rows = items.filter(day__lte=until), rows.filter(day__lte=until)
+        if store_id:
+            items, rows = items.filter(order__store_id=store_id), rows.filter(store_id=store_id)
+
+        aggregates = (
+            items.values("order__store_id", "day", "product_uuid")
+            .annotate(
+                name=Max("product_name"),
+                quantity_sum=Sum("quantity"),
+                revenue_sum=Sum(F("unit_price") * F("quantity")),
+            )
+            .order_by()
+        )
+
+        with transaction.atomic():
+            store_ids = set(rows.values_list("store_id", flat=True).distinct())
+            rows.delete()
+            created = cls.objects.bulk_create(
+                (
+                    cls(
+                        store_id=row["order__store_id"],
+                        day=row["day"],
+                        product_uuid=row["product_uuid"],
+                        product_name=row["name"],
+                        quantity=row["quantity_sum"],
+                        revenue=row["revenue_sum"],
+                    )
+                    for row in aggregates.iterator()
+                ),
+                batch_size=1000,
+            )
+        return store_ids | {row.store_id for row in created}
+
+    @classmethod
+    def top(cls, store_id: int, days: int | None = None, limit: int | None = None) -> list[dict]:
+        """Return the best selling products of the store over the last `days` days, by units sold."""
+        days = days or settings.TOP_PRODUCTS_DAYS
+        limit = limit or settings.TOP_PRODUCTS_LIMIT
+        since = timezone.localdate() - timedelta(days=days - 1)
+        return list(
+            cls.objects.filter(store_id=store_id, day__gte=since)
+            .values("product_uuid")
+            .annotate(product_name=Max("product_name"), quantity=Sum("quantity"), revenue=Sum("revenue"))
+            .order_by("-quantity", "-revenue", "product_uuid")[:limit]
+        )
+
+    def __str__(self):
+        return f"{self.product_name} ({self.day:%d/%m/%Y})"
+
+
+class ArchivedOrder(models.Model):
+    """Completed or canceled order moved out of the `order`/`order_item` tables.
+
+    The row keeps the original id and the columns used to filter and page through
+    history; `data` holds the order as rendered by `OrderSerializer` (items
+    included) when it was archived. On Postgres the table is partitioned by month
+    of `created_at`; other backends use a plain table.
+    """
+
+    ARCHIVABLE_STATUSES = (Order.STATUS_COMPLETED, Order.STATUS_CANCELED)
+
+    # Original order id, so cursors and links keep working after archival
+    id = models.BigIntegerField(primary_key=True)
+    uuid = models.UUIDField(verbose_name="UUID")
+
+    # Relationships, without database constraints so archived rows never block store or account changes
+    store = models.ForeignKey(
+        Store,
+        verbose_name="loja",
+        on_delete=models.DO_NOTHING,
+        related_name="archived_orders",
+        db_constraint=False,
+    )
+    account = models.ForeignKey(
+        Account,
+        verbose_name="cliente",
+        on_delete=models.DO_NOTHING,
+        related_name="archived_orders",
+        db_constraint=False,
+    )
+
+    # Fields
+    status = models.CharField("status", max_length=20, choices=Order.STATUS_CHOICES)
+    subtotal = models.DecimalField(verbose_name="subtotal", max_digits=10, decimal_places=2)
+    delivery_fee = models.DecimalField(verbose_name="taxa de entrega", max_digits=10, decimal_places=2)
+    total = models.DecimalField(verbose_name="total", max_digits=10, decimal_places=2)
+    created_at = models.DateTimeField(verbose_name="criado em")
+    updated_at = models.DateTimeField(verbose_name="atualizado em")
+    archived_at = models.DateTimeField(verbose_name="arquivado em", default=timezone.now)
+    data = models.JSONField(verbose_name="pedido", encoder=DjangoJSONEncoder)
+    status_transitions = models.JSONField(
+        verbose_name="transições de status",
+        encoder=DjangoJSONEncoder,
+        default=list,
+    )
+
+    class Meta:
+        verbose_name = "pedido arquivado"
+        verbose_name_plural = "pedidos arquivados"
+        db_table = "order_archive"
+        ordering = ["-created_at"]
+        # Named explicitly: migration 0008 recreates them on the partitioned table
+        indexes = [
+            models.Index(fields=["uuid"], name="order_archive_uuid_idx"),
+            models.Index(fields=["account", "-created_at", "-id"], name="order_archive_account_idx"),
+            models.Index(fields=["store", "created_at"], name="order_archive_store_idx"),
+        ]
+
+    @staticmethod
+    def partition_name(month) -> str:
+        return f"order_archive_{month:%Y_%m}"
+
+    @classmethod
+    def ensure_partitions(cls, months) -> None:
+        """Create the monthly partitions of the given months (first day dates). No-op outside Postgres."""
+        if connection.vendor != "postgresql":
+            return
+        with connection.cursor() as cursor:
+            for month in sorted(set(months)):
+                next_month = (month.replace(day=28) + timedelta(days=4)).replace(day=1)
+                cursor.execute(
+                    f'CREATE TABLE IF NOT EXISTS "{cls.partition_name(month)}" PARTITION OF "{cls._meta.db_table}" '
+                    f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{next_month:%Y-%m-%d}')"
+                )
+
+    @classmethod
+    def archive(cls, order_ids) -> int:
+        """Move the given orders, with their items and status history, to the archive.
+
+        Only completed or canceled orders are moved. Everything happens in one
+        transaction: rows are copied with a single bulk INSERT, then deleted.
+        """
+        from app.order.serializers import OrderSerializer  # avoid circular import
+
+        with transaction.atomic():
+            orders = list(
+                Order.objects.filter(id__in=order_ids, status__in=cls.ARCHIVABLE_STATUSES)
+                .select_for_update(of=("self",))
+                .prefetch_related("items", "status_transitions")
+                .order_by("id")
+            )
+            if not orders:
+                return 0
+
+            # Partition bounds are UTC months, the Postgres session time zone
+            cls.ensure_partitions(
+                order.created_at.astimezone(dt_timezone.utc).date().replace(day=1) for order in orders
+            )
+            now = timezone.now()
+            cls.objects.bulk_create(
+                cls(
+                    id=order.id,
+                    uuid=order.uuid,
+                    store_id=order.store_id,
+                    account_id=order.account_id,
+                    status=order.status,
+                    subtotal=order.subtotal,
+                    delivery_fee=order.delivery_fee,
+                    total=order.total,
+                    created_at=order.created_at,
+                    updated_at=order.updated_at,
+                    archived_at=now,
+                    # Rendered JSON, so reads return exactly what the live API returned
+                    data=json.loads(JSONRenderer().render(OrderSerializer(order).data)),
+                    status_transitions=[
+                        {
+                            "from_status": transition.from_status,
+                            "to_status": transition.to_status,
+                            "changed_by_id": transition.changed_by_id,
+                            "created_at": transition.created_at,
+                        }
+                        for transition in order.status_transitions.all()
+                    ],
+                )
+                for order in orders
+            )
+            Order.objects.filter(id__in=[order.id for order in orders]).delete()
+        return len(orders)
+
+    def __str__(self):
+        return str(self.uuid)
+
+
+class IdempotencyKey(models.Model):
+    """Stored outcome of an order creation request sent with an `Idempotency-Key` header.
+
+    Keys are replayed for `IDEMPOTENCY_KEY_TTL` seconds. Expired keys are reused
+    as new ones when sent again and removed by the `purge_idempotency_keys` command.
+    """
+
+    # Relationships
+    account = models.ForeignKey(
+        Account,
+        verbose_name="cliente",
+        on_delete=models.CASCADE,
+        related_name="idempotency_keys",
+    )
+    order = models.ForeignKey(
+        Order,
+        verbose_name="pedido",
+        on_delete=models.SET_NULL,
+        related_name="idempotency_keys",
+        null=True,
+        blank=True,
+    )
+
+    # Fields
+    key = models.CharField(verbose_name="chave", max_length=255)
+    fingerprint = models.CharField(verbose_name="impressão digital", max_length=64)
+    status_code = models.PositiveSmallIntegerField(verbose_name="status HTTP", null=True, blank=True)
+    response = models.JSONField(verbose_name="resposta", null=True, blank=True)
+    created_at = models.DateTimeField(verbose_name="criado em", auto_now_add=True, db_index=True)
+
+    class Meta:
+        verbose_name = "chave de idempotência"
+        verbose_name_plural = "chaves de idempotência"
+        db_table = "idempotency_key"
+        constraints = [
+            models.UniqueConstraint(fields=["account", "key"], name="unique_idempotency_key_per_account"),
+        ]
+
+    def __str__(self):
+        return self.key
+
+    @staticmethod
+    def expired_before() -> datetime:
+        return timezone.now() - timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+
+    @classmethod
+    def claim(cls, account: Account, key: str, fingerprint: str) -> tuple["IdempotencyKey", bool]:
+        """Reserve `key` for a new request, inside the caller's transaction.
+
+        A concurrent request holding the same key blocks on the unique index until
+        it commits or rolls back.
+
+        Returns:
+            tuple: The key row and whether it was reserved (False: replay it).
+        """
+        try:
+            with transaction.atomic():
+                return cls.objects.create(account=account, key=key, fingerprint=fingerprint), True
+        except IntegrityError:
+            pass
+
+        existing = cls.objects.select_for_update().get(account=account, key=key)
+        if existing.created_at >= cls.expired_before():
+            return existing, False
+
+        # Expired but not purged yet: start over as a new request
+        existing.fingerprint, existing.created_at = fingerprint, timezone.now()
+        existing.order, existing.status_code, existing.response = None, None, None
+        existing.save()
+        return existing, True
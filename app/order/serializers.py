@@ -1,14 +1,18 @@
+from collections import defaultdict
 from decimal import ROUND_HALF_UP, Decimal
 
+from django.conf import settings
 from django.db import transaction
-from django.shortcuts import get_list_or_404, get_object_or_404
+from django.http import Http404
+from django.shortcuts import get_object_or_404
 from rest_framework import serializers
 
-from app.account.models import Account, Address
+from app.account.models import Account
 from app.common.models import BaseSerializer
-from app.order.models import Order, OrderItem
+from app.order.events import EVENT_ORDER_CREATED, order_event, publish_on_commit
+from app.order.models import ArchivedOrder, DailySales, Order, OrderItem
 from app.product.models import Product
-from app.store.models import Store
+from app.store.models import Store, StoreSchedule
 
 
 def calculate_effective_price(product: Product) -> Decimal:
@@ -18,6 +22,80 @@ def calculate_effective_price(product: Product) -> Decimal:
     return effective.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
 
 
+def merge_items(items: list[dict]) -> dict:
+    """Sum quantities of repeated products, keyed by product UUID."""
+    merged_items = {}
+    for item in items:
+        merged_items[item["product_uuid"]] = merged_items.get(item["product_uuid"], 0) + item["quantity"]
+    return merged_items
+
+
+def build_order(validated_data: dict, store: Store, account_id: int, products: dict) -> tuple[Order, list[OrderItem]]:
+    """Build an unsaved order and its items with final totals, validating before any write.
+
+    Input shape (items, address fields) is checked by `OrderCreateSerializer`;
+    this checks what needs the database: schedule, products and minimum value.
+
+    Args:
+        validated_data (dict): Data validated by `OrderCreateSerializer`.
+        store (Store): Store of the order.
+        account_id (int): ID of the customer account.
+        products (dict): Active products of the store, keyed by UUID.
+
+    Returns:
+        tuple[Order, list[OrderItem]]: Order and items ready to be inserted.
+    """
+    schedule = StoreSchedule.cached(store.id)
+    # Stores that never set opening hours take orders at any time
+    if schedule.intervals and not schedule.is_open():
+        next_opening = schedule.next_opening()
+        opens = f" It opens at {next_opening:%Y-%m-%d %H:%M}." if next_opening else ""
+        raise serializers.ValidationError(f"Store is closed.{opens}")
+
+    merged_items = merge_items(validated_data["items"])
+    if missing_products := [str(uuid) for uuid in merged_items if uuid not in products]:
+        raise serializers.ValidationError(f"Products not found or inactive: {', '.join(missing_products)}")
+
+    order_items = [
+        OrderItem(
+            product_uuid=uuid,
+            product_name=products[uuid].name,
+            unit_price=calculate_effective_price(products[uuid]),
+            quantity=quantity,
+        )
+        for uuid, quantity in merged_items.items()
+    ]
+    subtotal = sum((item.unit_price * item.quantity for item in order_items), Decimal("0.00"))
+    delivery_fee = Decimal(store.delivery_fee or 0)
+
+    min_order_value = Decimal(store.min_order_value or 0)
+    if subtotal < min_order_value:
+        raise serializers.ValidationError(
+            f"Order subtotal {subtotal} is below the minimum order value of {min_order_value}."
+        )
+
+    order = Order(
+        store=store,
+        account_id=account_id,
+        status=Order.STATUS_PENDING,
+        notes=validated_data.get("notes"),
+        delivery_fee=delivery_fee,
+        subtotal=subtotal,
+        total=subtotal + delivery_fee,
+        zip_code=validated_data.get("zip_code"),
+        street=validated_data.get("street"),
+        number=validated_data.get("number"),
+        neighborhood=validated_data.get("neighborhood"),
+        complement=validated_data.get("complement"),
+        reference=validated_data.get("reference"),
+        city=validated_data.get("city"),
+        state=validated_data.get("state"),
+        latitude=validated_data.get("latitude"),
+        longitude=validated_data.get("longitude"),
+    )
+    return order, order_items
+
+
 class OrderItemInputSerializer(serializers.Serializer):
 
     product_uuid = serializers.UUIDField()
@@ -27,7 +105,7 @@ class OrderItemInputSerializer(serializers.Serializer):
 class OrderCreateSerializer(serializers.Serializer):
 
     # Nested serializers
-    items = OrderItemInputSerializer(many=True)
+    items = OrderItemInputSerializer(many=True, allow_empty=False)
 
     # Fields
     store_uuid = serializers.UUIDField()
@@ -72,75 +150,113 @@ class OrderCreateSerializer(serializers.Serializer):
 
     @transaction.atomic
     def create(self, validated_data):
-        account = get_object_or_404(Account, uuid=validated_data["account_uuid"])
-        store = get_object_or_404(Store, uuid=validated_data["store_uuid"])
-
-        items = validated_data.pop("items", [])
-        if not items:
-            raise serializers.ValidationError("Must contain at least one item.")
-
-        merged_items = {}
-        for item in items:
-            merged_items[item["product_uuid"]] = merged_items.get(item["product_uuid"], 0) + item["quantity"]
-
-        product_uuids = list(merged_items.keys())
-        products = get_list_or_404(
-            Product,
-            uuid__in=product_uuids,
-            store=store,
-            is_active=True,
+        """Place the order with a fixed number of queries, whatever the number of items.
+
+        Products and their store are loaded together, totals are computed in Python
+        and every check runs before the single Order insert and OrderItem bulk insert.
+        """
+        account = get_object_or_404(Account.objects.only("id"), uuid=validated_data["account_uuid"])
+
+        merged_items = merge_items(validated_data["items"])
+        products = list(
+            Product.objects.select_related("store").filter(
+                uuid__in=merged_items.keys(),
+                store__uuid=validated_data["store_uuid"],
+                is_active=True,
+            )
         )
+        if not products:
+            # Only on the error path: tell a missing store from missing products
+            get_object_or_404(Store, uuid=validated_data["store_uuid"])
+            raise Http404("No Product matches the given query.")
 
-        found_products = {p.uuid: p for p in products}
-        if missing_products := [str(uuid) for uuid in product_uuids if uuid not in found_products]:
-            raise serializers.ValidationError(f"Products not found or inactive: {', '.join(missing_products)}")
-
-        if not validated_data.get("zip_code") or not validated_data.get("street") or not validated_data.get("number"):
-            raise serializers.ValidationError("Delivery address fields are required.")
-
-        # Create order
-        order = Order.objects.create(
-            store=store,
-            account=account,
-            status=Order.STATUS_PENDING,
-            notes=validated_data.get("notes"),
-            delivery_fee=store.delivery_fee,
-            zip_code=validated_data.get("zip_code"),
-            street=validated_data.get("street"),
-            number=validated_data.get("number"),
-            neighborhood=validated_data.get("neighborhood"),
-            complement=validated_data.get("complement"),
-            reference=validated_data.get("reference"),
-            city=validated_data.get("city"),
-            state=validated_data.get("state"),
-            latitude=validated_data.get("latitude"),
-            longitude=validated_data.get("longitude"),
+        order, order_items = build_order(
+            validated_data,
+            store=products[0].store,
+            account_id=account.id,
+            products={p.uuid: p for p in products},
         )
 
-        # Create order items
-        OrderItem.objects.bulk_create(
-            [
-                OrderItem(
-                    order=order,
-                    product_uuid=product.uuid,
-                    product_name=product.name,
-                    unit_price=calculate_effective_price(product),
-                    quantity=merged_items[product.uuid],
-                )
-                for product in products
-            ]
+        # Create order with its final totals, then its items
+        order.save(force_insert=True)
+        for item in order_items:
+            item.order = order
+        OrderItem.objects.bulk_create(order_items)
+        return order
+
+
+class OrderBatchCreateSerializer(serializers.Serializer):
+    """Validate and insert many orders at once, reporting errors per order.
+
+    Stores, accounts and products referenced by the whole batch are loaded with one
+    query each and all valid orders and items are inserted with two bulk inserts.
+    """
+
+    orders = serializers.ListField(
+        child=serializers.DictField(),
+        allow_empty=False,
+        max_length=settings.ORDER_BATCH_MAX_SIZE,
+    )
+
+    @transaction.atomic
+    def create(self, validated_data):
+        errors = {}
+        valid = {}
+        for index, data in enumerate(validated_data["orders"]):
+            serializer = OrderCreateSerializer(data=data)
+            if serializer.is_valid():
+                valid[index] = serializer.validated_data
+            else:
+                errors[index] = serializer.errors
+
+        # One query per referenced model for the whole batch
+        stores = Store.objects.in_bulk({data["store_uuid"] for data in valid.values()}, field_name="uuid")
+        account_ids = dict(
+            Account.objects.filter(uuid__in={data["account_uuid"] for data in valid.values()}).values_list("uuid", "id")
         )
-        # Recalculate totals
-        order.recalculate_totals()
+        products_by_store_id = defaultdict(dict)
+        for product in Product.objects.filter(
+            uuid__in={item["product_uuid"] for data in valid.values() for item in data["items"]},
+            store__in=stores.values(),
+            is_active=True,
+        ):
+            products_by_store_id[product.store_id][product.uuid] = product
 
-        min_order_value = Decimal(store.min_order_value or 0)
-        if order.subtotal < min_order_value:
-            raise serializers.ValidationError(
-                f"Order subtotal {order.subtotal} is below the minimum order value of {min_order_value}."
-            )
+        built = []
+        for index, data in valid.items():
+            store = stores.get(data["store_uuid"])
+            if store is None:
+                errors[index] = {"store_uuid": ["Store not found."]}
+                continue
+            if data["account_uuid"] not in account_ids:
+                errors[index] = {"account_uuid": ["Account not found."]}
+                continue
+            try:
+                order, order_items = build_order(
+                    data,
+                    store=store,
+                    account_id=account_ids[data["account_uuid"]],
+                    products=products_by_store_id[store.id],
+                )
+            except serializers.ValidationError as e:
+                errors[index] = e.detail
+                continue
+            built.append((index, order, order_items))
 
-        order.save(update_fields=["subtotal", "total"])
-        return order
+        orders = Order.objects.bulk_create([order for _, order, _ in built])
+        order_items = []
+        for (_, _, items), order in zip(built, orders):
+            for item in items:
+                item.order = order
+            order_items.extend(items)
+        OrderItem.objects.bulk_create(order_items)
+        DailySales.apply((order.sales_snapshot(), 1) for order in orders)
+        publish_on_commit((order.store_id, order_event(EVENT_ORDER_CREATED, order)) for order in orders)
+
+        return {
+            "created": [{"index": index, "uuid": order.uuid} for index, order, _ in built],
+            "errors": [{"index": index, "errors": errors[index]} for index in sorted(errors)],
+        }
 
 
 class OrderItemSerializer(BaseSerializer):
@@ -164,3 +280,26 @@ class OrderSerializer(BaseSerializer):
     class Meta:
         model = Order
         exclude = BaseSerializer.Meta.exclude
+
+    def to_representation(self, instance):
+        if isinstance(instance, ArchivedOrder):
+            # Rendered by this serializer when the order was archived
+            return instance.data
+        return super().to_representation(instance)
+
+
+class DailySalesSerializer(serializers.ModelSerializer):
+
+    average_ticket = serializers.DecimalField(max_digits=14, decimal_places=2, read_only=True)
+
+    class Meta:
+        model = DailySales
+        fields = (
+            "day",
+            "status",
+            "orders_count",
+            "subtotal",
+            "delivery_fee",
+            "total",
+            "average_ticket",
+        )
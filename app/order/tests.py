@@ -1,3 +1,656 @@
-from django.test import TestCase
+import csv
+import tempfile
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from importlib import import_module
+from io import StringIO
+from pathlib import Path
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError, IntegrityError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import serializers
+
+from app.account.models import Account
+from app.common.testing import postgres_sql
+from app.common.utils import SESSION_ACTIVE_STORE_ID
+from app.factories.account import AccountFactory
+from app.factories.opening_hours import OpeningHoursFactory
+from app.factories.order import OrderFactory
+from app.factories.order_item import OrderItemFactory
+from app.factories.product import ProductFactory
+from app.factories.section import SectionFactory
+from app.factories.store import StoreFactory
+from app.factories.user import UserFactory
+from app.order.events import EVENT_ORDER_CREATED, publish
+from app.order.exports import EXPORT_HEADER, ITEM_COLUMNS, pa, pq
+from app.order.filters import LatenessFilter
+from app.order.models import (
+    ArchivedOrder,
+    DailySales,
+    IdempotencyKey,
+    Order,
+    OrderItem,
+    OrderStatusTransition,
+    ProductSales,
+)
+from app.order.serializers import OrderBatchCreateSerializer, OrderCreateSerializer
+from app.product.models import Menu
+from app.store.models import SCHEDULE_TIME_ZONE, OpeningHours
+
+
+class OrderCreateTestCase(TestCase):
+    """An open store with 10 products and a client account."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.account = AccountFactory(type=Account.TYPE_CLIENT)
+        cls.store = StoreFactory(min_order_value=Decimal("0.00"), delivery_fee=Decimal("5.00"))
+        section = SectionFactory(store=cls.store)
+        cls.products = ProductFactory.create_batch(
+            10,
+            store=cls.store,
+            section=section,
+            price=Decimal("10.00"),
+            discount_percentage=Decimal("0.00"),
+        )
+        with cls.captureOnCommitCallbacks(execute=True):
+            for weekday in range(1, 8):
+                OpeningHoursFactory(store=cls.store, weekday=weekday, from_hour=time(8, 0), to_hour=time(22, 0))
+
+    def setUp(self):
+        # Monday noon, while the store is open
+        now = datetime(2026, 10, 19, 12, tzinfo=SCHEDULE_TIME_ZONE)
+        patcher = mock.patch("django.utils.timezone.now", return_value=now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def payload(self, products, quantity=2):
+        return {
+            "store_uuid": str(self.store.uuid),
+            "account_uuid": str(self.account.uuid),
+            "items": [{"product_uuid": str(p.uuid), "quantity": quantity} for p in products],
+            "zip_code": "01310100",
+            "street": "Avenida Paulista",
+            "number": "1000",
+            "neighborhood": "Bela Vista",
+            "city": "São Paulo",
+            "state": "SP",
+        }
+
+
+
+class OrderCreateSerializerTests(OrderCreateTestCase):
+
+    def create_order(self, products):
+        serializer = OrderCreateSerializer(data=self.payload(products))
+        serializer.is_valid(raise_exception=True)
+        with CaptureQueriesContext(connection) as ctx:
+            order = serializer.save()
+        return order, len(ctx.captured_queries)
+
+    def test_query_count_does_not_depend_on_items(self):
+        _, single_item_queries = self.create_order(self.products[:1])
+        _, many_items_queries = self.create_order(self.products)
+        self.assertEqual(single_item_queries, many_items_queries)
+
+    def test_totals_are_saved_on_insert(self):
+        order, _ = self.create_order(self.products[:3])
+        order.refresh_from_db()
+        self.assertEqual(order.subtotal, Decimal("60.00"))
+        self.assertEqual(order.total, Decimal("65.00"))
+        self.assertEqual(order.items.count(), 3)
+
+    def test_items_and_address_are_required(self):
+        payload = {**self.payload(self.products[:1]), "items": [], "street": ""}
+        serializer = OrderCreateSerializer(data=payload)
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(set(serializer.errors), {"items", "street"})
+
+    def test_minimum_order_value_is_checked_before_any_write(self):
+        self.store.min_order_value = Decimal("100.00")
+        self.store.save()
+        serializer = OrderCreateSerializer(data=self.payload(self.products[:1]))
+        serializer.is_valid(raise_exception=True)
+        with CaptureQueriesContext(connection) as ctx, self.assertRaises(serializers.ValidationError):
+            serializer.save()
+        self.assertFalse(any(q["sql"].startswith("INSERT") for q in ctx.captured_queries))
+        self.assertFalse(Order.objects.exists())
+
+    def test_closed_store_is_rejected_from_the_cached_schedule(self):
+        order, _ = self.create_order(self.products[:1])  # loads the per-process schedule
+        serializer = OrderCreateSerializer(data=self.payload(self.products[:1]))
+        serializer.is_valid(raise_exception=True)
+        closed = datetime(2026, 10, 19, 23, tzinfo=SCHEDULE_TIME_ZONE)
+        with (
+            mock.patch("django.utils.timezone.now", return_value=closed),
+            CaptureQueriesContext(connection) as ctx,
+            self.assertRaisesMessage(serializers.ValidationError, "Store is closed. It opens at 2026-10-20 08:00."),
+        ):
+            serializer.save()
+        self.assertFalse(any("store_schedule" in q["sql"] for q in ctx.captured_queries))
+        self.assertQuerySetEqual(Order.objects.all(), [order])
+
+    def test_store_without_opening_hours_takes_orders_at_any_time(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for hours in OpeningHours.objects.filter(store=self.store):
+                hours.delete()
+        serializer = OrderCreateSerializer(data=self.payload(self.products[:1]))
+        serializer.is_valid(raise_exception=True)
+        late = datetime(2026, 10, 19, 23, tzinfo=SCHEDULE_TIME_ZONE)
+        with mock.patch("django.utils.timezone.now", return_value=late):
+            order = serializer.save()
+        self.assertQuerySetEqual(Order.objects.all(), [order])
+
+
+class IdempotencyKeyTests(OrderCreateTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.account.user)
+
+    def post(self, payload, key="order-1"):
+        return self.client.post("/api/orders/", payload, content_type="application/json", HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_repeated_key_replays_the_first_response(self):
+        payload = self.payload(self.products[:2])
+        first = self.post(payload)
+        self.assertEqual(first.status_code, 201)
+
+        # The key row already exists, so this goes through the unique violation path
+        replayed = self.post(payload)
+        self.assertEqual(replayed.status_code, 201)
+        self.assertEqual(replayed["Idempotent-Replayed"], "true")
+        self.assertEqual(replayed.json(), first.json())
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_same_key_with_another_body_is_rejected(self):
+        self.post(self.payload(self.products[:2]))
+        response = self.post(self.payload(self.products[:3]))
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_key_held_by_a_concurrent_request_is_replayed(self):
+        payload = self.payload(self.products[:1])
+        first = self.post(payload)
+        key = IdempotencyKey.objects.get()
+
+        # The competing insert fails on the unique index once the first request has committed
+        with mock.patch.object(IdempotencyKey.objects, "create", side_effect=IntegrityError):
+            response = self.post(payload)
+        self.assertEqual(response.json(), first.json())
+        self.assertEqual(IdempotencyKey.objects.get(), key)
+
+    def test_expired_keys_are_reused_and_purged(self):
+        payload = self.payload(self.products[:1])
+        self.post(payload)
+        IdempotencyKey.objects.update(created_at=timezone.now() - timedelta(days=2))
+
+        self.assertEqual(self.post(self.payload(self.products[:2])).status_code, 201)
+        self.assertEqual(Order.objects.count(), 2)
+
+        IdempotencyKey.objects.update(created_at=timezone.now() - timedelta(days=2))
+        call_command("purge_idempotency_keys", stdout=StringIO())
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+
+class OrderBatchTests(OrderCreateTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.account.user)
+
+    def post(self, orders):
+        return self.client.post("/api/orders/batch/", {"orders": orders}, content_type="application/json")
+
+    def test_errors_are_reported_per_order(self):
+        invalid = {**self.payload(self.products[:1]), "store_uuid": str(self.account.uuid)}
+        response = self.post([self.payload(self.products[:2]), invalid])
+        self.assertEqual(response.status_code, 207)
+        data = response.json()
+        self.assertEqual([created["index"] for created in data["created"]], [0])
+        self.assertEqual(data["errors"], [{"index": 1, "errors": {"store_uuid": ["Store not found."]}}])
+        self.assertEqual(Order.objects.get().items.count(), 2)
+
+        response = self.post([invalid])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_batch_size_is_limited(self):
+        response = self.post([self.payload(self.products[:1])] * (settings.ORDER_BATCH_MAX_SIZE + 1))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("orders", response.json())
+        self.assertFalse(Order.objects.exists())
+
+    def test_a_failed_insert_writes_nothing(self):
+        serializer = OrderBatchCreateSerializer(data={"orders": [self.payload(self.products[:2])] * 3})
+        serializer.is_valid(raise_exception=True)
+        with (
+            mock.patch.object(OrderItem.objects, "bulk_create", side_effect=DatabaseError),
+            self.assertRaises(DatabaseError),
+        ):
+            serializer.save()
+        self.assertFalse(Order.objects.exists())
+        self.assertFalse(DailySales.objects.exists())
+
+
+class OrderTransitionTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.store = StoreFactory()
+
+    def create_orders(self, count, status):
+        return [OrderFactory(store=self.store, status=status) for _ in range(count)]
+
+    def transition(self, status):
+        with CaptureQueriesContext(connection) as ctx:
+            result = Order.transition(Order.objects.all(), status)
+        return result, len(ctx.captured_queries)
+
+    def test_only_allowed_sources_are_moved(self):
+        pending = self.create_orders(2, Order.STATUS_PENDING)
+        completed = self.create_orders(1, Order.STATUS_COMPLETED)
+        result, _ = self.transition(Order.STATUS_PROCESSING)
+        self.assertEqual((result.moved, result.skipped), (2, 1))
+        self.assertEqual(Order.objects.filter(status=Order.STATUS_PROCESSING).count(), 2)
+        self.assertEqual(Order.objects.get(pk=completed[0].pk).status, Order.STATUS_COMPLETED)
+        self.assertEqual(
+            set(OrderStatusTransition.objects.values_list("order_id", "from_status", "to_status")),
+            {(order.pk, Order.STATUS_PENDING, Order.STATUS_PROCESSING) for order in pending},
+        )
+
+    def test_status_timestamp_is_kept_on_both_paths(self):
+        accepted_at = timezone.now() - timedelta(hours=1)
+        first, second = self.create_orders(2, Order.STATUS_PENDING)
+        fresh = self.create_orders(1, Order.STATUS_PENDING)[0]
+        Order.objects.filter(pk__in=[first.pk, second.pk]).update(accepted_at=accepted_at)
+
+        Order.transition(Order.objects.filter(pk__in=[first.pk, fresh.pk]), Order.STATUS_PROCESSING)
+        second.refresh_from_db()
+        second.status = Order.STATUS_PROCESSING
+        second.save()
+
+        timestamps = dict(Order.objects.values_list("pk", "accepted_at"))
+        self.assertEqual(timestamps[first.pk], accepted_at)
+        self.assertEqual(timestamps[second.pk], accepted_at)
+        self.assertGreater(timestamps[fresh.pk], accepted_at)
+
+    def test_query_count_does_not_depend_on_batch_size(self):
+        self.create_orders(1, Order.STATUS_PENDING)
+        _, single_order_queries = self.transition(Order.STATUS_CANCELED)
+        self.create_orders(10, Order.STATUS_PENDING)
+        _, many_orders_queries = self.transition(Order.STATUS_CANCELED)
+        self.assertEqual(single_order_queries, many_orders_queries)
+
+    def test_timeline_timestamp_is_set(self):
+        self.create_orders(2, Order.STATUS_PENDING)
+        self.transition(Order.STATUS_PROCESSING)
+        self.assertFalse(Order.objects.filter(accepted_at__isnull=True).exists())
+        self.assertFalse(Order.objects.filter(dispatched_at__isnull=False).exists())
+
+    def test_save_enforces_transitions(self):
+        order = self.create_orders(1, Order.STATUS_PENDING)[0]
+        order.status = Order.STATUS_COMPLETED
+        with self.assertRaisesMessage(ValidationError, "Transição de status não permitida: Pendente → Concluído."):
+            order.clean()
+        with self.assertRaises(ValidationError):
+            order.save()
+        self.assertFalse(OrderStatusTransition.objects.exists())
+
+        order.status = Order.STATUS_PROCESSING
+        order.save()
+        self.assertEqual(order.status_transitions.get().to_status, Order.STATUS_PROCESSING)
+
+    def test_timeline_backfill_prefers_the_transition_history(self):
+        migration = import_module("app.order.migrations.0005_order_timeline")
+        with_history, without_history = self.create_orders(2, Order.STATUS_PENDING)
+        Order.transition(Order.objects.filter(pk=with_history.pk), Order.STATUS_CANCELED)
+        Order.objects.filter(pk=without_history.pk).update(status=Order.STATUS_CANCELED)
+        canceled_at = timezone.now() - timedelta(days=3)
+        OrderStatusTransition.objects.update(created_at=canceled_at)
+        Order.objects.update(canceled_at=None, updated_at=timezone.now())
+
+        migration.backfill_timeline(apps, None)
+        with_history.refresh_from_db()
+        without_history.refresh_from_db()
+        self.assertEqual(with_history.canceled_at, canceled_at)
+        self.assertEqual(without_history.canceled_at, without_history.updated_at)
+
+
+class OrderTimingTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.store = StoreFactory(delivery_time=60)
+        now = timezone.now()
+        cls.orders = {}
+        # Minutes since creation -> expected lateness at 60% and 80% of 60 minutes
+        expected = ((30, Order.LATENESS_ON_TIME), (40, Order.LATENESS_WARNING), (55, Order.LATENESS_LATE))
+        for minutes, lateness in expected:
+            order = OrderFactory(store=cls.store, status=Order.STATUS_PENDING)
+            Order.objects.filter(pk=order.pk).update(created_at=now - timedelta(minutes=minutes))
+            cls.orders[lateness] = order
+        # Finished after 20 minutes, two hours ago: the clock stopped on time
+        finished = OrderFactory(store=cls.store, status=Order.STATUS_PENDING)
+        Order.objects.filter(pk=finished.pk).update(
+            status=Order.STATUS_CANCELED,
+            created_at=now - timedelta(hours=2),
+            canceled_at=now - timedelta(hours=2) + timedelta(minutes=20),
+        )
+        cls.finished = finished
+
+    def test_elapsed_minutes_and_lateness(self):
+        orders = {order.pk: order for order in Order.with_timing(Order.objects.all())}
+        for lateness, order in self.orders.items():
+            self.assertEqual(orders[order.pk].lateness, lateness)
+            self.assertEqual(orders[order.pk].expected_delivery_at, orders[order.pk].created_at + timedelta(hours=1))
+        finished = orders[self.finished.pk]
+        self.assertEqual((finished.lateness, finished.current_duration()), (Order.LATENESS_ON_TIME, "00:20"))
+        self.assertEqual(finished.current_duration(), Order.objects.get(pk=self.finished.pk).current_duration())
+
+    def test_lateness_filter(self):
+        queryset = Order.with_timing(Order.objects.all())
+        lateness = LatenessFilter(None, {"lateness": [Order.LATENESS_LATE]}, Order, None)
+        self.assertQuerySetEqual(lateness.queryset(None, queryset), [self.orders[Order.LATENESS_LATE]])
+
+        # Same expressions on Postgres: minutes become intervals instead of microseconds
+        sql, params = postgres_sql(lateness.queryset(None, queryset))
+        self.assertIn('("store"."delivery_time") * INTERVAL \'1 minute\'', sql)
+        self.assertIn('("store"."delivery_time" * %s)) * INTERVAL \'1 minute\'', sql)
+        self.assertIn(Order.LATENESS_LATE_RATIO, params)
+
+
+class DailySalesTests(TestCase):
+
+    def rollup(self):
+        return set(
+            DailySales.objects.exclude(orders_count=0).values_list(
+                "store_id", "day", "status", "orders_count", "subtotal", "delivery_fee", "total"
+            )
+        )
+
+    def test_incremental_rollup_matches_rebuild(self):
+        store = StoreFactory()
+        orders = [OrderFactory(store=store, status=Order.STATUS_PENDING) for _ in range(3)]
+        OrderFactory(status=Order.STATUS_PENDING)
+        Order.transition(Order.objects.filter(pk__in=[orders[0].pk, orders[1].pk]), Order.STATUS_PROCESSING)
+        order = Order.objects.get(pk=orders[2].pk)
+        order.status = Order.STATUS_CANCELED
+        order.save()
+        Order.objects.get(pk=orders[0].pk).delete()
+
+        incremental = self.rollup()
+        with CaptureQueriesContext(connection) as ctx:
+            call_command("rebuild_daily_sales", stdout=StringIO())
+        self.assertEqual(incremental, self.rollup())
+        # Rollup rows are deleted, then the orders are read, all in one (nested) transaction
+        statements = [query["sql"] for query in ctx.captured_queries]
+        self.assertTrue(statements[0].startswith("SAVEPOINT"))
+        self.assertTrue(statements[1].startswith('DELETE FROM "order_daily_sales"'))
+        self.assertIn('FROM "order"', statements[2])
+        self.assertTrue(statements[-1].startswith("RELEASE SAVEPOINT"))
+        self.assertEqual(
+            DailySales.objects.get(store=store, status=Order.STATUS_PROCESSING).orders_count,
+            1,
+        )
+
+
+class ProductSalesTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.store = StoreFactory()
+        section = SectionFactory(store=cls.store)
+        cls.pizza, cls.soda, cls.pudding = ProductFactory.create_batch(
+            3, store=cls.store, section=section, is_active=True
+        )
+        for product in (cls.pizza, cls.soda, cls.pudding):
+            product.refresh_from_db()  # uuid as loaded, not the factory string
+
+        order = OrderFactory(store=cls.store, status=Order.STATUS_PENDING)
+        cls.item(order, cls.soda, 3, "5.00")
+        cls.item(order, cls.pizza, 1, "40.00")
+        cls.item(OrderFactory(store=cls.store, status=Order.STATUS_COMPLETED), cls.pizza, 2, "40.00")
+        # Canceled orders and other stores do not count
+        cls.item(OrderFactory(store=cls.store, status=Order.STATUS_CANCELED), cls.pudding, 10, "8.00")
+        cls.other_order = OrderFactory(status=Order.STATUS_PENDING)
+        cls.item(cls.other_order, cls.pudding, 10, "8.00")
+
+    @staticmethod
+    def item(order, product, quantity, unit_price):
+        return OrderItemFactory(
+            order=order,
+            product_uuid=product.uuid,
+            product_name=product.name,
+            quantity=quantity,
+            unit_price=Decimal(unit_price),
+        )
+
+    def refresh(self):
+        call_command("refresh_product_sales", stdout=StringIO())
+
+    def test_refresh_aggregates_items_per_day(self):
+        self.refresh()
+        self.refresh()  # Recomputes the window instead of adding to it
+        self.assertEqual(
+            set(ProductSales.objects.values_list("store_id", "product_uuid", "quantity", "revenue")),
+            {
+                (self.store.id, self.pizza.uuid, 3, Decimal("120.00")),
+                (self.store.id, self.soda.uuid, 3, Decimal("15.00")),
+                (self.other_order.store_id, self.pudding.uuid, 10, Decimal("80.00")),
+            },
+        )
+
+    def test_top_products_and_menu_best_sellers(self):
+        self.refresh()
+        top = ProductSales.top(self.store.id)
+        # Ties on units are broken by revenue
+        self.assertEqual([row["product_uuid"] for row in top], [self.pizza.uuid, self.soda.uuid])
+        self.assertEqual(top[0]["revenue"], Decimal("120.00"))
+        self.assertEqual(ProductSales.top(self.store.id, limit=1), top[:1])
+
+        ProductSales.objects.update(day=timezone.localdate() - timedelta(days=settings.TOP_PRODUCTS_DAYS))
+        self.assertEqual(ProductSales.top(self.store.id), [])
+
+        self.refresh()
+        best_sellers = Menu.objects.get(store=self.store).content["best_sellers"]
+        self.assertEqual([product["uuid"] for product in best_sellers], [str(self.pizza.uuid), str(self.soda.uuid)])
+
+
+class ArchivedOrderTests(TestCase):
+
+    def test_archived_orders_are_still_listed_and_retrieved(self):
+        account = AccountFactory(type=Account.TYPE_CLIENT)
+        live = OrderFactory(account=account, status=Order.STATUS_PENDING)
+        completed = OrderFactory(account=account, status=Order.STATUS_COMPLETED)
+        self.client.force_login(account.user)
+        before = self.client.get(f"/api/orders/{completed.uuid}/").json()
+
+        self.assertEqual(ArchivedOrder.archive([live.pk, completed.pk]), 1)
+        self.assertFalse(Order.objects.filter(pk=completed.pk).exists())
+
+        listed = self.client.get("/api/orders/", {"pagination": "keyset"}).json()["results"]
+        self.assertEqual({order["uuid"] for order in listed}, {str(live.uuid), str(completed.uuid)})
+        self.assertEqual(self.client.get(f"/api/orders/{completed.uuid}/").json(), before)
+
+    def test_command_archives_orders_created_before_the_cutoff_month(self):
+        cutoff = timezone.localdate().replace(day=1)
+        cutoff_at = timezone.make_aware(datetime.combine(cutoff, time.min))
+        old = OrderFactory(status=Order.STATUS_COMPLETED)
+        recent = OrderFactory(status=Order.STATUS_COMPLETED)
+        Order.objects.filter(pk=old.pk).update(created_at=cutoff_at - timedelta(seconds=1))
+        Order.objects.filter(pk=recent.pk).update(created_at=cutoff_at)
+
+        with mock.patch("app.order.management.commands.archive_orders.timezone.localdate") as localdate:
+            localdate.return_value = (cutoff + timedelta(days=40)).replace(day=1)
+            call_command("archive_orders", months=1, stdout=StringIO())
+
+        self.assertEqual(list(ArchivedOrder.objects.values_list("id", flat=True)), [old.pk])
+        self.assertTrue(Order.objects.filter(pk=recent.pk).exists())
+
+
+class ExportOrdersTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.completed = OrderFactory(status=Order.STATUS_COMPLETED, complement=None)
+        OrderItemFactory.create_batch(2, order=cls.completed, unit_price=Decimal("12.50"))
+        cls.empty = OrderFactory(status=Order.STATUS_PENDING)
+
+    def setUp(self):
+        self.output = Path(tempfile.mkdtemp()) / "orders"
+
+    def export_csv(self, **options):
+        call_command("export_orders", output=str(self.output), stderr=StringIO(), **options)
+        with open(self.output, newline="", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            self.assertEqual(tuple(next(reader)), EXPORT_HEADER)
+            return sorted(reader)
+
+    def test_csv_has_one_row_per_item_and_keeps_archived_orders(self):
+        rows = self.export_csv()
+        uuids = [row[EXPORT_HEADER.index("order_uuid")] for row in rows]
+        self.assertEqual(sorted(uuids), sorted([str(self.completed.uuid)] * 2 + [str(self.empty.uuid)]))
+        empty_row = rows[uuids.index(str(self.empty.uuid))]
+        self.assertEqual(set(empty_row[-len(ITEM_COLUMNS) :]), {""})
+
+        ArchivedOrder.archive([self.completed.pk])
+        self.assertEqual(len(self.export_csv()), 1)
+        # Rebuilt from the archived JSON, the rows are the ones exported while the order was live
+        self.assertEqual(self.export_csv(include_archived=True), rows)
+
+    def test_date_bounds_are_local_days(self):
+        day = timezone.localdate()
+        end_of_day = timezone.make_aware(datetime.combine(day, time.max))
+        Order.objects.filter(pk=self.completed.pk).update(created_at=end_of_day)
+        Order.objects.filter(pk=self.empty.pk).update(created_at=end_of_day + timedelta(microseconds=1))
+
+        uuids = {row[EXPORT_HEADER.index("order_uuid")] for row in self.export_csv(since=day, until=day)}
+        self.assertEqual(uuids, {str(self.completed.uuid)})
+        uuids = {row[EXPORT_HEADER.index("order_uuid")] for row in self.export_csv(since=day + timedelta(days=1))}
+        self.assertEqual(uuids, {str(self.empty.uuid)})
+
+    def test_parquet_requires_pyarrow(self):
+        with mock.patch("app.order.exports.pa", None), self.assertRaisesMessage(CommandError, "pyarrow"):
+            call_command("export_orders", format="parquet", output=str(self.output), stderr=StringIO())
+
+    @skipUnless(pa, "PyArrow não instalado")
+    def test_parquet_schema_follows_the_header(self):
+        call_command("export_orders", format="parquet", output=str(self.output), stderr=StringIO())
+        table = pq.read_table(self.output)
+        self.assertEqual(tuple(table.schema.names), EXPORT_HEADER)
+        self.assertEqual(table.num_rows, 3)
+        self.assertEqual(str(table.schema.field("order_total").type), "decimal128(10, 2)")
+
+        ArchivedOrder.archive([self.completed.pk])
+        call_command(
+            "export_orders", format="parquet", output=str(self.output), include_archived=True, stderr=StringIO()
+        )
+        self.assertEqual(pq.read_table(self.output).sort_by("item_product_uuid"), table.sort_by("item_product_uuid"))
+
+
+class ConditionalGetTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.account = AccountFactory(type=Account.TYPE_CLIENT)
+        cls.order = OrderFactory(account=cls.account)
+        cls.item = OrderItemFactory(order=cls.order, unit_price=Decimal("10.00"))
+
+    def setUp(self):
+        self.client.force_login(self.account.user)
+        self.url = f"/api/orders/{self.order.uuid}/"
+
+    def test_nested_changes_refresh_the_etag(self):
+        etag = self.client.get(self.url)["ETag"]
+        # Validators of the loaded object match the aggregate ones
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.item.quantity += 1
+        self.item.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+        etag = response["ETag"]
+        self.item.delete()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_full_responses_do_not_add_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(self.url)
+        self.assertFalse(any("MAX(" in q["sql"] for q in ctx.captured_queries))
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/api/accounts/")
+        self.assertIn("ETag", response)
+        self.assertEqual(sum("COUNT(" in q["sql"] for q in ctx.captured_queries), 1)
+
+
+class PaginationModeTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.account = AccountFactory(type=Account.TYPE_CLIENT)
+        OrderFactory.create_batch(3, account=cls.account)
+
+    def setUp(self):
+        self.client.force_login(self.account.user)
+
+    def test_page_numbers_are_the_default(self):
+        data = self.client.get("/api/orders/", {"page": 1}).json()
+        self.assertEqual(data["count"], 3)
+        self.assertEqual(len(data["results"]), 3)
+
+    @mock.patch("app.common.pagination.KeysetPagination.page_size", 2)
+    def test_keyset_is_opt_in(self):
+        data = self.client.get("/api/orders/", {"pagination": "keyset"}).json()
+        self.assertNotIn("count", data)
+        self.assertEqual(len(data["results"]), 2)
+
+        data = self.client.get(data["next"]).json()
+        self.assertEqual(len(data["results"]), 1)
+        self.assertIsNone(data["next"])
+
+
+@override_settings(ORDER_EVENTS_STREAM_TIMEOUT=0.05, ORDER_EVENTS_POLL_INTERVAL=0.01)
+class OrderEventsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.store = StoreFactory()
+
+    def setUp(self):
+        cache.clear()
+
+    def test_wsgi_streams_with_a_blocking_iterator(self):
+        first = publish(self.store.id, {"type": EVENT_ORDER_CREATED, "order": "a"})
+        publish(self.store.id, {"type": EVENT_ORDER_CREATED, "order": "b"})
+
+        self.client.force_login(self.store.owner.user)
+        response = self.client.get(f"/admin/store/{self.store.id}/events/", HTTP_LAST_EVENT_ID=str(first - 1))
+        self.assertFalse(response.is_async)
+        body = b"".join(response.streaming_content).decode()
+        self.assertIn(f"id: {first}\n", body)
+        self.assertIn(f"id: {first + 1}\n", body)
+
+    def test_order_changelist_listens_to_the_active_store(self):
+        self.client.force_login(UserFactory(is_staff=True, is_superuser=True))
+        url = f"/admin/store/{self.store.id}/events/"
+        response = self.client.get("/admin/order/order/")
+        self.assertNotContains(response, "EventSource")
+
+        session = self.client.session
+        session[SESSION_ACTIVE_STORE_ID] = self.store.id
+        session.save()
+        response = self.client.get("/admin/order/order/")
+        self.assertContains(response, "new EventSource(")
+        self.assertContains(response, f'"{url}"')
@@ -1,9 +1,21 @@
+import hashlib
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.http import Http404
 from rest_framework import permissions, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 
 from app.common.models import BaseModelViewSet
-from app.order.models import Order, OrderItem
-from app.order.serializers import OrderCreateSerializer, OrderSerializer
+from app.common.pagination import KeysetOrPageNumberPagination
+from app.order.models import ArchivedOrder, IdempotencyKey, Order, OrderItem
+from app.order.serializers import OrderBatchCreateSerializer, OrderCreateSerializer, OrderSerializer
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
 
 
 class OrderViewSet(BaseModelViewSet):
@@ -14,6 +26,8 @@ class OrderViewSet(BaseModelViewSet):
         "store",
     ).prefetch_related("items")
     serializer_class = OrderSerializer
+    pagination_class = KeysetOrPageNumberPagination
+    conditional_related = ("items",)
 
     def get_queryset(self):
         """Return orders belonging to the authenticated user's account."""
@@ -21,21 +35,104 @@ class OrderViewSet(BaseModelViewSet):
             account=self.request.user.account,
         ).order_by("-created_at")
 
+    def get_archived_queryset(self):
+        """Return archived orders of the authenticated user's account."""
+        return ArchivedOrder.objects.filter(account=self.request.user.account).only(
+            "id", "created_at", "data"
+        )
+
+    def paginate_queryset(self, queryset):
+        """Page through live and archived orders as a single history in keyset mode.
+
+        Page number mode (the default) lists live orders only.
+        """
+        if self.paginator.is_keyset(self.request):
+            return self.paginator.paginate_querysets([queryset, self.get_archived_queryset()], self.request, self)
+        return super().paginate_queryset(queryset)
+
+    def retrieve(self, request, *args, **kwargs):
+        """Return the order, falling back to the archive for orders moved there."""
+        try:
+            return super().retrieve(request, *args, **kwargs)
+        except Http404:
+            archived = self.get_archived_queryset().filter(**self.get_lookup_kwargs()).first()
+            if archived is None:
+                raise
+            return Response(archived.data)
+
     def get_serializer_class(self):
         """Return appropriate serializer class based on action."""
         if self.action == "create":
             return OrderCreateSerializer
+        if self.action == "batch":
+            return OrderBatchCreateSerializer
         return self.serializer_class
 
     def create(self, request, *args, **kwargs):
-        """Handle order creation."""
+        """Handle order creation, replaying the stored response for a repeated `Idempotency-Key`."""
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return self.created_response(self.perform_order_create(request))
+        if len(key) > IdempotencyKey._meta.get_field("key").max_length:
+            raise ValidationError({IDEMPOTENCY_HEADER: "Chave de idempotência muito longa."})
+
+        account = request.user.account
+        fingerprint = hashlib.sha256(
+            json.dumps(request.data, sort_keys=True, separators=(",", ":"), cls=DjangoJSONEncoder).encode()
+        ).hexdigest()
+
+        with transaction.atomic():
+            idempotency_key, reserved = IdempotencyKey.claim(account, key, fingerprint)
+            if not reserved:
+                return self.replay(idempotency_key, fingerprint)
+
+            order = self.perform_order_create(request)
+            response = self.created_response(order)
+            idempotency_key.order = order
+            idempotency_key.status_code = response.status_code
+            # Store the rendered JSON so replays match the original body exactly
+            idempotency_key.response = json.loads(JSONRenderer().render(response.data))
+            idempotency_key.save(update_fields=["order", "status_code", "response"])
+            return response
+
+    def perform_order_create(self, request) -> Order:
         serializer = self.get_serializer(
             data=request.data,
             context={"request": request},
         )
         serializer.is_valid(raise_exception=True)
-        order = serializer.save()
+        return serializer.save()
+
+    def created_response(self, order: Order) -> Response:
         return Response(
             OrderSerializer(order).data,
             status=status.HTTP_201_CREATED,
         )
+
+    def replay(self, idempotency_key, fingerprint):
+        """Return the stored response of a previous request sent with the same key."""
+        if idempotency_key.fingerprint != fingerprint:
+            return Response(
+                {"detail": "Chave de idempotência já usada com outro conteúdo."},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            )
+        return Response(
+            idempotency_key.response,
+            status=idempotency_key.status_code,
+            headers={"Idempotent-Replayed": "true"},
+        )
+
+    @action(detail=False, methods=["post"])
+    def batch(self, request):
+        """Create many orders at once (partner channels), reporting errors per order."""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        result = serializer.save()
+
+        if not result["errors"]:
+            response_status = status.HTTP_201_CREATED
+        elif result["created"]:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        return Response(result, status=response_status)
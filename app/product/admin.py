@@ -3,6 +3,7 @@ from django.contrib import admin
 from app.common.admin import BaseAdmin
 from app.product.inlines import ProductInline, ProductSectionsInline
 from app.product.models import Product, Section
+from app.product.search import search_products
 from app.product.sections import ProductsSection, SectionsSection
 
 
@@ -161,5 +162,11 @@ class ProductAdmin(BaseAdmin):
     )
     readonly_fields = BaseAdmin.readonly_fields + ("position",)
 
+    def get_search_results(self, request, queryset, search_term):
+        # Indexed search over name and description instead of ILIKE on the name
+        if not search_term.strip():
+            return queryset, False
+        return search_products(queryset, search_term), False
+
     # Display functions
     # Actions
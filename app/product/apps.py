@@ -4,3 +4,18 @@ from django.apps import AppConfig
 class ProductConfig(AppConfig):
     name = "app.product"
     verbose_name = "Seções e Produtos"
+
+    def ready(self):
+        from django.db.models.signals import m2m_changed
+
+        from app.common.cache import register_invalidation
+        from app.product.models import Menu, Product, ProductSections, Section
+
+        register_invalidation(Section, Product, ProductSections)
+
+        def rebuild_menu(instance, action, **kwargs):
+            # Product.sections add/remove/set/clear skip ProductSections.save/delete
+            if action.startswith("post_"):
+                Menu.schedule_rebuild(instance.store_id)
+
+        m2m_changed.connect(rebuild_menu, sender=Product.sections.through, weak=False, dispatch_uid="menu:sections")
@@ -0,0 +1,69 @@
+# Generated by Django 6.0 on 2026-10-18 10:21
+
+import unicodedata
+
+from django.db import migrations, models
+
+# GIN indexes used by app.product.search (full text and trigram) and by the
+# admin `icontains` searches, which compile to UPPER(column::text) LIKE
+SEARCH_INDEXES_SQL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX product_search_fts_idx ON product "
+    "USING gin (to_tsvector('portuguese'::regconfig, search_document))",
+    "CREATE INDEX product_search_trgm_idx ON product USING gin (search_document gin_trgm_ops)",
+    "CREATE INDEX section_title_trgm_idx ON section USING gin (UPPER(title::text) gin_trgm_ops)",
+]
+DROP_SEARCH_INDEXES_SQL = [
+    "DROP INDEX IF EXISTS product_search_fts_idx",
+    "DROP INDEX IF EXISTS product_search_trgm_idx",
+    "DROP INDEX IF EXISTS section_title_trgm_idx",
+]
+
+
+def search_document(*parts):
+    # Frozen copy of app.product.search.search_document: lowercase, no accents, single spaces
+    decomposed = unicodedata.normalize('NFKD', ' '.join(part for part in parts if part))
+    return ' '.join(''.join(char for char in decomposed if not unicodedata.combining(char)).lower().split())
+
+
+def backfill_search_document(apps, schema_editor):
+    Product = apps.get_model('product', 'Product')
+    batch = []
+    for product in Product.objects.only('id', 'name', 'description').iterator(chunk_size=2000):
+        product.search_document = search_document(product.name, product.description)
+        batch.append(product)
+        if len(batch) >= 2000:
+            Product.objects.bulk_update(batch, ['search_document'])
+            batch = []
+    Product.objects.bulk_update(batch, ['search_document'])
+
+
+def create_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for sql in SEARCH_INDEXES_SQL:
+        schema_editor.execute(sql)
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for sql in DROP_SEARCH_INDEXES_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0002_menu'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False, help_text='Nome e descrição sem acentos e em minúsculas, indexado para a busca.', verbose_name='documento de busca'),
+        ),
+        migrations.RunPython(backfill_search_document, migrations.RunPython.noop),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -1,6 +1,12 @@
+from typing import Optional
+
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.db.models import Prefetch
 
 from app.common.models import BaseModel
+from app.common.transactions import OnCommitBatch
+from app.product.search import search_document
 from app.store.models import Store
 
 
@@ -63,6 +69,16 @@ class Section(BaseModel):
         db_table = "section"
         ordering = ["position"]
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        Menu.schedule_rebuild(self.store_id)
+
+    def delete(self, *args, **kwargs):
+        store_id = self.store_id
+        result = super().delete(*args, **kwargs)
+        Menu.schedule_rebuild(store_id)
+        return result
+
     def __str__(self):
         return self.title
 
@@ -127,6 +143,13 @@ class Product(BaseModel):
         upload_to="products/thumbnails/",
         help_text="Imagem quadrada de 85x85 pixels.",
     )
+    search_document = models.TextField(
+        verbose_name="documento de busca",
+        blank=True,
+        default="",
+        editable=False,
+        help_text="Nome e descrição sem acentos e em minúsculas, indexado para a busca.",
+    )
 
     class Meta:
         verbose_name = "produto"
@@ -134,6 +157,20 @@ class Product(BaseModel):
         db_table = "product"
         ordering = ["position"]
 
+    def save(self, *args, **kwargs):
+        self.search_document = search_document(self.name, self.description)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"name", "description"} & set(update_fields):
+            kwargs["update_fields"] = {*update_fields, "search_document"}
+        super().save(*args, **kwargs)
+        Menu.schedule_rebuild(self.store_id)
+
+    def delete(self, *args, **kwargs):
+        store_id = self.store_id
+        result = super().delete(*args, **kwargs)
+        Menu.schedule_rebuild(store_id)
+        return result
+
     def __str__(self):
         return self.name
 
@@ -166,5 +203,114 @@ class ProductSections(models.Model):
         db_table = "through_product_sections"
         ordering = ["position"]
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self.schedule_menu_rebuild()
+
+    def delete(self, *args, **kwargs):
+        self.schedule_menu_rebuild()
+        return super().delete(*args, **kwargs)
+
+    def schedule_menu_rebuild(self) -> None:
+        # Inlines have the product loaded; otherwise its store is resolved once at commit
+        if self._meta.get_field("product").is_cached(self):
+            Menu.schedule_rebuild(self.product.store_id)
+        else:
+            Menu.schedule_rebuild(product_id=self.product_id)
+
     def __str__(self):
         return f"{self.product.name} do {self.section.title}"
+
+
+def _rebuild_menus(keys: set) -> None:
+    """Rebuild each store menu of the committed transaction once, see `Menu.schedule_rebuild`."""
+    store_ids = {key for kind, key in keys if kind == "store"}
+    if product_ids := {key for kind, key in keys if kind == "product"}:
+        store_ids.update(Product.objects.filter(pk__in=product_ids).values_list("store_id", flat=True))
+    # Stores deleted since (or created in a rolled-back block) have no menu to rebuild
+    for store_id in sorted(Store.objects.filter(pk__in=store_ids).values_list("pk", flat=True)):
+        Menu.rebuild(store_id)
+
+
+_menu_rebuilds = OnCommitBatch(_rebuild_menus)
+
+
+class Menu(models.Model):
+    """Pre-rendered menu of a store, rebuilt whenever its sections or products change.
+
+    Model saves and deletes, and `Product.sections` add/remove/set/clear, schedule
+    the rebuild. `QuerySet.update()` and `bulk_create()` bypass it: call
+    `Menu.schedule_rebuild(store_id)` after them.
+    """
+
+    # Relations
+    store = models.OneToOneField(
+        Store,
+        verbose_name="loja",
+        related_name="menu",
+        on_delete=models.CASCADE,
+        primary_key=True,
+    )
+
+    # Fields
+    content = models.JSONField(verbose_name="conteúdo", default=dict, encoder=DjangoJSONEncoder)
+    updated_at = models.DateTimeField(verbose_name="atualizado em", auto_now=True)
+
+    class Meta:
+        verbose_name = "cardápio"
+        verbose_name_plural = "cardápios"
+        db_table = "menu"
+
+    def __str__(self):
+        return f"Cardápio de {self.store_id}"
+
+    @classmethod
+    def schedule_rebuild(cls, store_id: Optional[int] = None, product_id: Optional[int] = None) -> None:
+        """Rebuild the menu of the store (or of the product's store) once the current transaction commits.
+
+        Every store is rebuilt once per transaction, however many of its rows changed.
+        """
+        keys = []
+        if store_id is not None:
+            keys.append(("store", store_id))
+        if product_id is not None:
+            keys.append(("product", product_id))
+        _menu_rebuilds.add(*keys)
+
+    @classmethod
+    def rebuild(cls, store_id: int) -> "Menu":
+        """Render active sections and products of the store in position order and persist them."""
+        from app.order.models import ProductSales  # avoid circular import
+        from app.product.serializers import MenuSectionSerializer
+
+        sections = (
+            Section.objects.filter(store_id=store_id, is_active=True)
+            .order_by("position")
+            .prefetch_related(
+                Prefetch(
+                    "products",
+                    queryset=Product.objects.filter(is_active=True)
+                    .order_by("position")
+                    .prefetch_related(
+                        Prefetch(
+                            "product_sections",
+                            queryset=ProductSections.objects.filter(section__is_active=True)
+                            .select_related("section")
+                            .order_by("position"),
+                        )
+                    ),
+                    to_attr="prefetched_products",
+                )
+            )
+        )
+        content = {"sections": MenuSectionSerializer(sections, many=True).data}
+
+        # Highlight the best sellers that are still on the menu
+        products = {product["uuid"]: product for section in content["sections"] for product in section["products"]}
+        content["best_sellers"] = [
+            products[str(row["product_uuid"])]
+            for row in ProductSales.top(store_id)
+            if str(row["product_uuid"]) in products
+        ]
+        menu, _ = cls.objects.update_or_create(store_id=store_id, defaults={"content": content})
+        return menu
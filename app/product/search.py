@@ -0,0 +1,46 @@
+from django.db import connection
+from django.db.models import BooleanField, Case, FloatField, QuerySet, Value, When
+from django.db.models.expressions import RawSQL
+
+from app.common.search import normalize
+
+# Text search configuration of the Postgres indexes (see migration 0003_product_search)
+SEARCH_CONFIG = "portuguese"
+SEARCH_VECTOR = f"to_tsvector('{SEARCH_CONFIG}'::regconfig, \"product\".\"search_document\")"
+SEARCH_QUERY = f"websearch_to_tsquery('{SEARCH_CONFIG}'::regconfig, %s)"
+
+
+def search_document(*parts: str | None) -> str:
+    return normalize(" ".join(part for part in parts if part))
+
+
+def search_products(queryset: QuerySet, query: str) -> QuerySet:
+    """Filter products of `queryset` matching `query`, annotated with `rank` and best first.
+
+    On Postgres a product matches by full text (Portuguese stemming) or by
+    trigram word similarity, which tolerates typos and partial words; both use
+    GIN indexes. Other backends fall back to a substring match of every term.
+    """
+    query = normalize(query)
+    if connection.vendor == "postgresql":
+        matches = RawSQL(
+            f"({SEARCH_VECTOR} @@ {SEARCH_QUERY} OR %s <%% \"product\".\"search_document\")",
+            (query, query),
+            output_field=BooleanField(),
+        )
+        rank = RawSQL(
+            f"ts_rank({SEARCH_VECTOR}, {SEARCH_QUERY}) + word_similarity(%s, \"product\".\"search_document\")",
+            (query, query),
+            output_field=FloatField(),
+        )
+        return queryset.filter(matches).annotate(rank=rank).order_by("-rank", "position")
+
+    for term in query.split():
+        queryset = queryset.filter(search_document__contains=term)
+    rank = Case(
+        When(search_document__startswith=query, then=Value(1.0)),
+        When(search_document__contains=query, then=Value(0.5)),
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+    return queryset.annotate(rank=rank).order_by("-rank", "position")
@@ -1,3 +1,5 @@
+import uuid
+
 from rest_framework import serializers
 
 from app.common.models import BaseSerializer
@@ -13,6 +15,7 @@ class ProductInnerSerializer(BaseSerializer):
             "section",
             "sections",
             "store",
+            "search_document",
         )
         ordering = ["position"]
 
@@ -35,11 +38,36 @@ class SectionLiteSerializer(BaseSerializer):
         return ProductInnerSerializer(products, many=True, context=self.context).data
 
 
+# Menu serializers, rendered once per change into the store Menu
+class MenuProductSerializer(BaseSerializer):
+
+    # Nested representations
+    sections = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Product
+        exclude = BaseSerializer.Meta.exclude + (
+            "section",
+            "store",
+            "search_document",
+        )
+        ordering = ["position"]
+
+    def get_sections(self, obj):
+        return [str(product_section.section.uuid) for product_section in obj.product_sections.all()]
+
+
+class MenuSectionSerializer(SectionLiteSerializer):
+
+    def get_products(self, obj):
+        return MenuProductSerializer(obj.prefetched_products, many=True, context=self.context).data
+
+
 class ProductLiteSerializer(BaseSerializer):
 
     class Meta:
         model = Product
-        exclude = BaseSerializer.Meta.exclude + ("store",)
+        exclude = BaseSerializer.Meta.exclude + ("store", "search_document")
         ordering = ["position"]
 
 
@@ -52,7 +80,7 @@ class ProductSerializer(BaseSerializer):
 
     class Meta:
         model = Product
-        exclude = BaseSerializer.Meta.exclude + ("store",)
+        exclude = BaseSerializer.Meta.exclude + ("store", "search_document")
         ordering = ["position"]
 
 
@@ -70,3 +98,27 @@ class SectionSerializer(BaseSerializer):
         if products is None:
             products = obj.products.all()
         return ProductLiteSerializer(products, many=True, context=self.context).data
+
+
+# Search serializers
+class ProductSearchQuerySerializer(serializers.Serializer):
+
+    MAX_LIMIT = 50
+
+    store = serializers.CharField(help_text="ID ou UUID da loja.")
+    q = serializers.CharField(min_length=2, max_length=100)
+    limit = serializers.IntegerField(min_value=1, max_value=MAX_LIMIT, default=20)
+
+    def validate_store(self, value):
+        if value.isdigit():
+            return {"store_id": int(value)}
+        try:
+            return {"store__uuid": uuid.UUID(value)}
+        except ValueError:
+            raise serializers.ValidationError("Informe o ID ou o UUID da loja.")
+
+
+class ProductSearchSerializer(ProductInnerSerializer):
+
+    # Fields
+    rank = serializers.FloatField(read_only=True)
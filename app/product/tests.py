@@ -1,3 +1,158 @@
+from decimal import Decimal
+from importlib import import_module
+from unittest import mock
+
+from django.apps import apps
+from django.db import transaction
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from app.common.testing import postgres_sql
+from app.factories.product import ProductFactory
+from app.factories.section import SectionFactory
+from app.factories.store import StoreFactory
+from app.order.models import ProductSales
+from app.product.models import Menu, Product, ProductSections, Section
+from app.product.search import search_document, search_products
+
+
+class ProductSearchTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.store = StoreFactory()
+        section = SectionFactory(store=cls.store)
+        defaults = {"store": cls.store, "section": section, "is_active": True, "price": Decimal("10.00")}
+        cls.pao = ProductFactory(name="Pão de Queijo", description="Assado na hora", **defaults)
+        cls.queijo = ProductFactory(name="Queijo Coalho", description=None, **defaults)
+        ProductFactory(name="Pão Francês", description=None, **{**defaults, "is_active": False})
+        ProductFactory(name="Pão de Queijo", store=StoreFactory(), section=SectionFactory(), is_active=True)
+
+    def get(self, **params):
+        return APIClient().get("/api/products/search/", params)
+
+    def test_search_document_is_normalized(self):
+        self.assertEqual(self.pao.search_document, "pao de queijo assado na hora")
+
+    def test_search_is_accent_insensitive_and_scoped_to_the_store(self):
+        response = self.get(store=self.store.uuid, q="PAO")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row["uuid"] for row in response.data["results"]], [str(self.pao.uuid)])
+
+    def test_results_are_ranked(self):
+        response = self.get(store=self.store.id, q="queijo")
+        self.assertEqual([row["uuid"] for row in response.data["results"]], [str(self.queijo.uuid), str(self.pao.uuid)])
+
+    def test_invalid_store(self):
+        self.assertEqual(self.get(store="loja", q="queijo").status_code, 400)
+
+    def test_postgres_queries_match_the_index_expressions(self):
+        migration = import_module("app.product.migrations.0003_product_search")
+        fts_index, trgm_index, title_index = migration.SEARCH_INDEXES_SQL[1:]
+
+        with mock.patch("app.product.search.connection", vendor="postgresql"):
+            sql, params = postgres_sql(search_products(Product.objects.all(), "Pão  QUEIJO"))
+        self.assertIn("to_tsvector('portuguese'::regconfig, \"product\".\"search_document\")", sql)
+        self.assertIn("%s <%% \"product\".\"search_document\"", sql)  # %% is the escaped operator
+        self.assertIn("to_tsvector('portuguese'::regconfig, search_document)", fts_index)
+        self.assertIn("(search_document gin_trgm_ops)", trgm_index)
+        self.assertEqual(set(params), {"pao queijo"})
+
+        # Admin section search (icontains) uses the expression of the trigram index
+        sql, _ = postgres_sql(Section.objects.filter(title__icontains="pizza"))
+        self.assertIn('UPPER("section"."title"::text) LIKE UPPER(', sql)
+        self.assertIn("(UPPER(title::text) gin_trgm_ops)", title_index)
+
+    def test_migration_backfills_the_same_document(self):
+        migration = import_module("app.product.migrations.0003_product_search")
+        Product.objects.update(search_document="")
+        migration.backfill_search_document(apps, None)
+        self.pao.refresh_from_db()
+        self.assertEqual(self.pao.search_document, "pao de queijo assado na hora")
+        parts = (" Açaí ", None, "CAFÉ\tcom Leite")
+        self.assertEqual(migration.search_document(*parts), search_document(*parts))
+
+
+class MenuRebuildTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.store = StoreFactory()
+        cls.sections = SectionFactory.create_batch(3, store=cls.store)
+        cls.product = ProductFactory(store=cls.store, section=cls.sections[0])
+
+    def test_each_store_is_rebuilt_once_per_transaction(self):
+        with mock.patch.object(Menu, "rebuild") as rebuild, self.captureOnCommitCallbacks(execute=True):
+            self.product.save()
+            for position, section in enumerate(self.sections):
+                ProductSections.objects.create(product_id=self.product.id, section=section, position=position)
+        rebuild.assert_called_once_with(self.store.id)
+
+    def test_m2m_changes_rebuild_the_menu(self):
+        with mock.patch.object(Menu, "rebuild") as rebuild, self.captureOnCommitCallbacks(execute=True):
+            self.product.sections.set(self.sections[1:])
+        rebuild.assert_called_once_with(self.store.id)
+
+    def test_rolled_back_savepoint_keeps_the_outer_rebuilds(self):
+        with mock.patch.object(Menu, "rebuild") as rebuild, self.captureOnCommitCallbacks(execute=True):
+            self.product.save()
+            try:
+                with transaction.atomic():
+                    self.sections[1].save()
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        rebuild.assert_called_once_with(self.store.id)
+
+
+class MenuViewTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.store = StoreFactory()
+        section = SectionFactory(store=cls.store, is_active=True)
+        with cls.captureOnCommitCallbacks(execute=True):
+            cls.pizza, cls.soda = ProductFactory.create_batch(2, store=cls.store, section=section, is_active=True)
+        for product in (cls.pizza, cls.soda):
+            product.refresh_from_db()
+        for product, quantity in ((cls.pizza, 1), (cls.soda, 5)):
+            ProductSales.objects.create(
+                store=cls.store,
+                day=timezone.localdate(),
+                product_uuid=product.uuid,
+                product_name=product.name,
+                quantity=quantity,
+                revenue=Decimal("10.00") * quantity,
+            )
+        Menu.rebuild(cls.store.id)
+
+    def test_menu_by_id_or_uuid_with_best_sellers(self):
+        response = self.client.get(f"/api/menus/{self.store.id}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get(f"/api/menus/{self.store.uuid}/").json(), response.json())
+        content = response.json()
+        self.assertEqual(
+            [product["uuid"] for product in content["sections"][0]["products"]],
+            [str(self.pizza.uuid), str(self.soda.uuid)],
+        )
+        best_sellers = [product["uuid"] for product in content["best_sellers"]]
+        self.assertEqual(best_sellers, [str(self.soda.uuid), str(self.pizza.uuid)])
+
+    def test_conditional_get(self):
+        response = self.client.get(f"/api/menus/{self.store.id}/")
+        etag = response["ETag"]
+        self.assertEqual(self.client.get(f"/api/menus/{self.store.id}/", HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.soda.save()
+        changed = self.client.get(f"/api/menus/{self.store.id}/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed["ETag"], etag)
 
-# Create your tests here.
+    def test_menu_is_built_on_first_read_and_unknown_store_is_404(self):
+        store = StoreFactory()
+        Menu.objects.filter(store=store).delete()
+        self.assertEqual(self.client.get(f"/api/menus/{store.id}/").json(), {"sections": [], "best_sellers": []})
+        self.assertTrue(Menu.objects.filter(store=store).exists())
+        self.assertEqual(self.client.get("/api/menus/999999/").status_code, 404)
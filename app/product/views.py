@@ -1,16 +1,32 @@
 from django.db.models import Prefetch
+from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.generics import get_object_or_404
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
 
-from app.common.models import BaseModelViewSet
-from app.product.models import Product, Section
-from app.product.serializers import ProductSerializer, SectionSerializer
+from app.common.cache import CachedReadMixin
+from app.common.models import BaseModelViewSet, ConditionalGetMixin, LookupIdOrUuidMixin
+from app.product.models import Menu, Product, ProductSections, Section
+from app.product.search import search_products
+from app.product.serializers import (
+    ProductSearchQuerySerializer,
+    ProductSearchSerializer,
+    ProductSerializer,
+    SectionSerializer,
+)
+from app.store.models import Store
 
 
-class SectionViewSet(BaseModelViewSet):
+class SectionViewSet(CachedReadMixin, BaseModelViewSet):
     queryset = Section.objects.all()
     serializer_class = SectionSerializer
+    cache_models = (Section, Product, ProductSections)
+    # Nested products and their section links (no updated_at) cannot be validated cheaply
+    last_modified_field = None
 
 
-class ProductViewSet(BaseModelViewSet):
+class ProductViewSet(CachedReadMixin, BaseModelViewSet):
     queryset = (
         Product.objects.select_related(
             "store",
@@ -32,3 +48,47 @@ class ProductViewSet(BaseModelViewSet):
         .order_by("position")
     )
     serializer_class = ProductSerializer
+    cache_models = (Product, Section, ProductSections)
+    # Nested sections and their products cannot be validated cheaply
+    last_modified_field = None
+
+    @action(detail=False, methods=["get"], serializer_class=ProductSearchSerializer)
+    def search(self, request):
+        """List the active products of a `store` matching `q`, best ranked first (up to `limit`)."""
+        params = ProductSearchQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+
+        products = Product.objects.filter(is_active=True, **params.validated_data["store"])
+        results = search_products(products, params.validated_data["q"])[: params.validated_data["limit"]]
+        serializer = self.get_serializer(results, many=True)
+        return Response({"results": serializer.data})
+
+
+class MenuViewSet(ConditionalGetMixin, LookupIdOrUuidMixin, viewsets.GenericViewSet):
+    """Serve the pre-rendered menu of a store, looked up by the store ID or UUID."""
+
+    permission_classes = [AllowAny]
+    lookup_value_regex = BaseModelViewSet.lookup_value_regex
+    queryset = Store.objects.only("id")
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_value = self.kwargs[self.lookup_field]
+        if self._is_uuid(lookup_value):
+            store_id = get_object_or_404(self.get_queryset(), uuid=lookup_value).id
+        else:
+            store_id = int(lookup_value)
+
+        headers = {}
+        if self.is_conditional_request():
+            not_modified, headers = self.conditional_response(Menu.objects.filter(store_id=store_id))
+            if not_modified is not None:
+                return not_modified
+
+        menu = Menu.objects.filter(store_id=store_id).only("content", "updated_at").first()
+        if menu is None:
+            # Menu not built yet (e.g. store created before menus existed)
+            get_object_or_404(self.get_queryset(), pk=store_id)
+            menu = Menu.rebuild(store_id)
+        if not headers:
+            headers = self.validator_headers(*self.get_instance_validators(menu), detail=True)
+        return Response(menu.content, headers=headers)
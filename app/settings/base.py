@@ -1,4 +1,5 @@
 from pathlib import Path
+from urllib.parse import urlparse
 
 import dj_database_url
 from decouple import config
@@ -46,6 +47,7 @@ INSTALLED_APPS = [
     "django.contrib.staticfiles",
     "drf_yasg",  # Swagger for DRF
     # Local apps
+    "app.common",
     "app.account",
     "app.order",
     "app.product",
@@ -86,11 +88,16 @@ TEMPLATES = [
 WSGI_APPLICATION = "app.wsgi.application"
 
 LIST_PER_PAGE = 20
+ORDER_BATCH_MAX_SIZE = 500
+IDEMPOTENCY_KEY_TTL = config("IDEMPOTENCY_KEY_TTL", cast=int, default=60 * 60 * 24)  # Seconds a key is replayed
+ORDER_EXPORT_CHUNK_SIZE = config("ORDER_EXPORT_CHUNK_SIZE", cast=int, default=2000)
+TOP_PRODUCTS_DAYS = config("TOP_PRODUCTS_DAYS", cast=int, default=30)
+TOP_PRODUCTS_LIMIT = config("TOP_PRODUCTS_LIMIT", cast=int, default=10)
 
 # REST Framework Settings
 REST_FRAMEWORK = {
     "DEFAULT_FILTER_BACKENDS": ["django_filters.rest_framework.DjangoFilterBackend"],
-    "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
+    "DEFAULT_PAGINATION_CLASS": "app.common.pagination.PageNumberPagination",
     "DEFAULT_PERMISSION_CLASSES": ["rest_framework.permissions.DjangoModelPermissionsOrAnonReadOnly"],
     "EXCEPTION_HANDLER": "rest_framework.views.exception_handler",
     "PAGE_SIZE": LIST_PER_PAGE,
@@ -161,6 +168,27 @@ DATABASES = {
     ),
 }
 
+# Cache
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+# redis://host:6379/0 is shared by every worker; file:///path and locmem:// are for local use
+CACHE_URL = config("CACHE_URL", "locmem://")
+CACHE_TTL = config("CACHE_TTL", cast=int, default=60 * 10)
+CACHE_BACKENDS = {
+    "redis": "django.core.cache.backends.redis.RedisCache",
+    "rediss": "django.core.cache.backends.redis.RedisCache",
+    "file": "django.core.cache.backends.filebased.FileBasedCache",
+    "locmem": "django.core.cache.backends.locmem.LocMemCache",
+}
+_cache_url = urlparse(CACHE_URL)
+CACHES = {
+    "default": {
+        "BACKEND": CACHE_BACKENDS[_cache_url.scheme],
+        "LOCATION": _cache_url.path if _cache_url.scheme == "file" else CACHE_URL,
+        "KEY_PREFIX": "culina",
+        "TIMEOUT": CACHE_TTL,
+    },
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -199,7 +227,34 @@ STATIC_URL = "static/"
 MEDIA_URL = "media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Seconds a process serves its copy of a store schedule before reloading it
+STORE_SCHEDULE_LOCAL_TTL = config("STORE_SCHEDULE_LOCAL_TTL", cast=int, default=60)
+
+# Order events (Server-Sent Events), in seconds unless noted
+ORDER_EVENTS_TTL = 60 * 60
+ORDER_EVENTS_BACKLOG = 500  # Max events replayed to a reconnecting client
+ORDER_EVENTS_POLL_INTERVAL = 0.5
+ORDER_EVENTS_HEARTBEAT = 15
+ORDER_EVENTS_STREAM_TIMEOUT = 5 * 60  # Clients reconnect with Last-Event-ID
+ORDER_EVENTS_RETRY_MS = 2000
+
 # Geocoding Settings
-NOMINATIM_ENDPOINT = "https://nominatim.openstreetmap.org"
-VIACEP_ENDPOINT = "https://viacep.com.br/ws"
+NOMINATIM_ENDPOINT = config("NOMINATIM_ENDPOINT", default="https://nominatim.openstreetmap.org")
+VIACEP_ENDPOINT = config("VIACEP_ENDPOINT", default="https://viacep.com.br/ws")
+NOMINATIM_MIN_INTERVAL = config("NOMINATIM_MIN_INTERVAL", cast=float, default=1.0)  # Nominatim usage policy
 EARTH_RADIUS_KM = config("EARTH_RADIUS_KM", cast=float, default=6371.0088)
+
+# CEP lookup cache (seconds)
+CEP_CACHE_LOCAL_SIZE = config("CEP_CACHE_LOCAL_SIZE", cast=int, default=4096)
+CEP_CACHE_TTL = config("CEP_CACHE_TTL", cast=int, default=60 * 60 * 24 * 30)
+CEP_CACHE_NEGATIVE_TTL = config("CEP_CACHE_NEGATIVE_TTL", cast=int, default=60 * 60)
+CEP_CACHE_ERROR_TTL = config("CEP_CACHE_ERROR_TTL", cast=int, default=30)
+CEP_CACHE_LOCK_TIMEOUT = config("CEP_CACHE_LOCK_TIMEOUT", cast=int, default=10)
+
+# Offline CEP prefix centroids, used when the geocoding APIs are unavailable
+CEP_PREFIXES_PATH = config("CEP_PREFIXES_PATH", cast=Path, default=BASE_DIR / "data" / "cep_prefixes.csv")
+
+# Geocoding HTTP client
+HTTP_CLIENT_MAX_CONNECTIONS = config("HTTP_CLIENT_MAX_CONNECTIONS", cast=int, default=10)
+HTTP_CLIENT_RETRIES = config("HTTP_CLIENT_RETRIES", cast=int, default=3)
+HTTP_CLIENT_BACKOFF_FACTOR = config("HTTP_CLIENT_BACKOFF_FACTOR", cast=float, default=0.5)
@@ -1,10 +1,14 @@
+from django.conf import settings
 from django.contrib import admin, messages
 from django.http import HttpRequest, HttpResponseRedirect
+from django.template.loader import render_to_string
 from django.urls import reverse
 from django.views import View
+from unfold.decorators import display
 
 from app.account.inlines import AddressInline
 from app.common.admin import BaseAdmin
+from app.order.models import ProductSales
 from app.store.inlines import OpeningHoursInline
 from app.store.models import Store
 from app.store.sections import OpeningHoursSection
@@ -100,6 +104,13 @@ class StoreAdmin(BaseAdmin):
                 ),
             },
         ),
+        (
+            "Mais vendidos",
+            {
+                "classes": ("tab",),
+                "fields": ("get_top_products",),
+            },
+        ),
         (
             "Auditoria",
             {
@@ -117,6 +128,19 @@ class StoreAdmin(BaseAdmin):
         "owner",
         "cnpj",
         "name",
+        "get_top_products",
     )
     # Display functions
+    @display(description=f"Mais vendidos nos últimos {settings.TOP_PRODUCTS_DAYS} dias")
+    def get_top_products(self, obj):
+        if obj.pk is None:
+            return "-"
+        rows = [
+            [row["product_name"], row["quantity"], f"R$ {row['revenue']:.2f}"] for row in ProductSales.top(obj.pk)
+        ]
+        return render_to_string(
+            "unfold/components/table.html",
+            context={"table": {"headers": ["Produto", "Quantidade", "Receita"], "rows": rows}},
+        )
+
     # Actions
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class StoreConfig(AppConfig):
     name = "app.store"
     verbose_name = "Contas das Lojas"
+
+    def ready(self):
+        from app.common.cache import register_invalidation
+        from app.store.models import OpeningHours, Store, StoreSchedule
+
+        register_invalidation(Store, OpeningHours, StoreSchedule)
@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+from typing import Any
+
+from django.core.management.base import BaseCommand
+
+from app.common.cache import CachedReadMixin, metrics, reset_metrics
+from app.urls import router
+
+
+class Command(BaseCommand):
+    help = "Mostra acertos/erros do cache de leitura da API (lojas, seções, produtos), somados entre workers."
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--reset", action="store_true", help="Zera os contadores após exibir.")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        viewsets = [viewset for _, viewset, _ in router.registry if issubclass(viewset, CachedReadMixin)]
+        names = sorted({viewset.queryset.model._meta.label_lower for viewset in viewsets})
+        for name, counts in metrics(names).items():
+            total = counts["hit"] + counts["miss"]
+            ratio = counts["hit"] / total * 100 if total else 0.0
+            self.stdout.write(f"  {name:<20} acertos={counts['hit']:>8} erros={counts['miss']:>8} ({ratio:.1f}%)")
+
+        if options["reset"]:
+            reset_metrics(names)
+            self.stdout.write(self.style.SUCCESS("[cache_stats] contadores zerados."))
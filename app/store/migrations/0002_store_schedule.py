@@ -0,0 +1,64 @@
+# Generated by Django 6.0 on 2026-10-18 10:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def week_minute(weekday, at):
+    return (weekday - 1) * 24 * 60 + at.hour * 60 + at.minute
+
+
+def build_intervals(hours):
+    # Frozen copy of StoreSchedule.build: sorted week intervals, touching ones merged
+    intervals = []
+    weekly = sorted(
+        (week_minute(weekday, from_hour), week_minute(weekday, to_hour)) for weekday, from_hour, to_hour in hours
+    )
+    for start, end in weekly:
+        if intervals and start <= intervals[-1][1]:
+            intervals[-1][1] = max(intervals[-1][1], end)
+        else:
+            intervals.append([start, end])
+    return intervals
+
+
+def build_schedules(apps, schema_editor):
+    OpeningHours = apps.get_model('store', 'OpeningHours')
+    StoreSchedule = apps.get_model('store', 'StoreSchedule')
+    hours = {}
+    for store_id, weekday, from_hour, to_hour in OpeningHours.objects.values_list(
+        'store_id', 'weekday', 'from_hour', 'to_hour'
+    ).iterator():
+        hours.setdefault(store_id, []).append((weekday, from_hour, to_hour))
+    StoreSchedule.objects.bulk_create(
+        [StoreSchedule(store_id=store_id, intervals=build_intervals(rows)) for store_id, rows in hours.items()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoreSchedule',
+            fields=[
+                ('store', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='schedule', serialize=False, to='store.store', verbose_name='loja')),
+                ('intervals', models.JSONField(default=list, verbose_name='intervalos')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='atualizado em')),
+            ],
+            options={
+                'verbose_name': 'agenda semanal',
+                'verbose_name_plural': 'agendas semanais',
+                'db_table': 'store_schedule',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='openinghours',
+            index=models.Index(fields=['weekday', 'from_hour', 'to_hour', 'store'], name='opening_hours_open_at_idx'),
+        ),
+        migrations.RunPython(build_schedules, migrations.RunPython.noop),
+    ]
@@ -1,10 +1,50 @@
+import time as clock
+from bisect import bisect_right
+from datetime import datetime, time, timedelta
+from typing import Iterable, Optional
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.db import models
-from django.db.models import F, Q
+from django.db import models, transaction
+from django.db.models import Exists, F, OuterRef, Q
+from django.utils import timezone
 from django.utils.text import slugify
 
 from app.account.models import Account
+from app.common.cache import invalidate, tag_versions
 from app.common.models import BaseModel
+from app.common.transactions import OnCommitBatch
+
+# Opening hours are wall-clock times of the store, always read in this zone
+SCHEDULE_TIME_ZONE = ZoneInfo(settings.TIME_ZONE)
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+
+def schedule_time(when: Optional[datetime] = None) -> datetime:
+    """Return `when` (default: now) in the schedule time zone, truncated to the minute."""
+    return timezone.localtime(when or timezone.now(), SCHEDULE_TIME_ZONE).replace(second=0, microsecond=0)
+
+
+def schedule_tag(store_id: int) -> str:
+    return f"store_schedule:{store_id}"
+
+
+def week_minute(weekday: int, at: time) -> int:
+    """Return the minutes since Monday 00:00 of `at` on `weekday` (1 = Monday)."""
+    return (weekday - 1) * MINUTES_PER_DAY + at.hour * 60 + at.minute
+
+
+def interval_at(intervals: list[list[int]], minute: int) -> int:
+    """Index of the last interval opening at or before `minute` (-1 if none)."""
+    return bisect_right(intervals, minute, key=lambda interval: interval[0]) - 1
+
+
+def covers(intervals: list[list[int]], minute: int) -> bool:
+    """Whether one of the sorted [open, close) `intervals` contains `minute`."""
+    index = interval_at(intervals, minute)
+    return index >= 0 and minute < intervals[index][1]
 
 
 class OpeningHours(models.Model):
@@ -51,6 +91,22 @@ class OpeningHours(models.Model):
             ),
         ]
 
+        indexes = [
+            # Covers Store.open_at: one range scan per weekday, store ids read from the index
+            models.Index(fields=["weekday", "from_hour", "to_hour", "store"], name="opening_hours_open_at_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # Rebuilt once per store and transaction, from the committed rows
+        _schedule_rebuilds.add(self.store_id)
+
+    def delete(self, *args, **kwargs):
+        store_id = self.store_id
+        result = super().delete(*args, **kwargs)
+        _schedule_rebuilds.add(store_id)
+        return result
+
     def __str__(self):
         return f"{self.get_weekday_display()} de {self.from_hour.strftime('%H:%M')} às {self.to_hour.strftime('%H:%M')}"
 
@@ -125,6 +181,130 @@ class Store(BaseModel):
     def __str__(self):
         return self.name
 
+    @classmethod
+    def open_at(cls, queryset: models.QuerySet, when: Optional[datetime] = None) -> models.QuerySet:
+        """Filter `queryset` to the stores open at `when` (default: now).
+
+        An indexed lookup of the opening hours row covering `when`. It agrees with
+        `StoreSchedule.is_open`: schedules only merge intervals that touch.
+        """
+        local = schedule_time(when)
+        open_hours = OpeningHours.objects.filter(
+            store=OuterRef("pk"),
+            weekday=local.isoweekday(),
+            from_hour__lte=local.time(),
+            to_hour__gt=local.time(),
+        )
+        return queryset.filter(Exists(open_hours))
+
     def cnpj_formatted(self):
         """Return CNPJ formatted as 00.000.000/0000-00"""
         return f"{self.cnpj[:2]}.{self.cnpj[2:5]}.{self.cnpj[5:8]}/{self.cnpj[8:12]}-{self.cnpj[12:]}"
+
+
+# Store id -> (tag version, loaded at, schedule), see StoreSchedule.cached
+_cached_schedules: dict[int, tuple[int, float, "StoreSchedule"]] = {}
+
+
+class StoreSchedule(models.Model):
+    """Weekly schedule of a store, rebuilt whenever its opening hours change.
+
+    `intervals` holds the sorted, merged [open, close) intervals of the week in
+    minutes since Monday 00:00, so "open at" checks are a binary search with no
+    access to the opening hours rows.
+    """
+
+    # Relations
+    store = models.OneToOneField(
+        Store,
+        verbose_name="loja",
+        related_name="schedule",
+        on_delete=models.CASCADE,
+        primary_key=True,
+    )
+
+    # Fields
+    intervals = models.JSONField(verbose_name="intervalos", default=list)
+    updated_at = models.DateTimeField(verbose_name="atualizado em", auto_now=True)
+
+    class Meta:
+        verbose_name = "agenda semanal"
+        verbose_name_plural = "agendas semanais"
+        db_table = "store_schedule"
+
+    def __str__(self):
+        return f"Agenda de {self.store_id}"
+
+    @staticmethod
+    def build(hours: Iterable[tuple[int, time, time]]) -> list[list[int]]:
+        """Return the sorted week intervals of (weekday, from_hour, to_hour) rows, merging touching ones."""
+        intervals = []
+        weekly = sorted(
+            (week_minute(weekday, from_hour), week_minute(weekday, to_hour)) for weekday, from_hour, to_hour in hours
+        )
+        for start, end in weekly:
+            if intervals and start <= intervals[-1][1]:
+                intervals[-1][1] = max(intervals[-1][1], end)
+            else:
+                intervals.append([start, end])
+        return intervals
+
+    @classmethod
+    def rebuild(cls, store_id: int) -> "StoreSchedule":
+        """Recompute the schedule of the store from its opening hours and persist it."""
+        hours = OpeningHours.objects.filter(store_id=store_id).values_list("weekday", "from_hour", "to_hour")
+        schedule, _ = cls.objects.update_or_create(store_id=store_id, defaults={"intervals": cls.build(hours)})
+
+        def drop_cached():
+            # Dropped once the new hours are visible, so no process reloads the old row
+            _cached_schedules.pop(store_id, None)
+            invalidate(schedule_tag(store_id))
+
+        transaction.on_commit(drop_cached)
+        return schedule
+
+    @classmethod
+    def cached(cls, store_id: int) -> "StoreSchedule":
+        """Return the schedule of the store from the per-process cache.
+
+        Entries are validated against the store tag version in the shared cache,
+        so a hit costs one cache read and no database query. Other processes only
+        see the version bump with a shared CACHE_URL (see check common.W001);
+        entries older than STORE_SCHEDULE_LOCAL_TTL are reloaded anyway, which
+        bounds how long a process without it serves old hours. Stores without
+        opening hours get an empty schedule: never open, but `build_order` does
+        not restrict their orders.
+        """
+        version = tag_versions([schedule_tag(store_id)])[0]
+        now = clock.monotonic()
+        entry = _cached_schedules.get(store_id)
+        if entry is None or entry[0] != version or now - entry[1] >= settings.STORE_SCHEDULE_LOCAL_TTL:
+            schedule = cls.objects.filter(store_id=store_id).first() or cls(store_id=store_id)
+            entry = _cached_schedules[store_id] = (version, now, schedule)
+        return entry[2]
+
+    def is_open(self, when: Optional[datetime] = None) -> bool:
+        local = schedule_time(when)
+        return covers(self.intervals, week_minute(local.isoweekday(), local.time()))
+
+    def next_opening(self, when: Optional[datetime] = None) -> Optional[datetime]:
+        """Return when the store opens next, or None if it is open at `when` or has no hours."""
+        if not self.intervals or self.is_open(when):
+            return None
+
+        local = schedule_time(when)
+        minute = week_minute(local.isoweekday(), local.time())
+        index = interval_at(self.intervals, minute) + 1
+        # Past the last opening of the week: wrap around to the first one
+        start = self.intervals[index][0] if index < len(self.intervals) else self.intervals[0][0] + MINUTES_PER_WEEK
+        return local + timedelta(minutes=start - minute)
+
+
+def _rebuild_schedules(store_ids: set) -> None:
+    """Rebuild the schedule of each store whose opening hours changed in the committed transaction."""
+    # Stores deleted since have no schedule to rebuild
+    for store_id in sorted(Store.objects.filter(pk__in=store_ids).values_list("pk", flat=True)):
+        StoreSchedule.rebuild(store_id)
+
+
+_schedule_rebuilds = OnCommitBatch(_rebuild_schedules)
@@ -1,7 +1,11 @@
+from datetime import timedelta
+
+from django.utils import timezone
 from rest_framework import serializers
 
 from app.account.serializers import AddressSerializer
 from app.common.models import BaseSerializer
+from app.order.models import Order
 from app.store.models import OpeningHours, Store
 
 
@@ -22,6 +26,31 @@ class OpeningHoursSerializer(BaseSerializer):
         )
 
 
+class NearbyStoresQuerySerializer(serializers.Serializer):
+
+    lat = serializers.FloatField(min_value=-90, max_value=90)
+    lon = serializers.FloatField(min_value=-180, max_value=180)
+    radius_km = serializers.FloatField(min_value=0.1, max_value=50, default=5)
+
+
+class DailySalesQuerySerializer(serializers.Serializer):
+
+    MAX_DAYS = 366
+
+    since = serializers.DateField(required=False)
+    until = serializers.DateField(required=False)
+    status = serializers.ChoiceField(choices=Order.STATUS_CHOICES, required=False)
+
+    def validate(self, attrs):
+        attrs.setdefault("until", timezone.localdate())
+        attrs.setdefault("since", attrs["until"] - timedelta(days=29))
+        if attrs["since"] > attrs["until"]:
+            raise serializers.ValidationError({"since": "Deve ser anterior a until."})
+        if (attrs["until"] - attrs["since"]).days >= self.MAX_DAYS:
+            raise serializers.ValidationError({"since": f"Período máximo de {self.MAX_DAYS} dias."})
+        return attrs
+
+
 class StoreSerializer(BaseSerializer):
 
     # Nested serializers
@@ -30,10 +59,26 @@ class StoreSerializer(BaseSerializer):
 
     # Fields
     cnpj = serializers.SerializerMethodField(method_name="cnpj_formatted")
+    is_open_now = serializers.SerializerMethodField()
+    next_opening = serializers.SerializerMethodField()
 
     def cnpj_formatted(self, obj):
         return obj.cnpj_formatted()
 
+    def get_is_open_now(self, obj):
+        # Stores without opening hours have no schedule row
+        return obj.schedule.is_open() if hasattr(obj, "schedule") else False
+
+    def get_next_opening(self, obj):
+        next_opening = obj.schedule.next_opening() if hasattr(obj, "schedule") else None
+        return serializers.DateTimeField().to_representation(next_opening) if next_opening else None
+
     class Meta:
         model = Store
         exclude = BaseSerializer.Meta.exclude + ("owner",)
+
+
+class NearbyStoreSerializer(StoreSerializer):
+
+    # Fields
+    distance_km = serializers.FloatField(read_only=True)
@@ -1,3 +1,190 @@
-from django.test import TestCase
+from datetime import datetime, time
+from decimal import Decimal
+from importlib import import_module
 
-# Create your tests here.
+from unittest import mock
+
+from django.apps import apps
+from django.test import TestCase, override_settings
+
+from app.common.pagination import PageNumberPagination
+from app.common.testing import postgres_sql
+from app.common.utils import haversine_km, longitude_ranges
+from app.factories.address import AddressFactory
+from app.factories.opening_hours import OpeningHoursFactory
+from app.factories.store import StoreFactory
+from app.store import models as store_models
+from app.store.models import SCHEDULE_TIME_ZONE, Store, StoreSchedule
+from app.store.serializers import StoreSerializer
+
+
+def at(day: int, hour: int, minute: int = 0) -> datetime:
+    # 2026-10-19 is a Monday
+    return datetime(2026, 10, 18 + day, hour, minute, tzinfo=SCHEDULE_TIME_ZONE)
+
+
+class StoreScheduleTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.store = StoreFactory()
+        with cls.captureOnCommitCallbacks(execute=True):
+            OpeningHoursFactory(store=cls.store, weekday=1, from_hour=time(10, 0), to_hour=time(18, 0))
+            OpeningHoursFactory(store=cls.store, weekday=5, from_hour=time(18, 0), to_hour=time(23, 0))
+        cls.closed_store = StoreFactory()
+
+    def test_schedule_is_rebuilt_when_hours_change(self):
+        schedule = StoreSchedule.objects.get(store=self.store)
+        self.assertEqual(schedule.intervals, [[600, 1080], [6840, 7140]])
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.store.opening_hours.get(weekday=5).delete()
+        # Rebuilt once the change commits
+        schedule.refresh_from_db()
+        self.assertEqual(schedule.intervals, [[600, 1080], [6840, 7140]])
+        for callback in callbacks:
+            callback()
+        schedule.refresh_from_db()
+        self.assertEqual(schedule.intervals, [[600, 1080]])
+
+    @override_settings(STORE_SCHEDULE_LOCAL_TTL=60)
+    def test_cached_schedule_is_dropped_on_commit_and_expires(self):
+        store_models._cached_schedules.clear()
+        with mock.patch.object(store_models.clock, "monotonic", return_value=1000.0) as monotonic:
+            cached = StoreSchedule.cached(self.store.id)
+            with self.captureOnCommitCallbacks() as callbacks:
+                StoreSchedule.rebuild(self.store.id)
+            # Kept until the new hours commit
+            self.assertIs(StoreSchedule.cached(self.store.id), cached)
+            for callback in callbacks:
+                callback()
+            reloaded = StoreSchedule.cached(self.store.id)
+            self.assertIsNot(reloaded, cached)
+
+            # A version bump this process never sees: reloaded once the local TTL ends
+            with mock.patch.object(store_models, "tag_versions", return_value=[0]):
+                StoreSchedule.cached(self.store.id)
+                monotonic.return_value += 59
+                with self.assertNumQueries(0):
+                    self.assertIs(StoreSchedule.cached(self.store.id), StoreSchedule.cached(self.store.id))
+                monotonic.return_value += 1
+                with self.assertNumQueries(1):
+                    StoreSchedule.cached(self.store.id)
+
+    def test_migration_builds_the_same_intervals(self):
+        migration = import_module("app.store.migrations.0002_store_schedule")
+        StoreSchedule.objects.all().delete()
+        migration.build_schedules(apps, None)
+        self.assertEqual(StoreSchedule.objects.get(store=self.store).intervals, [[600, 1080], [6840, 7140]])
+        hours = [(1, time(10, 0), time(12, 0)), (1, time(12, 0), time(14, 0)), (7, time(22, 0), time(23, 30))]
+        self.assertEqual(migration.build_intervals(hours), StoreSchedule.build(hours))
+
+    def test_is_open_and_next_opening(self):
+        schedule = self.store.schedule
+        self.assertTrue(schedule.is_open(at(1, 10)))
+        self.assertFalse(schedule.is_open(at(1, 18)))
+        self.assertIsNone(schedule.next_opening(at(1, 12)))
+        self.assertEqual(schedule.next_opening(at(1, 9, 30)), at(1, 10))
+        self.assertEqual(schedule.next_opening(at(1, 18)), at(5, 18))
+        # Saturday wraps around to the next Monday
+        self.assertEqual(schedule.next_opening(at(6, 12)), at(8, 10))
+
+    def test_open_at_filters_by_local_time(self):
+        self.assertQuerySetEqual(Store.open_at(Store.objects.all(), at(5, 20)), [self.store])
+        self.assertQuerySetEqual(Store.open_at(Store.objects.all(), at(5, 23)), [])
+
+    def test_open_at_is_one_indexed_query(self):
+        sql, params = postgres_sql(Store.open_at(Store.objects.all(), at(5, 20)))
+        self.assertIn('WHERE EXISTS(SELECT %s AS "a" FROM "opening_hours" U0', sql)
+        self.assertIn('U0."store_id" = ("store"."id")', sql)
+        self.assertNotIn("store_schedule", sql)
+        self.assertEqual(params[1:], (time(20, 0), time(20, 0), 5))
+
+    def test_each_store_is_rebuilt_once_per_transaction(self):
+        store = StoreFactory()
+        with mock.patch.object(StoreSchedule, "rebuild") as rebuild, self.captureOnCommitCallbacks(execute=True):
+            for weekday in range(1, 8):
+                OpeningHoursFactory(store=store, weekday=weekday, from_hour=time(8, 0), to_hour=time(22, 0))
+            store.opening_hours.get(weekday=7).delete()
+            rebuild.assert_not_called()
+        rebuild.assert_called_once_with(store.id)
+
+    def test_serializer_without_hours(self):
+        data = StoreSerializer(Store.objects.select_related("schedule").get(pk=self.closed_store.pk)).data
+        self.assertFalse(data["is_open_now"])
+        self.assertIsNone(data["next_opening"])
+
+
+class NearbyStoresTests(TestCase):
+
+    ORIGIN = (-23.55, -46.63)
+
+    @classmethod
+    def setUpTestData(cls):
+        lat, lon = cls.ORIGIN
+        cls.near = cls.store_at(lat + 0.0045, lon)  # ~0.5 km
+        cls.mid = cls.store_at(lat - 0.027, lon)  # ~3 km
+        cls.address(cls.mid, lat + 1, lon)  # Other address, far away: the closest one counts
+        cls.far = cls.store_at(lat + 0.18, lon)  # ~20 km
+        cls.address(StoreFactory(), None, None)  # Not geocoded
+
+    @classmethod
+    def store_at(cls, lat, lon):
+        store = StoreFactory()
+        cls.address(store, lat, lon)
+        return store
+
+    @staticmethod
+    def address(store, lat, lon):
+        if lat is not None:
+            lat, lon = Decimal(f"{lat:.6f}"), Decimal(f"{lon:.6f}")
+        return AddressFactory(account=None, store=store, latitude=lat, longitude=lon)
+
+    def get(self, **params):
+        return self.client.get("/api/stores/nearby/", {"lat": self.ORIGIN[0], "lon": self.ORIGIN[1], **params})
+
+    def uuids(self, response):
+        return [row["uuid"] for row in response.json()["results"]]
+
+    def test_stores_within_the_radius_closest_first(self):
+        response = self.get(radius_km=5)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.uuids(response), [str(self.near.uuid), str(self.mid.uuid)])
+        self.assertEqual(response.json()["count"], 2)
+        self.assertEqual(self.uuids(self.get()), self.uuids(response))  # radius_km defaults to 5
+        self.assertEqual(self.uuids(self.get(radius_km=50))[-1], str(self.far.uuid))
+
+    def test_distance_is_to_the_closest_address(self):
+        rows = self.get(radius_km=5).json()["results"]
+        expected = haversine_km(*self.ORIGIN, self.ORIGIN[0] - 0.027, self.ORIGIN[1])
+        self.assertEqual(rows[1]["distance_km"], round(expected, 3))
+        self.assertAlmostEqual(rows[1]["distance_km"], 3.0, delta=0.1)
+
+    def test_invalid_parameters(self):
+        for params in (
+            {"lat": ""},
+            {"lon": "leste"},
+            {"lat": 91},
+            {"lon": -181},
+            {"radius_km": 0},
+            {"radius_km": 51},
+        ):
+            with self.subTest(params=params):
+                self.assertEqual(self.get(**params).status_code, 400)
+        self.assertEqual(self.client.get("/api/stores/nearby/", {"lat": 0}).status_code, 400)
+
+    def test_pagination(self):
+        with mock.patch.object(PageNumberPagination, "page_size", 1):
+            first = self.get(radius_km=5)
+            second = self.get(radius_km=5, page=2)
+        self.assertEqual(first.json()["count"], 2)
+        self.assertIsNotNone(first.json()["next"])
+        self.assertEqual(self.uuids(first), [str(self.near.uuid)])
+        self.assertEqual(self.uuids(second), [str(self.mid.uuid)])
+
+    def test_box_crossing_the_antimeridian(self):
+        self.assertEqual(longitude_ranges(-180.5, -179.5), [(179.5, 180.0), (-180.0, -179.5)])
+        store = self.store_at(-17.0, 179.99)
+        response = self.client.get("/api/stores/nearby/", {"lat": -17.0, "lon": -179.99, "radius_km": 50})
+        self.assertEqual(self.uuids(response), [str(store.uuid)])
+        self.assertAlmostEqual(response.json()["results"][0]["distance_km"], 2.1, delta=0.1)
@@ -1,16 +1,108 @@
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import permissions
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.response import Response
+
+from app.account.models import Address
+from app.common.cache import CachedReadMixin
 from app.common.models import BaseModelViewSet
-from app.store.models import Store
-from app.store.serializers import StoreSerializer
+from app.common.utils import bounding_box, haversine_km, longitude_ranges
+from app.order.serializers import DailySalesSerializer
+from app.store.models import OpeningHours, Store, StoreSchedule
+from app.store.serializers import (
+    DailySalesQuerySerializer,
+    NearbyStoreSerializer,
+    NearbyStoresQuerySerializer,
+    StoreSerializer,
+)
 
 
-class StoreViewSet(BaseModelViewSet):
+class StoreViewSet(CachedReadMixin, BaseModelViewSet):
 
     queryset = Store.objects.select_related(
         "owner",
         "owner__user",
+        "schedule",
     ).prefetch_related(
         "opening_hours",
         "addresses",
     )
 
     serializer_class = StoreSerializer
+    cache_models = (Store, OpeningHours, StoreSchedule, Address)
+    # Opening hours have no updated_at: their schedule row is rebuilt on every change
+    conditional_related = ("addresses", "schedule")
+    cache_timeout = 60  # Keys change every minute, see get_response_version
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.query_params.get("open_now") in ("1", "true"):
+            queryset = Store.open_at(queryset)
+        return queryset
+
+    def get_response_version(self) -> str:
+        # `is_open_now`/`next_opening` change with the clock: cache and validate per minute
+        return timezone.now().strftime("%Y%m%d%H%M")
+
+    @action(detail=False, methods=["get"], serializer_class=NearbyStoreSerializer)
+    def nearby(self, request):
+        """List stores with an address within `radius_km` of (`lat`, `lon`), closest first."""
+        params = NearbyStoresQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        lat, lon, radius_km = (params.validated_data[k] for k in ("lat", "lon", "radius_km"))
+
+        # Indexed bounding box pre-filter, only coordinates are loaded
+        min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, radius_km)
+        # Near the antimeridian the box wraps around: one longitude range on each side
+        in_lon_range = Q()
+        for lon_range in longitude_ranges(min_lon, max_lon):
+            in_lon_range |= Q(longitude__range=lon_range)
+        candidates = Address.objects.filter(
+            in_lon_range,
+            store__isnull=False,
+            latitude__range=(min_lat, max_lat),
+        ).values_list("store_id", "latitude", "longitude")
+
+        # Exact distance, keeping the closest address of each store
+        distances = {}
+        for store_id, store_lat, store_lon in candidates.iterator():
+            distance = haversine_km(lat, lon, float(store_lat), float(store_lon))
+            if distance <= radius_km and distance < distances.get(store_id, float("inf")):
+                distances[store_id] = distance
+
+        ranked_ids = sorted(distances, key=distances.get)
+        page_ids = self.paginate_queryset(ranked_ids)
+        stores = self.get_queryset().in_bulk(page_ids)
+
+        results = []
+        for store_id in page_ids:
+            if (store := stores.get(store_id)) is None:
+                continue
+            store.distance_km = round(distances[store_id], 3)
+            results.append(store)
+
+        serializer = self.get_serializer(results, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(
+        detail=True,
+        methods=["get"],
+        serializer_class=DailySalesSerializer,
+        permission_classes=[permissions.IsAuthenticated],
+    )
+    def sales(self, request, *args, **kwargs):
+        """List the daily sales rollup of a store (owner or staff only), one row per day and status."""
+        store = self.get_object()
+        if not request.user.is_staff and store.owner.user_id != request.user.id:
+            raise PermissionDenied()
+
+        params = DailySalesQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        rows = store.daily_sales.filter(day__range=(params.validated_data["since"], params.validated_data["until"]))
+        if status := params.validated_data.get("status"):
+            rows = rows.filter(status=status)
+
+        serializer = self.get_serializer(rows.order_by("day", "status"), many=True)
+        return Response(serializer.data)
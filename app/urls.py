@@ -8,6 +8,7 @@ from rest_framework import routers
 from app.account import views as account_views
 from app.documentation import schema_view
 from app.order import views as order_views
+from app.order.events import order_events_view
 from app.product import views as product_views
 from app.store import views as store_views
 from app.store.admin import StoreSetActiveView
@@ -16,12 +17,14 @@ router = routers.DefaultRouter()
 router.register(r"accounts", account_views.AccountViewSet, basename="account")
 router.register(r"addresses", account_views.AddressViewSet, basename="address")
 router.register(r"orders", order_views.OrderViewSet, basename="order")
+router.register(r"menus", product_views.MenuViewSet, basename="menu")
 router.register(r"products", product_views.ProductViewSet, basename="product")
 router.register(r"sections", product_views.SectionViewSet, basename="section")
 router.register(r"stores", store_views.StoreViewSet, basename="store")
 
 urlpatterns = [
     path("admin/store/active/", StoreSetActiveView.as_view(), name="store_set_active"),
+    path("admin/store/<int:store_id>/events/", order_events_view, name="store_order_events"),
     path("admin/", admin.site.urls),
     path("api/", include(router.urls), name="api"),
 ]